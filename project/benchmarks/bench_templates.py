@@ -0,0 +1,110 @@
+"""
+Microbenchmark: slide templates vs. the slide functions of a baseline commit.
+
+The baseline functions are read with git from project/slide_generator.py at
+the given revision (the root commit by default), so no copy of the old code
+is kept in the tree.
+
+Usage (from the project directory):
+    python benchmarks/bench_templates.py [--baseline REV] [--number 20000] [--repeat 5]
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import timeit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PROJECT_DIR)
+
+import slide_templates  # noqa: E402
+
+BASELINE_PATH = "project/slide_generator.py"
+
+TEMPLATE_NAMES = [
+    "generate_intro_slide",
+    "generate_body_slide1",
+    "generate_body_slide2",
+    "generate_body_slide3",
+    "generate_body_slide5",
+    "generate_body_slide6",
+    "generate_body_slide7",
+    "generate_body_slide8",
+    "generate_conclusion_slide",
+]
+
+# Tham số giống một lần re-theme: đổi màu/kích thước chữ, giữ nội dung mặc định
+RETHEME_ARGS = {
+    "generate_intro_slide": {"title_color": "#123456", "content_font_size": "22px"},
+    "generate_body_slide1": {"bg_color": "#FAFAFA", "para_font_size": "22px"},
+    "generate_body_slide2": {"background_color": "#FAFAFA", "para_font_size": "22px"},
+    "generate_body_slide3": {"left_bg_color": "#FAFAFA", "text_color": "#222222"},
+    "generate_body_slide5": {"bg_color": "#01579B", "content_font_size": "18px"},
+    "generate_body_slide6": {"title_color": "#222222", "section_content_font_size": "18px"},
+    "generate_body_slide7": {"bg_color": "#FAFAFA", "content_font_size": "22px"},
+    "generate_body_slide8": {"bg_color": "#FAFAFA", "content_font_size": "22px"},
+    "generate_conclusion_slide": {"title_color": "#123456", "content_font_size": "18px"},
+}
+
+
+def _git(*args):
+    return subprocess.run(["git", *args], cwd=PROJECT_DIR, check=True, capture_output=True, text=True).stdout
+
+
+def load_baseline(rev=None):
+    """The slide functions of slide_generator.py at rev, without importing the rest of that module."""
+    if rev is None:
+        rev = _git("rev-list", "--max-parents=0", "HEAD").split()[0]
+    source = _git("show", f"{rev}:{BASELINE_PATH}")
+    # Chỉ lấy các hàm slide (chỉ dùng f-string), bỏ qua import mô hình/selenium của module cũ
+    module = ast.parse(source)
+    module.body = [node for node in module.body
+                   if isinstance(node, ast.FunctionDef) and node.name in TEMPLATE_NAMES]
+    namespace = {}
+    exec(compile(module, f"{rev}:{BASELINE_PATH}", "exec"), namespace)
+    return namespace
+
+
+def bench(fn, kwargs, number, repeat):
+    best = min(timeit.repeat(lambda: fn(**kwargs), number=number, repeat=repeat))
+    return number / best
+
+
+def run(number, repeat, baseline_rev=None):
+    baseline = load_baseline(baseline_rev)
+    results = []
+    for name in TEMPLATE_NAMES:
+        kwargs = RETHEME_ARGS[name]
+        page = getattr(slide_templates, name)
+        baseline_ops = bench(baseline[name], kwargs, number, repeat)
+        page_ops = bench(page, kwargs, number, repeat)
+        # Đường render khi CSS tĩnh đã nằm trong stylesheet dùng chung của deck
+        partial_ops = bench(page.template.render_parts, kwargs, number, repeat)
+        results.append({
+            "template": name,
+            "baseline_ops_per_sec": baseline_ops,
+            "page_ops_per_sec": page_ops,
+            "theme_body_ops_per_sec": partial_ops,
+            "speedup": page_ops / baseline_ops,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=None, help="git revision to compare against (default: root commit)")
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'template':<28}{'baseline ops/s':>16}{'page ops/s':>16}{'speedup':>10}{'theme+body ops/s':>18}")
+    for row in run(args.number, args.repeat, args.baseline):
+        print(f"{row['template']:<28}{row['baseline_ops_per_sec']:>16,.0f}"
+              f"{row['page_ops_per_sec']:>16,.0f}{row['speedup']:>9.2f}x"
+              f"{row['theme_body_ops_per_sec']:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
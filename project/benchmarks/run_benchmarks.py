@@ -0,0 +1,340 @@
+"""
+Benchmark suite: template/parser microbenchmarks, render throughput and an
+end-to-end process_slides run with stub model backends (CPU only).
+
+Usage (from the project directory):
+    python benchmarks/run_benchmarks.py [--levels micro,component,e2e] [--output results.json]
+    python benchmarks/run_benchmarks.py --output new.json --compare baseline.json [--threshold 0.10]
+
+Rendering uses a stub screenshot by default; pass --render chrome to drive a
+real headless Chrome (component level and e2e).
+"""
+import argparse
+import glob
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import zlib
+
+# Không tải Qwen/Qwen-VL: các benchmark dùng backend giả
+os.environ.setdefault("SLIDEGEN_LOAD_MODELS", "0")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+DOCUMENT_DIR = os.path.join(os.path.dirname(PROJECT_DIR), "Document")
+sys.path.insert(0, PROJECT_DIR)
+
+from PIL import Image  # noqa: E402
+
+import chunking  # noqa: E402
+import docx_stream  # noqa: E402
+import slide_generator  # noqa: E402
+import slide_templates  # noqa: E402
+import text_fit  # noqa: E402
+from render_cache import RenderCache  # noqa: E402
+from tool_registry import TOOL_REGISTRY, get_tool  # noqa: E402
+
+logging.getLogger().setLevel(logging.WARNING)
+
+STUB_ACCEPT = "accept\nStub evaluator: layout accepted."
+
+
+def measure(fn, repeat=5, number=None):
+    """Best/median seconds per call; number is picked like timeit's autorange when not given."""
+    timer = timeit.Timer(fn)
+    if number is None:
+        number, _ = timer.autorange()
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "number": number,
+        "repeat": repeat,
+        "best_s": min(times),
+        "median_s": statistics.median(times),
+        "ops_per_sec": 1.0 / min(times),
+    }
+
+
+def sample_documents():
+    return sorted(glob.glob(os.path.join(DOCUMENT_DIR, "*.docx")))
+
+
+def sample_paragraphs():
+    documents = sample_documents()
+    if not documents:
+        return [docx_stream.Paragraph(f"Đoạn {i}: " + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 6,
+                                      None, None, None) for i in range(40)]
+    return list(docx_stream.iter_paragraphs(documents[0]))
+
+
+def stub_tool_call(slide_content):
+    """A well-formed tool call for slide_content, cycling through the registered templates."""
+    names = list(TOOL_REGISTRY)
+    spec = get_tool(names[zlib.crc32(slide_content.encode("utf-8")) % len(names)])
+    lines = [line.strip() for line in slide_content.split("\n") if line.strip()] or ["Slide"]
+    sentences = [s.strip() for s in slide_content.replace("\n", " ").split(".") if s.strip()][:6] or lines
+    arguments = {}
+    for name, prop in spec.schema["function"]["parameters"]["properties"].items():
+        if name in ("title", "slide_title", "header_text"):
+            arguments[name] = lines[0][:80]
+        elif prop["type"] == "string" and name.startswith(("content", "paragraph")) and not name.endswith(("_size", "_color", "_width", "_height", "_margin", "_align")):
+            arguments[name] = " ".join(lines[1:])[:600] or lines[0]
+        elif prop["type"] == "array":
+            arguments[name] = sentences
+        elif prop["type"] == "object":
+            arguments[name] = {lines[0][:30]: sentences[:3], "Chi tiết": sentences[3:6] or sentences[:1]}
+    call = json.dumps({"name": spec.name, "arguments": arguments}, ensure_ascii=False)
+    return f"<tool_call>\n{call}\n</tool_call><|im_end|>"
+
+
+def stub_get_html_slide(pre_slide_content, pre_function_call, slide_content):
+    return stub_tool_call(slide_content)
+
+
+def stub_evaluate_slide(image, previous_image, tool_call_output):
+    return STUB_ACCEPT
+
+
+def stub_capture_slide_image(driver, html_content, output_path=None, width=slide_generator.SLIDE_IMAGE_WIDTH,
+                             image_format=slide_generator.SLIDE_IMAGE_FORMAT, quality=slide_generator.SLIDE_IMAGE_QUALITY,
+                             decode=True):
+    image = Image.new("RGB", slide_generator.slide_image_size(width), color="white")
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format.upper(), quality=quality)
+    image_bytes = buffer.getvalue()
+    if output_path:
+        with open(output_path, "wb") as f:
+            f.write(image_bytes)
+    return image_bytes, image if decode else None
+
+
+def start_chrome():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    for argument in ("--headless", "--no-sandbox", "--disable-dev-shm-usage", "--disable-gpu", "--window-size=1920,1080"):
+        options.add_argument(argument)
+    return webdriver.Chrome(options=options)
+
+
+class Stubs:
+    """Patch slide_generator's model (and optionally render) backends for the duration of a block."""
+
+    def __init__(self, render):
+        self.render = render
+        self._saved = {}
+
+    def __enter__(self):
+        patches = {
+            "get_html_slide": stub_get_html_slide,
+            "evaluate_slide_with_qwen": stub_evaluate_slide,
+        }
+        if self.render == "stub":
+            patches["capture_slide_image"] = stub_capture_slide_image
+        else:
+            patches["initialize_chromedriver"] = start_chrome
+        # Cache render riêng, rỗng: mỗi lần chạy đo render thật chứ không đo cache hit
+        self._cache_dir = tempfile.TemporaryDirectory(prefix="bench-render-")
+        patches["render_cache"] = RenderCache(self._cache_dir.name, max_bytes=0)
+        for name, value in patches.items():
+            self._saved[name] = getattr(slide_generator, name)
+            setattr(slide_generator, name, value)
+        return self
+
+    def __exit__(self, *exc):
+        for name, value in self._saved.items():
+            setattr(slide_generator, name, value)
+        self._cache_dir.cleanup()
+
+
+def bench_micro(repeat):
+    results = {}
+    for name, spec in TOOL_REGISTRY.items():
+        results[f"micro.template.{name}"] = measure(spec.function, repeat)
+
+    paragraphs = sample_paragraphs()
+    slide_list = list(chunking.iter_slide_units(paragraphs))
+    raw_calls = [stub_tool_call(slide) for slide in slide_list]
+    cleaned = slide_generator.clean_slide_function(raw_calls)
+    vlm_deny = "deny\nText overflows the content box.\n" + cleaned[0]
+
+    results["micro.try_parse_tool_calls"] = measure(lambda: [slide_generator.try_parse_tool_calls(c) for c in cleaned], repeat)
+    results["micro.clean_slide_function"] = measure(lambda: slide_generator.clean_slide_function(raw_calls), repeat)
+    results["micro.parse_vlm_response"] = measure(
+        lambda: (slide_generator.parse_vlm_response(STUB_ACCEPT), slide_generator.parse_vlm_response(vlm_deny)), repeat)
+    results["micro.iter_slide_units"] = measure(lambda: list(chunking.iter_slide_units(paragraphs)), repeat)
+    documents = sample_documents()
+    if documents:
+        results["micro.iter_paragraphs"] = measure(lambda: list(docx_stream.iter_paragraphs(documents[0])), repeat)
+    results["micro.coerce_arguments"] = measure(
+        lambda: [slide_generator.parse_tool_call(c) for c in cleaned], repeat)
+    for result in results.values():
+        result.setdefault("items", 1)
+    results["micro.try_parse_tool_calls"]["items"] = len(cleaned)
+    results["micro.coerce_arguments"]["items"] = len(cleaned)
+    return results
+
+
+def bench_component(repeat, render):
+    results = {}
+    specs = list(TOOL_REGISTRY.values())
+    results["component.text_fit"] = measure(lambda: [text_fit.fit_arguments(spec, {}) for spec in specs], repeat)
+    results["component.text_fit"]["items"] = len(specs)
+
+    if render != "chrome":
+        # Ảnh giả không đi qua render cache: cold/warm sẽ đo cùng một thứ
+        logging.warning("Render cache benchmarks need --render chrome, skipping them")
+        return results
+    pages = [spec.function() for spec in specs]
+    try:
+        driver = start_chrome()
+    except Exception as e:
+        logging.warning(f"Chrome unavailable, skipping render benchmarks: {e}")
+        return results
+    capture = slide_generator.capture_slide_image
+    saved_cache = slide_generator.render_cache
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-render-") as cold_dir, \
+                tempfile.TemporaryDirectory(prefix="bench-render-") as warm_dir:
+            # Cold: cache không giữ gì; warm: mọi slide đã có trong cache
+            slide_generator.render_cache = RenderCache(cold_dir, max_bytes=0)
+            results["component.render_cold"] = measure(lambda: [capture(driver, page) for page in pages], repeat=max(1, repeat // 2), number=1)
+            slide_generator.render_cache = RenderCache(warm_dir)
+            results["component.render_warm"] = measure(lambda: [capture(driver, page) for page in pages], repeat)
+    finally:
+        slide_generator.render_cache = saved_cache
+        driver.quit()
+    for key in ("component.render_cold", "component.render_warm"):
+        results[key]["items"] = len(pages)
+        results[key]["render"] = render
+    return results
+
+
+def bench_e2e(repeat, render):
+    results = {}
+    documents = sample_documents()
+    if not documents:
+        logging.warning(f"No .docx files in {DOCUMENT_DIR}, skipping end-to-end benchmark")
+        return results
+    with Stubs(render):
+        for document in documents:
+            name = os.path.splitext(os.path.basename(document))[0]
+            with tempfile.TemporaryDirectory(prefix="bench-e2e-") as workdir:
+                times = []
+                for _ in range(repeat):
+                    output_folder = tempfile.mkdtemp(dir=workdir)
+                    start = time.perf_counter()
+                    slide_generator.process_slides(document, output_folder)
+                    times.append(time.perf_counter() - start)
+                # Tải lên lại cùng tài liệu: mọi slide được dùng lại từ manifest.json
+                rerun_times = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    slide_generator.process_slides(document, output_folder)
+                    rerun_times.append(time.perf_counter() - start)
+            results[f"e2e.process_slides.{name}"] = {
+                "number": 1,
+                "repeat": repeat,
+                "best_s": min(times),
+                "median_s": statistics.median(times),
+                "ops_per_sec": 1.0 / min(times),
+                "render": render,
+            }
+            results[f"e2e.process_slides_unchanged.{name}"] = {
+                "number": 1,
+                "repeat": repeat,
+                "best_s": min(rerun_times),
+                "median_s": statistics.median(rerun_times),
+                "ops_per_sec": 1.0 / min(rerun_times),
+                "render": render,
+            }
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Rows of (name, baseline ops/s, new ops/s, ratio, regressed) for cases present in both runs."""
+    rows = []
+    for name, result in sorted(results.items()):
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = result["ops_per_sec"] / base["ops_per_sec"]
+        rows.append((name, base["ops_per_sec"], result["ops_per_sec"], ratio, ratio < 1.0 - threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--levels", default="micro,component,e2e")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--e2e-repeat", type=int, default=3)
+    parser.add_argument("--render", choices=("stub", "chrome"), default="stub")
+    parser.add_argument("--filter", default="", help="only keep benchmarks whose name contains this")
+    parser.add_argument("--output", help="write results as JSON (use as a later --compare baseline)")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before failing (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    levels = [level.strip() for level in args.levels.split(",") if level.strip()]
+    results = {}
+    if "micro" in levels:
+        results.update(bench_micro(args.repeat))
+    if "component" in levels:
+        results.update(bench_component(args.repeat, args.render))
+    if "e2e" in levels:
+        results.update(bench_e2e(args.e2e_repeat, args.render))
+    results = {name: result for name, result in results.items() if args.filter in name}
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "levels": levels,
+            "render": args.render,
+        },
+        "results": results,
+    }
+
+    print(f"{'benchmark':<52}{'ops/s':>14}{'best ms':>12}{'median ms':>12}")
+    for name, result in sorted(results.items()):
+        print(f"{name:<52}{result['ops_per_sec']:>14,.1f}{result['best_s'] * 1000:>12.3f}{result['median_s'] * 1000:>12.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        print(f"\n{'benchmark':<52}{'baseline':>14}{'current':>14}{'ratio':>9}")
+        for name, base_ops, new_ops, ratio, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:<52}{base_ops:>14,.1f}{new_ops:>14,.1f}{ratio:>8.2f}x{flag}")
+        regressions = [row for row in rows if row[4]]
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
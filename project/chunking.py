@@ -0,0 +1,216 @@
+import logging
+import re
+from collections import namedtuple
+
+from docx_stream import Table
+
+logger = logging.getLogger(__name__)
+
+# Chia tài liệu thành các đơn vị slide theo cấu trúc (tiêu đề, danh sách, bảng)
+# thay vì cửa sổ ký tự cố định: không cắt giữa danh sách/bảng, không lặp phần chồng lấn.
+
+SLIDE_MAX_CHARS = 1000
+SLIDE_MIN_CHARS = 300
+
+# Đoạn không có style tiêu đề nhưng trông như tiêu đề (tài liệu gõ tay, không dùng Heading)
+PSEUDO_HEADING_MAX_CHARS = 100
+PSEUDO_HEADING_MAX_WORDS = 15
+PSEUDO_HEADING_LEVEL = 9
+_SENTENCE_END = re.compile(r"(?<=[.!?…;])\s+")
+_NOT_A_HEADING_END = (".", ";", ",", "…")
+
+# kind: heading | paragraph | list | table; lines: các dòng của khối
+Block = namedtuple("Block", "kind lines heading_level")
+
+
+def looks_like_heading(text):
+    return (
+        len(text) <= PSEUDO_HEADING_MAX_CHARS
+        and len(text.split()) <= PSEUDO_HEADING_MAX_WORDS
+        and not text.endswith(_NOT_A_HEADING_END)
+    )
+
+
+def table_lines(rows):
+    """Markdown lines of a table: the first row as header, then the body rows."""
+    if not rows:
+        return []
+    width = max(len(row) for row in rows)
+    cells = [[cell.replace("\n", " ").replace("|", "/") for cell in row] + [""] * (width - len(row)) for row in rows]
+    lines = ["| " + " | ".join(cells[0]) + " |", "|" + "---|" * width]
+    lines.extend("| " + " | ".join(row) + " |" for row in cells[1:])
+    return lines
+
+
+def image_line(url):
+    return f"[image: {url}]"
+
+
+def iter_blocks(paragraphs):
+    """
+    Group docx_stream paragraphs into blocks: every heading and plain
+    paragraph is its own block, consecutive list items form one list block
+    and every table one table block (markdown rows). Images become
+    "[image: url]" lines of the block they appear in.
+    """
+    pending_kind = None
+    pending = []
+    for paragraph in paragraphs:
+        images = [image_line(url) for url in paragraph.images]
+        if isinstance(paragraph, Table):
+            if pending:
+                yield Block(pending_kind, pending, None)
+                pending_kind, pending = None, []
+            lines = table_lines(paragraph.rows) + images
+            if lines:
+                yield Block("table", lines, None)
+            continue
+        text = paragraph.text.strip()
+        if not text:
+            if not images:
+                continue
+            kind, line = "paragraph", None
+        elif paragraph.list_level is not None:
+            kind, line = "list", "  " * paragraph.list_level + "- " + text
+        elif paragraph.heading_level is not None:
+            kind, line = "heading", text
+        elif looks_like_heading(text) and not images:
+            kind, line = "heading", text
+        else:
+            kind, line = "paragraph", text
+        lines = ([line] if line is not None else []) + images
+        if kind == pending_kind:
+            pending.extend(lines)
+            continue
+        if pending:
+            yield Block(pending_kind, pending, None)
+            pending_kind, pending = None, []
+        if kind == "list":
+            pending_kind, pending = kind, lines
+        elif kind == "heading":
+            level = paragraph.heading_level
+            if level is None:
+                level = PSEUDO_HEADING_LEVEL
+            yield Block(kind, [line], level)
+            # Ảnh trong đoạn tiêu đề thuộc về phần thân của mục
+            if images:
+                yield Block("paragraph", images, None)
+        else:
+            yield Block(kind, lines, None)
+    if pending:
+        yield Block(pending_kind, pending, None)
+
+
+def iter_sections(blocks):
+    """Yield (heading block or None, body blocks) for every heading in the document."""
+    heading = None
+    body = []
+    for block in blocks:
+        if block.kind == "heading":
+            if heading is not None or body:
+                yield heading, body
+            heading, body = block, []
+        else:
+            body.append(block)
+    if heading is not None or body:
+        yield heading, body
+
+
+def _split_text(text, max_len, length):
+    """Split an over-long paragraph at sentence ends, then at spaces."""
+    pieces = []
+    current = []
+    used = 0
+    for sentence in _SENTENCE_END.split(text):
+        size = length(sentence)
+        parts = [(sentence, size)] if size <= max_len else [(word, length(word)) for word in sentence.split(" ")]
+        for part, part_size in parts:
+            if current and used + 1 + part_size > max_len:
+                pieces.append(" ".join(current))
+                current, used = [], 0
+            used += part_size + (1 if current else 0)
+            current.append(part)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def _shorten(text, max_len, length):
+    """text cut at a space to at most max_len, ending in an ellipsis."""
+    kept = []
+    for word in text.split(" "):
+        if length(" ".join(kept + [word, "…"])) > max_len:
+            break
+        kept.append(word)
+    return " ".join(kept + ["…"]) if kept else "…"
+
+
+def _block_pieces(block, max_len, length):
+    """Smallest units a block may be divided into: list items, table rows, images, sentences."""
+    if block.kind in ("list", "table"):
+        for line in block.lines:
+            yield from _split_text(line, max_len, length) if length(line) > max_len else (line,)
+    else:
+        for line in block.lines:
+            # Dòng ảnh không được cắt ngang URL
+            yield from (line,) if line.startswith("[image: ") else _split_text(line, max_len, length)
+
+
+def section_units(heading, body, max_len=SLIDE_MAX_CHARS, length=len):
+    """
+    Slide units of one section: the whole section when it fits, otherwise
+    its blocks packed up to max_len, keeping lists and tables together when
+    they fit and repeating the heading on each unit as its title.
+    """
+    head = heading.lines[0] if heading is not None else None
+    # Tiêu đề lặp lại trên mọi đơn vị chiếm tối đa nửa ngân sách, phần còn lại cho nội dung
+    if head and length(head) + 1 > max_len // 2:
+        head = _shorten(head, max_len // 2 - 1, length)
+    room = max_len - (length(head) + 1 if head else 0)
+    units = []
+    current = []
+    used = 0
+    for block in body:
+        text = "\n".join(block.lines)
+        size = length(text)
+        if size <= room:
+            pieces = [(text, size)]
+        else:
+            pieces = [(piece, length(piece)) for piece in _block_pieces(block, room, length)]
+        # Kích thước cộng dồn theo từng mảnh: mỗi mảnh chỉ được đo một lần
+        for piece, piece_size in pieces:
+            if current and used + 1 + piece_size > room:
+                units.append(current)
+                current, used = [], 0
+            used += piece_size + (1 if current else 0)
+            current.append(piece)
+    if current or not units:
+        units.append(current)
+    return ["\n".join(([head] if head else []) + unit) for unit in units]
+
+
+def iter_slide_units(paragraphs, max_len=SLIDE_MAX_CHARS, min_len=SLIDE_MIN_CHARS, length=len):
+    """
+    Yield slide contents from docx_stream paragraphs as the document is read.
+
+    Sections shorter than min_len (e.g. a heading followed by one line) are
+    merged with the next one while the result stays within max_len; longer
+    sections are split at block boundaries. length measures a unit (characters
+    by default, or a token count); sizes of joined units are taken as the sum
+    of their parts, so each piece of text is measured once.
+    """
+    current = None
+    current_size = 0
+    for heading, body in iter_sections(iter_blocks(paragraphs)):
+        for unit in section_units(heading, body, max_len, length):
+            size = length(unit)
+            if current is None:
+                current, current_size = unit, size
+            elif current_size < min_len and current_size + 1 + size <= max_len:
+                current = f"{current}\n{unit}"
+                current_size += 1 + size
+            else:
+                yield current
+                current, current_size = unit, size
+    if current:
+        yield current
@@ -0,0 +1,133 @@
+import logging
+import os
+import posixpath
+import zipfile
+
+from deck_format import CSS_DIR_NAME
+from deck_result import HTML_DIR_NAME, PNG_DIR_NAME
+from media_store import MEDIA_DIR_NAME, WEB_IMAGE_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+# Deck nhập từ file ZIP được giữ nguyên dạng nén: chỉ đọc central directory khi
+# nhập, HTML đọc trực tiếp từ archive, ảnh preview giải nén khi có người xem.
+
+ARCHIVE_FILE_NAME = "source.zip"
+# Giới hạn chống zip bomb / archive quá lớn
+ZIP_MAX_UPLOAD_BYTES = int(os.environ.get("SLIDEGEN_ZIP_MAX_UPLOAD_BYTES", 200 * 1024 * 1024))
+ZIP_MAX_ENTRIES = int(os.environ.get("SLIDEGEN_ZIP_MAX_ENTRIES", 2000))
+ZIP_MAX_ENTRY_BYTES = int(os.environ.get("SLIDEGEN_ZIP_MAX_ENTRY_BYTES", 20 * 1024 * 1024))
+ZIP_MAX_TOTAL_BYTES = int(os.environ.get("SLIDEGEN_ZIP_MAX_TOTAL_BYTES", 500 * 1024 * 1024))
+ZIP_MAX_RATIO = int(os.environ.get("SLIDEGEN_ZIP_MAX_RATIO", 100))
+# File nhỏ hơn ngưỡng này không xét tỉ lệ nén (HTML lặp lại nén rất tốt)
+ZIP_RATIO_MIN_BYTES = 1024 * 1024
+# Chỉ các thư mục này của deck được đọc/phục vụ
+DECK_DIRS = (HTML_DIR_NAME, PNG_DIR_NAME, CSS_DIR_NAME, MEDIA_DIR_NAME)
+CHUNK_SIZE = 64 * 1024
+
+
+class ArchiveError(ValueError):
+    """The archive is not a readable deck or exceeds the import limits."""
+
+
+def _slide_order(name):
+    # slide_2 trước slide_10
+    return len(name), name
+
+
+class DeckArchive:
+    """
+    Read-only view of a deck zip (html/, png/, css/, media/ members).
+
+    The limits are checked against the central directory when the archive
+    is opened and enforced again while members are decompressed, since the
+    sizes recorded in a hostile archive can lie.
+    """
+
+    def __init__(self, path):
+        try:
+            self.zip = zipfile.ZipFile(path, "r")
+        except (zipfile.BadZipFile, OSError) as e:
+            raise ArchiveError(f"Không đọc được file ZIP: {e}") from e
+        try:
+            self.members = self._check_limits(self.zip.infolist())
+        except ArchiveError:
+            self.zip.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.zip.close()
+
+    @staticmethod
+    def _check_limits(infos):
+        if len(infos) > ZIP_MAX_ENTRIES:
+            raise ArchiveError(f"ZIP có quá nhiều file ({len(infos)} > {ZIP_MAX_ENTRIES})")
+        total = 0
+        members = {}
+        for info in infos:
+            if info.is_dir():
+                continue
+            if info.file_size > ZIP_MAX_ENTRY_BYTES:
+                raise ArchiveError(f"File {info.filename!r} trong ZIP quá lớn ({info.file_size} bytes)")
+            if (info.file_size > ZIP_RATIO_MIN_BYTES
+                    and info.file_size > ZIP_MAX_RATIO * max(info.compress_size, 1)):
+                raise ArchiveError(f"File {info.filename!r} có tỉ lệ nén bất thường")
+            total += info.file_size
+            if total > ZIP_MAX_TOTAL_BYTES:
+                raise ArchiveError(f"ZIP giải nén vượt quá {ZIP_MAX_TOTAL_BYTES} bytes")
+            members[info.filename] = info
+        return members
+
+    def member(self, path):
+        """ZipInfo of a deck file (e.g. 'png/slide_1.png'), or None."""
+        if path != posixpath.normpath(path) or path.split("/", 1)[0] not in DECK_DIRS:
+            return None
+        # Ảnh trong media/ chỉ được phục vụ với định dạng raster (không SVG)
+        if path.startswith(f"{MEDIA_DIR_NAME}/") and posixpath.splitext(path)[1].lower() not in WEB_IMAGE_EXTENSIONS:
+            return None
+        return self.members.get(path)
+
+    def slides(self, image_exts):
+        """(html member, image member or None) of every slide, in slide order."""
+        html = [name for name in self.members
+                if posixpath.dirname(name) == HTML_DIR_NAME and name.endswith(".html")]
+        if not html:
+            raise ArchiveError(f"Thư mục '{HTML_DIR_NAME}' không tồn tại trong file ZIP")
+        slides = []
+        for name in sorted(html, key=_slide_order):
+            stem = posixpath.splitext(posixpath.basename(name))[0]
+            image = next((f"{PNG_DIR_NAME}/{stem}.{ext}" for ext in image_exts
+                          if f"{PNG_DIR_NAME}/{stem}.{ext}" in self.members), None)
+            slides.append((name, image))
+        return slides
+
+    def iter_member(self, path, chunk_size=CHUNK_SIZE):
+        """Decompressed bytes of a member, in chunks, stopping at the size limit."""
+        info = self.member(path)
+        if info is None:
+            raise KeyError(path)
+        read = 0
+        with self.zip.open(info) as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                read += len(chunk)
+                if read > min(info.file_size, ZIP_MAX_ENTRY_BYTES):
+                    raise ArchiveError(f"File {path!r} giải nén lớn hơn kích thước khai báo")
+                yield chunk
+
+    def read(self, path):
+        return b"".join(self.iter_member(path))
+
+    def read_text(self, path):
+        return self.read(path).decode("utf-8")
+
+
+def iter_archive_member(archive_path, path):
+    """Chunks of one member of the archive at archive_path (the archive stays open while iterating)."""
+    with DeckArchive(archive_path) as archive:
+        yield from archive.iter_member(path)
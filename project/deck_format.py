@@ -0,0 +1,161 @@
+import hashlib
+import html
+import os
+import re
+from functools import lru_cache
+
+# Định dạng deck dùng stylesheet chung: mỗi template có một file CSS (gồm cả
+# @import font/bootstrap), mỗi slide chỉ còn khối biến :root và markup.
+
+CSS_DIR_NAME = "css"
+DECK_FILE_NAME = "deck.html"
+
+_LINK_HREF = re.compile(r'<link href="([^"]+)" rel="stylesheet">')
+_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_ROOT_SELECTOR = re.compile(r"^(html|body|:root)\b")
+
+DECK_CSS = """body.deck {
+    margin: 0;
+    background: #333;
+}
+.deck-slide {
+    position: relative;
+    width: 100vw;
+    height: 100vh;
+    overflow: hidden;
+    margin-bottom: 8px;
+}"""
+
+
+def _stylesheet_urls(template):
+    return [m.group(1) for link in template.links for m in [_LINK_HREF.match(link)] if m]
+
+
+def _scripts(template):
+    return [link for link in template.links if link.startswith("<script")]
+
+
+@lru_cache(maxsize=None)
+def _stylesheet(template):
+    imports = "".join(f'@import url("{url}");\n' for url in _stylesheet_urls(template))
+    css = imports + template.css + "\n"
+    digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:10]
+    return f"{template.name}.{digest}.css", css
+
+
+def stylesheet(template):
+    """(content-hashed file name, text) of the shared stylesheet of template."""
+    return _stylesheet(template)
+
+
+def stylesheet_name(template):
+    """Content-hashed file name of the shared stylesheet of template."""
+    return _stylesheet(template)[0]
+
+
+def write_stylesheet(css_dir, template):
+    """Write the shared stylesheet of template into css_dir once; return its file name."""
+    name, css = _stylesheet(template)
+    path = os.path.join(css_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(css_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(css)
+    return name
+
+
+def render_slide_document(template, arguments, css_href):
+    """A slide page that links its template stylesheet instead of embedding it."""
+    theme, body = template.render_parts(**arguments)
+    scripts = "".join(f"    {script}\n" for script in _scripts(template))
+    return (
+        '<!DOCTYPE html>\n<html lang="en">\n<head>\n'
+        '    <meta charset="UTF-8">\n'
+        '    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+        f'    <link href="{css_href}" rel="stylesheet">\n'
+        f"{scripts}"
+        f"    <style>{theme}</style>\n"
+        "</head>\n<body>\n" + body + "\n</body>\n</html>"
+    )
+
+
+def scope_css(css, scope):
+    """
+    Prefix every selector of css with scope so several layouts can live in
+    one document. html/body/:root selectors become the scope element itself.
+    """
+    css = _COMMENT.sub("", css)
+    out = []
+    i = 0
+    while True:
+        start = css.find("{", i)
+        if start == -1:
+            out.append(css[i:].strip())
+            break
+        selector = css[i:start].strip()
+        depth = 1
+        end = start + 1
+        while depth and end < len(css):
+            if css[end] == "{":
+                depth += 1
+            elif css[end] == "}":
+                depth -= 1
+            end += 1
+        block = css[start + 1:end - 1]
+        if selector.startswith("@"):
+            out.append(f"{selector} {{\n{scope_css(block, scope)}\n}}")
+        else:
+            parts = []
+            for part in selector.split(","):
+                part = part.strip()
+                if _ROOT_SELECTOR.match(part):
+                    parts.append(_ROOT_SELECTOR.sub(scope, part, count=1))
+                else:
+                    parts.append(f"{scope} {part}")
+            out.append(f"{', '.join(dict.fromkeys(parts))} {{{block}}}")
+        i = end
+    return "\n".join(part for part in out if part)
+
+
+@lru_cache(maxsize=None)
+def _scoped_template_css(template):
+    return scope_css(template.css, f".slide-{template.name}")
+
+
+def render_single_file_deck(slides, title="Slides"):
+    """
+    One HTML document holding the whole deck.
+
+    slides is a list of (template, arguments) pairs, or (None, html) for
+    slides without a template (e.g. error slides), whose markup is embedded
+    as-is. Each layout's CSS is included once, scoped to its slides.
+    """
+    links = []
+    template_css = []
+    theme_css = []
+    sections = []
+    for i, (template, arguments) in enumerate(slides, 1):
+        slide_id = f"slide-{i}"
+        if template is None:
+            sections.append(f'<section class="deck-slide" id="{slide_id}">\n{arguments}\n</section>')
+            continue
+        for link in template.links:
+            if link not in links:
+                links.append(link)
+        scoped = _scoped_template_css(template)
+        if scoped not in template_css:
+            template_css.append(scoped)
+        theme, body = template.render_parts(**arguments)
+        theme_css.append(scope_css(theme, f"#{slide_id}"))
+        sections.append(f'<section class="deck-slide slide-{template.name}" id="{slide_id}">\n{body}\n</section>')
+    head_links = "".join(f"    {link}\n" for link in links)
+    return (
+        '<!DOCTYPE html>\n<html lang="en">\n<head>\n'
+        '    <meta charset="UTF-8">\n'
+        '    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+        f"    <title>{html.escape(title)}</title>\n"
+        f"{head_links}"
+        f"    <style>\n{DECK_CSS}\n" + "\n".join(template_css) + "\n    </style>\n"
+        "    <style>\n" + "\n".join(theme_css) + "\n    </style>\n"
+        '</head>\n<body class="deck">\n' + "\n".join(sections) + "\n</body>\n</html>"
+    )
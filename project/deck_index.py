@@ -0,0 +1,293 @@
+import base64
+import fcntl
+import json
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+
+from deck_archive import ARCHIVE_FILE_NAME, DeckArchive
+from deck_format import CSS_DIR_NAME, DECK_FILE_NAME
+from deck_manifest import content_hash
+from deck_result import HTML_DIR_NAME, PNG_DIR_NAME
+from media_store import MEDIA_DIR_NAME
+
+logger = logging.getLogger(__name__)
+
+# slides.json của một deck đã công bố: danh sách slide (id, file HTML, ảnh,
+# hash nội dung, phiên bản, thumbnail) để client tải danh sách trước, HTML từng
+# slide sau. Slide được sửa lưu vào edits/ theo hash; file gốc của deck không đổi.
+
+INDEX_FILE_NAME = "slides.json"
+EDITS_DIR_NAME = "edits"
+# Khóa (flock) của mỗi deck: các thay đổi slides.json từ mọi worker uvicorn được thực hiện lần lượt
+LOCK_FILE_NAME = ".slides.lock"
+# File trong edits/ không còn slide nào trỏ tới bị xóa sau khoảng này (người đọc
+# có thể vừa tải slides.json cũ và sắp đọc file đó)
+EDIT_GRACE_SECONDS = int(os.environ.get("SLIDEGEN_EDIT_GRACE_SECONDS", 60))
+
+# Link tương đối từ html/ (hoặc edits/) tới stylesheet và ảnh của deck
+_CSS_LINK = re.compile(r'<link\b[^>]*\bhref="\.\./%s/([^"/]+)"[^>]*>' % CSS_DIR_NAME)
+_MEDIA_SRC = re.compile(r'\bsrc="\.\./%s/([^"/]+)"' % MEDIA_DIR_NAME)
+
+
+class VersionConflict(Exception):
+    """The slide was changed since the version the client edited."""
+
+    def __init__(self, slide):
+        super().__init__(f"Slide {slide['id']} is at version {slide['version']}")
+        self.slide = slide
+
+
+class DeckIndex:
+    """
+    Slides of a published deck, in order.
+
+    Each slide is a dict with a stable id, the path of its HTML document and
+    image inside the deck (folder or source archive), the sha256 of the
+    document (used as its ETag), a version bumped on every edit and its
+    thumbnail URLs, if any. Edited slides have no image until re-rendered.
+    """
+
+    def __init__(self, slides=None):
+        self.slides = list(slides or [])
+        for slide in self.slides:
+            slide.setdefault("version", 1)
+            slide.setdefault("edited", False)
+        self._by_id = {slide["id"]: slide for slide in self.slides}
+
+    @classmethod
+    def from_deck(cls, deck, thumbnails):
+        """Index of a generated DeckResult; thumbnails holds the URLs of each slide, in order."""
+        return cls([
+            {"id": str(slide.index), "html": slide.html_path, "image": slide.image_path,
+             "hash": content_hash(slide.document), "thumbnails": slide_thumbnails}
+            for slide, slide_thumbnails in zip(deck.slides, thumbnails)
+        ])
+
+    @classmethod
+    def from_archive(cls, slides):
+        """Index of an imported archive from (html member, image member, document) of each slide."""
+        return cls([
+            {"id": str(index), "html": html, "image": image, "hash": content_hash(document), "thumbnails": None}
+            for index, (html, image, document) in enumerate(slides, 1)
+        ])
+
+    @classmethod
+    def load(cls, folder):
+        """Index of the deck in folder, or None for decks published without one."""
+        try:
+            with open(os.path.join(folder, INDEX_FILE_NAME), "r", encoding="utf-8") as f:
+                return cls(json.load(f)["slides"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable deck index in {folder}: {e}")
+            return None
+
+    def get(self, slide_id):
+        return self._by_id.get(slide_id)
+
+    @property
+    def edited(self):
+        return any(slide["edited"] for slide in self.slides)
+
+    def _check_version(self, slide, version):
+        if slide["version"] != version:
+            raise VersionConflict(slide)
+
+    def update_slide(self, folder, slide_id, document, version):
+        """
+        Replace the document of a slide edited from the given version; returns
+        the slide, or None when there is no such slide. Raises VersionConflict
+        when the slide has moved on.
+        """
+        slide = self.get(slide_id)
+        if slide is None:
+            return None
+        self._check_version(slide, version)
+        digest = content_hash(document)
+        if digest == slide["hash"]:
+            return slide
+        slide.update(html=_write_edit(folder, digest, document), hash=digest, image=None,
+                     thumbnails=None, edited=True, version=slide["version"] + 1)
+        return slide
+
+    def add_slide(self, folder, document):
+        """Append a new slide; returns it."""
+        slide_id = str(max((int(slide["id"]) for slide in self.slides), default=0) + 1)
+        digest = content_hash(document)
+        slide = {"id": slide_id, "html": _write_edit(folder, digest, document), "image": None, "hash": digest,
+                 "thumbnails": None, "version": 1, "edited": True}
+        self.slides.append(slide)
+        self._by_id[slide_id] = slide
+        return slide
+
+    def remove_slide(self, slide_id, version):
+        """Remove a slide last seen at the given version; returns False when there is no such slide."""
+        slide = self.get(slide_id)
+        if slide is None:
+            return False
+        self._check_version(slide, version)
+        self.slides.remove(slide)
+        del self._by_id[slide_id]
+        return True
+
+    def write(self, folder):
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"slides": self.slides}, f, ensure_ascii=False)
+            os.replace(tmp_path, os.path.join(folder, INDEX_FILE_NAME))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def _write_edit(folder, digest, document):
+    # Theo hash: hai lần lưu cùng nội dung dùng chung một file, file đã có thì không ghi lại
+    path = f"{EDITS_DIR_NAME}/{digest}.html"
+    target = os.path.join(folder, EDITS_DIR_NAME, f"{digest}.html")
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(document)
+        os.replace(tmp_path, target)
+    return path
+
+
+@contextmanager
+def edit_index(folder):
+    """
+    Load the index of the deck in folder under its lock, and write it back if
+    the block succeeds. The lock is an flock on a file in the deck folder, so
+    it holds across worker processes (and threads, which open it separately).
+    """
+    with open(os.path.join(folder, LOCK_FILE_NAME), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            index = DeckIndex.load(folder)
+            yield index
+            if index is not None:
+                index.write(folder)
+                _prune_edits(folder, index)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _prune_edits(folder, index, grace=EDIT_GRACE_SECONDS):
+    # Bản sửa cũ của một slide (và slide đã xóa) không còn được index trỏ tới
+    edits_dir = os.path.join(folder, EDITS_DIR_NAME)
+    if not os.path.isdir(edits_dir):
+        return
+    referenced = {slide["html"] for slide in index.slides}
+    cutoff = time.time() - grace
+    for item in os.scandir(edits_dir):
+        if f"{EDITS_DIR_NAME}/{item.name}" in referenced:
+            continue
+        try:
+            if item.stat().st_mtime < cutoff:
+                os.remove(item.path)
+        except OSError:
+            pass
+
+
+def is_archive_deck(folder):
+    return os.path.exists(os.path.join(folder, ARCHIVE_FILE_NAME))
+
+
+class DeckFiles:
+    """
+    Files of a published deck: edits and generated decks are read from its
+    folder, imported decks from their source archive (opened once).
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.archive = DeckArchive(os.path.join(folder, ARCHIVE_FILE_NAME)) if is_archive_deck(folder) else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+
+    def read(self, path):
+        if self.archive is not None and path.split("/", 1)[0] != EDITS_DIR_NAME:
+            return self.archive.read(path)
+        with open(os.path.join(self.folder, *path.split("/")), "rb") as f:
+            return f.read()
+
+    def _listing(self, dir_name):
+        if self.archive is not None:
+            return sorted(name for name in self.archive.members
+                          if name.startswith(f"{dir_name}/") and self.archive.member(name) is not None)
+        directory = os.path.join(self.folder, dir_name)
+        return [f"{dir_name}/{name}" for name in sorted(os.listdir(directory))] if os.path.isdir(directory) else []
+
+    def stylesheets(self):
+        return self._listing(CSS_DIR_NAME)
+
+    def media(self):
+        return self._listing(MEDIA_DIR_NAME)
+
+
+def inline_deck_files(files, content):
+    """
+    content with the deck stylesheets it links embedded as <style> and its
+    deck images as data: URLs, so the page renders from a temporary file
+    (file://) whether the deck lives in a folder or in its source archive.
+    """
+    def read(path):
+        try:
+            return files.read(path)
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Cannot inline {path}: {e}")
+            return None
+
+    def stylesheet(match):
+        css = read(f"{CSS_DIR_NAME}/{match.group(1)}")
+        return match.group(0) if css is None else f"<style>\n{css.decode('utf-8')}\n</style>"
+
+    def image(match):
+        data = read(f"{MEDIA_DIR_NAME}/{match.group(1)}")
+        if data is None:
+            return match.group(0)
+        media_type = mimetypes.guess_type(match.group(1))[0] or "application/octet-stream"
+        return f'src="data:{media_type};base64,{base64.b64encode(data).decode("ascii")}"'
+
+    return _MEDIA_SRC.sub(image, _CSS_LINK.sub(stylesheet, content))
+
+
+def read_deck_file(folder, path):
+    """Bytes of one file of the deck in folder."""
+    with DeckFiles(folder) as files:
+        return files.read(path)
+
+
+def iter_deck_entries(folder, index):
+    """
+    (zip path, bytes) of every file of the deck in its current state: edited
+    slides replace the originals and slides are numbered in index order.
+    """
+    with DeckFiles(folder) as files:
+        for path in files.stylesheets() + files.media():
+            yield path, files.read(path)
+        # deck.html gộp các slide gốc: chỉ còn đúng khi chưa slide nào bị sửa
+        if files.archive is None and not index.edited and os.path.exists(os.path.join(folder, DECK_FILE_NAME)):
+            yield DECK_FILE_NAME, files.read(DECK_FILE_NAME)
+        for number, slide in enumerate(index.slides, 1):
+            yield f"{HTML_DIR_NAME}/slide_{number}.html", files.read(slide["html"])
+        for number, slide in enumerate(index.slides, 1):
+            if slide["image"]:
+                ext = os.path.splitext(slide["image"])[1]
+                yield f"{PNG_DIR_NAME}/slide_{number}{ext}", files.read(slide["image"])
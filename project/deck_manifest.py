@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import defaultdict, deque
+
+logger = logging.getLogger(__name__)
+
+# manifest.json của một deck: hash nội dung từng đơn vị slide, lời gọi hàm đã
+# được chấp nhận và ảnh PNG của mỗi slide. Khi tài liệu được tải lên lại, các
+# đơn vị không đổi (và slide đứng trước cũng không đổi) được dùng lại nguyên vẹn.
+
+MANIFEST_FILE_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def pipeline_fingerprint(**settings):
+    """Digest of everything besides the content that shapes a slide (tool schemas, models, image settings)."""
+    return content_hash(json.dumps(settings, sort_keys=True, default=str))
+
+
+class DeckManifest:
+    """
+    Slide units of one generated deck, in order.
+
+    Each unit records the hash of its content and of the content before it
+    (the LLM sees the previous slide when generating), the raw LLM output
+    and the accepted slides it produced: tool call, PNG path relative to the
+    deck folder and the PNG's sha256. Only complete units (every slide
+    accepted) are offered for reuse.
+    """
+
+    def __init__(self, pipeline, units=None):
+        self.pipeline = pipeline
+        self.units = list(units or [])
+        # (hash nội dung trước, hash nội dung) -> các đơn vị dùng lại được, theo thứ tự
+        self._reusable = defaultdict(deque)
+        for unit in self.units:
+            if unit.get("complete"):
+                self._reusable[(unit["previous_hash"], unit["content_hash"])].append(unit)
+
+    @classmethod
+    def load(cls, folder, pipeline):
+        """Manifest of the deck in folder, or an empty one when it is missing, unreadable or stale."""
+        path = os.path.join(folder, MANIFEST_FILE_NAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(pipeline)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+            return cls(pipeline)
+        if data.get("version") != MANIFEST_VERSION or data.get("pipeline") != pipeline:
+            logger.info(f"Manifest {path} was made by another pipeline, regenerating every slide")
+            return cls(pipeline)
+        return cls(pipeline, data.get("units"))
+
+    def match(self, previous_content, content):
+        """Take the previous run's unit for this content and predecessor, or None."""
+        candidates = self._reusable.get((content_hash(previous_content), content_hash(content)))
+        return candidates.popleft() if candidates else None
+
+    def add_unit(self, previous_content, content, generated_call):
+        unit = {
+            "previous_hash": content_hash(previous_content),
+            "content_hash": content_hash(content),
+            "generated_call": generated_call,
+            "slides": [],
+            "complete": True,
+        }
+        self.units.append(unit)
+        return unit
+
+    @staticmethod
+    def add_slide(unit, tool_call, png_path, png_bytes):
+        unit["slides"].append({"tool_call": tool_call, "png": png_path, "png_sha256": file_hash(png_bytes)})
+
+    @staticmethod
+    def read_png(folder, slide):
+        """Bytes of a recorded slide image, or None when the file is gone or was changed."""
+        try:
+            with open(os.path.join(folder, slide["png"]), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        return data if file_hash(data) == slide["png_sha256"] else None
+
+    def write(self, folder):
+        data = {"version": MANIFEST_VERSION, "pipeline": self.pipeline, "units": self.units}
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, os.path.join(folder, MANIFEST_FILE_NAME))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
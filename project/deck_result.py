@@ -0,0 +1,139 @@
+import logging
+import os
+import shutil
+from collections import OrderedDict
+
+from deck_format import CSS_DIR_NAME, DECK_FILE_NAME, render_single_file_deck, render_slide_document, stylesheet
+from media_store import MEDIA_DIR, MEDIA_DIR_NAME, deck_media_links
+
+logger = logging.getLogger(__name__)
+
+# Kết quả sinh deck giữ trong bộ nhớ (HTML, ảnh, lời gọi hàm, kết quả đánh giá):
+# ghi ra thư mục deck đúng một lần, file zip chỉ tạo khi có người tải về.
+
+HTML_DIR_NAME = "html"
+PNG_DIR_NAME = "png"
+ZIP_FILE_NAME = "slides.zip"
+
+
+class SlideResult:
+    """
+    One slide of a generated deck.
+
+    document is the page stored in html/ (linking the shared stylesheet when
+    the deck uses one); content is the self-contained page for previews.
+    template/arguments are None for slides without a template (error
+    slides). status is 'accepted', 'reused' or 'error'; verdict is the
+    evaluator's reason.
+    """
+
+    def __init__(self, index, tool_call, content, document, image, image_ext, status, verdict=None,
+                 template=None, arguments=None):
+        self.index = index
+        self.tool_call = tool_call
+        self.content = content
+        self.document = document
+        self.image = image
+        self.image_ext = image_ext
+        self.status = status
+        self.verdict = verdict
+        self.template = template
+        self.arguments = arguments
+
+    @property
+    def html_path(self):
+        return f"{HTML_DIR_NAME}/slide_{self.index}.html"
+
+    @property
+    def image_path(self):
+        return f"{PNG_DIR_NAME}/slide_{self.index}.{self.image_ext}"
+
+
+class DeckResult:
+    """
+    Slides of a deck as produced by process_slides, plus the shared
+    stylesheets they link and the manifest for incremental regeneration.
+    Document images are copied from the media store (media_dir) into the
+    deck's media/ folder and linked relatively, so a downloaded deck is
+    self-contained.
+    """
+
+    def __init__(self, title, shared_css=True, manifest=None, media_dir=MEDIA_DIR):
+        self.title = title
+        self.shared_css = shared_css
+        self.manifest = manifest
+        self.media_dir = media_dir
+        self.slides = []
+        self.stylesheets = OrderedDict()
+        self.media = OrderedDict()
+
+    def add_slide(self, index, tool_call, content, image, image_ext, status, verdict=None,
+                  template=None, arguments=None):
+        if self.shared_css and template is not None:
+            name, css = stylesheet(template)
+            self.stylesheets.setdefault(name, css)
+            document = render_slide_document(template, arguments, f"../{CSS_DIR_NAME}/{name}")
+        else:
+            document = content
+        document, names = deck_media_links(document, f"../{MEDIA_DIR_NAME}")
+        self.media.update(dict.fromkeys(names))
+        slide = SlideResult(index, tool_call, content, document, image, image_ext, status, verdict,
+                            template, arguments)
+        self.slides.append(slide)
+        return slide
+
+    def deck_html(self):
+        """The whole deck as one HTML file (shared-CSS decks only)."""
+        if not self.shared_css:
+            return None
+        deck_slides = [(slide.template, slide.arguments) if slide.template is not None
+                       else (None, '<h1>Error Creating Slide</h1>') for slide in self.slides]
+        deck = render_single_file_deck(deck_slides, title=self.title)
+        return deck_media_links(deck, MEDIA_DIR_NAME)[0]
+
+    def _media_files(self):
+        for name in self.media:
+            try:
+                with open(os.path.join(self.media_dir, name), "rb") as f:
+                    yield f"{MEDIA_DIR_NAME}/{name}", f.read()
+            except OSError as e:
+                logger.warning(f"Image {name} is missing from the media store: {e}")
+
+    def files(self):
+        """(relative path, bytes) of every file of the deck, in zip order."""
+        for name, css in self.stylesheets.items():
+            yield f"{CSS_DIR_NAME}/{name}", css.encode("utf-8")
+        yield from self._media_files()
+        deck = self.deck_html()
+        if deck is not None:
+            yield DECK_FILE_NAME, deck.encode("utf-8")
+        for slide in self.slides:
+            yield slide.html_path, slide.document.encode("utf-8")
+        for slide in self.slides:
+            yield slide.image_path, slide.image
+
+    def write(self, folder):
+        """
+        Store the deck in folder, replacing the previous deck there: every
+        file is written once, and manifest.json last so it never describes
+        images that are not on disk yet.
+        """
+        clear_deck_files(folder)
+        for path, data in self.files():
+            target = os.path.join(folder, *path.split("/"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(data)
+        if self.manifest is not None:
+            self.manifest.write(folder)
+        logger.info(f"Deck written to {folder}: {len(self.slides)} slides, {len(self.stylesheets)} stylesheets")
+
+
+def clear_deck_files(folder):
+    """Remove the files of the deck stored in folder, keeping its manifest."""
+    for name in (HTML_DIR_NAME, PNG_DIR_NAME, CSS_DIR_NAME, MEDIA_DIR_NAME):
+        shutil.rmtree(os.path.join(folder, name), ignore_errors=True)
+    for name in (DECK_FILE_NAME, ZIP_FILE_NAME):
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,84 @@
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Mỗi job làm việc trong một thư mục riêng rồi công bố kết quả bằng một lần
+# os.replace: deck được gọi bằng id, không bao giờ bị job khác ghi đè giữa chừng.
+
+WORKSPACE_PREFIX = ".work-"
+LATEST_DIR_NAME = ".latest"
+_DECK_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class DeckStore:
+    """
+    Published decks under root, one folder per deck id.
+
+    A job gets a private workspace (new_workspace) and publishes it as a
+    new deck with publish(); readers only ever see complete decks. The
+    latest deck generated from each document name is remembered, so a
+    re-upload can reuse its slides.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.latest_dir = os.path.join(root, LATEST_DIR_NAME)
+        os.makedirs(self.latest_dir, exist_ok=True)
+
+    def new_workspace(self):
+        # Cùng filesystem với root để os.replace là thao tác nguyên tử
+        return tempfile.mkdtemp(dir=self.root, prefix=WORKSPACE_PREFIX)
+
+    def discard(self, workspace):
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    def publish(self, workspace, source_name=None):
+        """Turn a finished workspace into a deck; returns the new deck id."""
+        deck_id = uuid.uuid4().hex
+        os.replace(workspace, self.path(deck_id))
+        if source_name:
+            self._set_latest(source_name, deck_id)
+        logger.info(f"Published deck {deck_id}" + (f" ({source_name})" if source_name else ""))
+        return deck_id
+
+    def path(self, deck_id):
+        if not _DECK_ID.match(deck_id or ""):
+            raise ValueError(f"Invalid deck id: {deck_id!r}")
+        return os.path.join(self.root, deck_id)
+
+    def get(self, deck_id):
+        """Folder of a published deck, or None."""
+        try:
+            path = self.path(deck_id)
+        except ValueError:
+            return None
+        return path if os.path.isdir(path) else None
+
+    def decks(self):
+        """Folders of every published deck."""
+        for item in os.scandir(self.root):
+            if _DECK_ID.match(item.name) and item.is_dir():
+                yield item.path
+
+    def _latest_file(self, source_name):
+        return os.path.join(self.latest_dir, hashlib.sha256(source_name.encode("utf-8")).hexdigest())
+
+    def _set_latest(self, source_name, deck_id):
+        fd, tmp_path = tempfile.mkstemp(dir=self.latest_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(deck_id)
+        os.replace(tmp_path, self._latest_file(source_name))
+
+    def latest(self, source_name):
+        """Folder of the latest deck generated from source_name, or None."""
+        try:
+            with open(self._latest_file(source_name), "r", encoding="utf-8") as f:
+                return self.get(f.read().strip())
+        except OSError:
+            return None
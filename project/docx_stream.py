@@ -0,0 +1,218 @@
+import logging
+import posixpath
+import re
+import zipfile
+from collections import namedtuple
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+# Đọc DOCX theo luồng: iterparse word/document.xml ngay trong file zip và trả
+# từng đoạn văn khi gặp, không dựng cả cây tài liệu trong bộ nhớ.
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W = f"{{{W_NS}}}"
+
+P = _W + "p"
+T = _W + "t"
+TAB = _W + "tab"
+BR = _W + "br"
+CR = _W + "cr"
+P_STYLE = _W + "pStyle"
+NUM_PR = _W + "numPr"
+ILVL = _W + "ilvl"
+OUTLINE_LVL = _W + "outlineLvl"
+TBL = _W + "tbl"
+TR = _W + "tr"
+TC = _W + "tc"
+BODY = _W + "body"
+VAL = _W + "val"
+
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+BLIP = "{http://schemas.openxmlformats.org/drawingml/2006/main}blip"
+IMAGEDATA = "{urn:schemas-microsoft-com:vml}imagedata"
+R_EMBED = f"{{{R_NS}}}embed"
+R_ID = f"{{{R_NS}}}id"
+
+_HEADING_NAME = re.compile(r"^heading\s*(\d+)$", re.I)
+
+# style: tên style (đã tra trong styles.xml); heading_level: 0 cho Title,
+# 1..9 cho Heading N, None nếu không phải tiêu đề; list_level: None nếu
+# không thuộc danh sách; images: ảnh trong đoạn (tên trong gói hoặc URL).
+Paragraph = namedtuple("Paragraph", "text style heading_level list_level images", defaults=((),))
+
+
+class Table(namedtuple("Table", "rows images")):
+    """A top-level table: rows of cell texts, plus the images found in its cells."""
+
+    __slots__ = ()
+
+    @property
+    def text(self):
+        return _rows_text(self.rows)
+
+
+def _read_styles(archive):
+    """styleId -> (name, outline level or None) from word/styles.xml."""
+    styles = {}
+    try:
+        stream = archive.open("word/styles.xml")
+    except KeyError:
+        return styles
+    with stream:
+        for _, elem in ElementTree.iterparse(stream):
+            if elem.tag != _W + "style":
+                continue
+            style_id = elem.get(_W + "styleId")
+            name_elem = elem.find(_W + "name")
+            outline = elem.find(f"{_W}pPr/{OUTLINE_LVL}")
+            styles[style_id] = (
+                name_elem.get(VAL) if name_elem is not None else style_id,
+                int(outline.get(VAL)) if outline is not None else None,
+            )
+            elem.clear()
+    return styles
+
+
+def _heading_level(style_name, outline_level):
+    if style_name:
+        if style_name.lower() == "title":
+            return 0
+        match = _HEADING_NAME.match(style_name)
+        if match:
+            return int(match.group(1))
+    if outline_level is not None and outline_level < 9:
+        return outline_level + 1
+    return None
+
+
+def _read_relationships(archive):
+    """rId -> package member name for the internal targets of document.xml."""
+    targets = {}
+    try:
+        stream = archive.open("word/_rels/document.xml.rels")
+    except KeyError:
+        return targets
+    with stream:
+        for _, elem in ElementTree.iterparse(stream):
+            if elem.tag.endswith("Relationship") and elem.get("TargetMode") != "External":
+                target = elem.get("Target", "")
+                member = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("word", target))
+                targets[elem.get("Id")] = member
+    return targets
+
+
+def _rows_text(rows):
+    return "\n".join(" | ".join(row) for row in rows)
+
+
+def iter_paragraphs(path, media_store=None):
+    """
+    Yield the document's content in order: a Paragraph for every body or
+    text box paragraph and a Table for every top-level table (nested tables
+    are flattened into their cell's text).
+
+    Images are reported by package member name, or by whatever
+    media_store(member, data) returns (e.g. a URL) when it is given; data
+    are the image's original bytes, never decoded. Only the element being
+    read is kept in memory; finished top-level elements are dropped from
+    the tree as soon as they have been yielded.
+    """
+    with zipfile.ZipFile(path) as archive:
+        styles = _read_styles(archive)
+        relationships = _read_relationships(archive)
+        stored = {}
+
+        def image_ref(rel_id):
+            member = relationships.get(rel_id)
+            if member is None:
+                return None
+            if media_store is None:
+                return member
+            # Mỗi ảnh chỉ được lưu một lần dù được dùng ở nhiều chỗ
+            if member not in stored:
+                try:
+                    stored[member] = media_store(member, archive.read(member))
+                except KeyError:
+                    stored[member] = None
+            return stored[member]
+
+        with archive.open("word/document.xml") as stream:
+            # Stack các đoạn đang mở (đoạn trong text box nằm lồng trong đoạn khác)
+            open_paragraphs = []
+            # Stack các bảng đang mở: {"rows": [[[đoạn, ...], ...], ...], "images": [...]}
+            open_tables = []
+            body = None
+            depth = 0
+            for event, elem in ElementTree.iterparse(stream, events=("start", "end")):
+                tag = elem.tag
+                if event == "start":
+                    depth += 1
+                    if tag == P:
+                        open_paragraphs.append({"text": [], "style": None, "outline": None,
+                                                "list_level": None, "images": []})
+                    elif tag == TBL:
+                        open_tables.append({"rows": [], "images": []})
+                    elif tag == TR and open_tables:
+                        open_tables[-1]["rows"].append([])
+                    elif tag == TC and open_tables and open_tables[-1]["rows"]:
+                        open_tables[-1]["rows"][-1].append([])
+                    elif tag == BODY:
+                        body = elem
+                    continue
+
+                depth -= 1
+                if open_paragraphs:
+                    current = open_paragraphs[-1]
+                    if tag == T:
+                        current["text"].append(elem.text or "")
+                    elif tag == TAB:
+                        current["text"].append("\t")
+                    elif tag in (BR, CR):
+                        current["text"].append("\n")
+                    elif tag == P_STYLE:
+                        current["style"] = elem.get(VAL)
+                    elif tag == ILVL:
+                        current["list_level"] = int(elem.get(VAL, 0))
+                    elif tag == NUM_PR and current["list_level"] is None:
+                        current["list_level"] = 0
+                    elif tag == OUTLINE_LVL:
+                        current["outline"] = int(elem.get(VAL))
+                    elif tag in (BLIP, IMAGEDATA):
+                        ref = image_ref(elem.get(R_EMBED) or elem.get(R_ID))
+                        if ref and ref not in current["images"]:
+                            current["images"].append(ref)
+                if tag == P:
+                    current = open_paragraphs.pop()
+                    text = "".join(current["text"])
+                    if open_tables:
+                        table = open_tables[-1]
+                        if table["rows"] and table["rows"][-1]:
+                            table["rows"][-1][-1].append(text)
+                        table["images"].extend(current["images"])
+                    else:
+                        style_name, style_outline = styles.get(current["style"], (current["style"], None))
+                        outline = current["outline"] if current["outline"] is not None else style_outline
+                        yield Paragraph(
+                            text=text,
+                            style=style_name,
+                            heading_level=_heading_level(style_name, outline),
+                            list_level=current["list_level"],
+                            images=tuple(current["images"]),
+                        )
+                    elem.clear()
+                elif tag == TBL:
+                    table = open_tables.pop()
+                    rows = [["\n".join(cell).strip() for cell in row] for row in table["rows"]]
+                    rows = [row for row in rows if any(row)]
+                    if open_tables:
+                        # Bảng lồng: gộp thành chữ trong ô của bảng ngoài
+                        outer = open_tables[-1]
+                        if outer["rows"] and outer["rows"][-1]:
+                            outer["rows"][-1][-1].append(_rows_text(rows))
+                        outer["images"].extend(table["images"])
+                    elif rows or table["images"]:
+                        yield Table(rows=rows, images=tuple(dict.fromkeys(table["images"])))
+                # Phần tử cấp body đã xử lý xong: bỏ khỏi cây để bộ nhớ không tăng theo tài liệu
+                if depth == 2 and body is not None:
+                    body.clear()
@@ -0,0 +1,269 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge
+
+logger = logging.getLogger(__name__)
+
+# Mô hình GPU nằm trong một tiến trình inference riêng, chạy lâu dài
+# (python inference.py); các worker uvicorn chỉ tải tokenizer và gửi yêu cầu
+# qua Unix socket. Tiến trình inference gom các yêu cầu tới gần nhau thành một
+# batch, nên số worker HTTP và dung lượng GPU tăng/giảm độc lập với nhau.
+
+# Đường dẫn Unix socket; đặt biến này thì process web dùng tiến trình inference
+INFERENCE_SOCKET = os.environ.get("SLIDEGEN_INFERENCE_SOCKET")
+# Bắt buộc: thông điệp là pickle, ai kết nối được socket mà không cần khóa sẽ chạy được code trong tiến trình GPU
+INFERENCE_AUTHKEY = os.environ.get("SLIDEGEN_INFERENCE_AUTHKEY", "").encode("utf-8") or None
+# Số yêu cầu tối đa mỗi batch và thời gian chờ gom thêm sau yêu cầu đầu tiên
+INFERENCE_BATCH_SIZE = int(os.environ.get("SLIDEGEN_INFERENCE_BATCH_SIZE", 4))
+INFERENCE_BATCH_WAIT_MS = int(os.environ.get("SLIDEGEN_INFERENCE_BATCH_WAIT_MS", 20))
+# Thời gian tối đa chờ kết quả một yêu cầu (gồm cả thời gian xếp hàng)
+INFERENCE_TIMEOUT = int(os.environ.get("SLIDEGEN_INFERENCE_TIMEOUT", 600))
+# Tiến trình inference tự đặt biến này trước khi import slide_generator để tải mô hình
+ROLE_ENV = "SLIDEGEN_INFERENCE_ROLE"
+WORKER_ROLE = "worker"
+
+
+class InferenceError(Exception):
+    """The inference worker could not be reached or failed the request."""
+
+
+def is_worker_process():
+    return os.environ.get(ROLE_ENV) == WORKER_ROLE
+
+
+def _require_authkey(authkey):
+    if not authkey:
+        raise InferenceError("SLIDEGEN_INFERENCE_AUTHKEY must be set to use the inference worker")
+    return authkey
+
+
+class InferenceClient:
+    """
+    Connection of one web process to the inference worker.
+
+    call() is safe from any thread: requests from concurrent jobs share one
+    connection and are matched to their replies by id, so the worker sees
+    them together and can batch them. The connection is reopened on the next
+    call after the worker restarts; requests waiting on a dead connection
+    fail, those sent on the new one are unaffected.
+    """
+
+    def __init__(self, address, authkey=INFERENCE_AUTHKEY, timeout=INFERENCE_TIMEOUT):
+        self.address = address
+        self.authkey = _require_authkey(authkey)
+        self.timeout = timeout
+        self._conn = None
+        # Yêu cầu đang chờ trả lời, theo kết nối đã gửi chúng
+        self._pending = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._info = None
+
+    def _connect(self):
+        try:
+            conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+        except (OSError, AuthenticationError) as e:
+            raise InferenceError(f"Cannot connect to inference worker at {self.address}: {e}") from e
+        threading.Thread(target=self._read, args=(conn,), name="slidegen-inference-client", daemon=True).start()
+        logger.info(f"Connected to inference worker at {self.address}")
+        return conn
+
+    def call(self, kind, *args):
+        future = Future()
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+                self._pending[self._conn] = {}
+            conn = self._conn
+            request_id = self._next_id
+            self._next_id += 1
+            self._pending[conn][request_id] = future
+            try:
+                conn.send((request_id, kind, args))
+            except (OSError, ValueError) as e:
+                self._pending[conn].pop(request_id, None)
+                self._conn = None
+                raise InferenceError(f"Inference worker connection lost: {e}") from e
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._pending.get(conn, {}).pop(request_id, None)
+            raise InferenceError(f"Inference request {kind} timed out after {self.timeout}s")
+
+    def _read(self, conn):
+        try:
+            while True:
+                request_id, ok, value = conn.recv()
+                with self._lock:
+                    future = self._pending.get(conn, {}).pop(request_id, None)
+                if future is None:
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(InferenceError(value))
+        except (EOFError, OSError) as e:
+            logger.warning(f"Inference worker connection closed: {e}")
+        finally:
+            # Các yêu cầu đang chờ trên kết nối này sẽ không có trả lời
+            with self._lock:
+                if self._conn is conn:
+                    self._conn = None
+                pending = self._pending.pop(conn, {})
+            for future in pending.values():
+                future.set_exception(InferenceError("Inference worker connection lost"))
+            conn.close()
+
+    def info(self):
+        """Models loaded by the worker (cached after the first answer)."""
+        if self._info is None:
+            self._info = self.call("info")
+        return self._info
+
+    def close(self):
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+
+class InferenceWorker:
+    """
+    Serves batched inference over a Unix socket.
+
+    handlers maps a request kind to a function taking the argument tuples of
+    a batch and returning one result per request. Requests arriving within
+    batch_wait seconds of the first one (up to batch_size) form a batch;
+    batches run one at a time on the thread calling serve_forever(), which
+    owns the GPU.
+    """
+
+    def __init__(self, handlers, address, authkey=INFERENCE_AUTHKEY,
+                 batch_size=INFERENCE_BATCH_SIZE, batch_wait=INFERENCE_BATCH_WAIT_MS / 1000):
+        self.handlers = handlers
+        self.address = address
+        self.authkey = _require_authkey(authkey)
+        self.batch_size = max(batch_size, 1)
+        self.batch_wait = batch_wait
+        self._requests = queue.Queue()
+        self.batches = 0
+        self.requests = 0
+
+    def _accept(self, listener):
+        while True:
+            try:
+                conn = listener.accept()
+            except OSError as e:
+                logger.warning(f"Cannot accept inference connection: {e}")
+                continue
+            threading.Thread(target=self._receive, args=(conn,), name="slidegen-inference-conn",
+                             daemon=True).start()
+
+    def _receive(self, conn):
+        # Xác thực trong luồng của kết nối: client không trả lời chỉ chặn luồng này
+        try:
+            deliver_challenge(conn, self.authkey)
+            answer_challenge(conn, self.authkey)
+        except (AuthenticationError, EOFError, OSError) as e:
+            logger.warning(f"Rejected inference connection: {e}")
+            conn.close()
+            return
+        # Nhiều batch có thể trả lời cùng một kết nối: ghi lần lượt
+        send_lock = threading.Lock()
+        try:
+            while True:
+                request_id, kind, args = conn.recv()
+                self._requests.put((conn, send_lock, request_id, kind, args))
+        except (EOFError, OSError):
+            pass
+
+    def _next_batch(self):
+        batch = [self._requests.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _reply(self, request, ok, value):
+        conn, send_lock, request_id, _, _ = request
+        try:
+            with send_lock:
+                conn.send((request_id, ok, value))
+        except (OSError, ValueError):
+            # Client đã ngắt kết nối
+            pass
+
+    def run_batch(self, batch):
+        by_kind = {}
+        for request in batch:
+            by_kind.setdefault(request[3], []).append(request)
+        for kind, requests in by_kind.items():
+            handler = self.handlers.get(kind)
+            if handler is None:
+                for request in requests:
+                    self._reply(request, False, f"Unknown inference request: {kind}")
+                continue
+            started = time.time()
+            try:
+                results = list(handler([request[4] for request in requests]))
+            except Exception as e:
+                logger.error(f"Inference batch {kind} x{len(requests)} failed: {e}")
+                for request in requests:
+                    self._reply(request, False, str(e))
+                continue
+            if len(results) != len(requests):
+                logger.error(f"Inference batch {kind} returned {len(results)} results for {len(requests)} requests")
+                for request in requests:
+                    self._reply(request, False, f"Inference handler {kind} returned a wrong number of results")
+                continue
+            logger.info(f"Inference batch {kind} x{len(requests)} in {time.time() - started:.2f}s")
+            for request, result in zip(requests, results):
+                self._reply(request, True, result)
+        self.batches += 1
+        self.requests += len(batch)
+
+    def serve_forever(self):
+        if os.path.exists(self.address):
+            # Socket còn lại từ lần chạy trước
+            os.remove(self.address)
+        # Xác thực được làm sau accept (xem _receive); socket chỉ chủ sở hữu mở được
+        previous_umask = os.umask(0o177)
+        try:
+            listener = Listener(self.address, family="AF_UNIX")
+        finally:
+            os.umask(previous_umask)
+        os.chmod(self.address, 0o600)
+        with listener:
+            threading.Thread(target=self._accept, args=(listener,), name="slidegen-inference-accept",
+                             daemon=True).start()
+            logger.info(f"Inference worker listening on {self.address} "
+                        f"(batch size {self.batch_size}, wait {self.batch_wait * 1000:.0f}ms)")
+            while True:
+                self.run_batch(self._next_batch())
+
+
+def main():
+    if not INFERENCE_SOCKET:
+        raise SystemExit("SLIDEGEN_INFERENCE_SOCKET is not set")
+    if not INFERENCE_AUTHKEY:
+        raise SystemExit("SLIDEGEN_INFERENCE_AUTHKEY is not set")
+    os.environ[ROLE_ENV] = WORKER_ROLE
+    # Import sau khi đặt vai trò: slide_generator tải mô hình trong tiến trình này
+    import slide_generator
+    InferenceWorker(slide_generator.inference_handlers(), INFERENCE_SOCKET).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
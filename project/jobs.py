@@ -0,0 +1,447 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from inference import INFERENCE_SOCKET
+from storage import storage_manager
+
+logger = logging.getLogger(__name__)
+
+# Sinh deck chạy trên pool luồng riêng, ngoài event loop của uvicorn: request
+# chỉ nhận job id rồi hỏi trạng thái/kết quả sau.
+
+# Với nhiều worker uvicorn, request hỏi job có thể tới worker khác worker đang
+# chạy nó: trạng thái và nhật ký sự kiện của mỗi job được ghi vào thư mục
+# <state dir>/job-<id>/ (status.json ghi đè nguyên tử, events.jsonl nối thêm
+# dưới flock), worker khác đọc từ đó. Giới hạn hàng đợi tính theo từng worker.
+JOB_DIR_PREFIX = "job-"
+STATUS_FILE_NAME = "status.json"
+EVENTS_FILE_NAME = "events.jsonl"
+LOCK_FILE_NAME = ".lock"
+# Worker chạy job giữ flock chung trên file này tới khi job xong: khóa được nghĩa là worker đã chết
+OWNER_LOCK_NAME = ".owner"
+# Chu kỳ worker khác kiểm tra sự kiện mới của job
+JOB_POLL_SECONDS = float(os.environ.get("SLIDEGEN_JOB_POLL_SECONDS", 0.5))
+
+# Mặc định 1 worker: mô hình dùng chung một GPU, các job khác xếp hàng. Với tiến
+# trình inference riêng, nhiều job chạy song song để yêu cầu của chúng được gom batch
+JOB_WORKERS = int(os.environ.get("SLIDEGEN_JOB_WORKERS", 4 if INFERENCE_SOCKET else 1))
+# Số job tối đa đang chờ + đang chạy; vượt quá thì từ chối nhận thêm
+JOB_QUEUE_LIMIT = int(os.environ.get("SLIDEGEN_JOB_QUEUE_LIMIT", 32))
+# Số job đã xong được giữ lại để hỏi kết quả
+JOB_HISTORY = int(os.environ.get("SLIDEGEN_JOB_HISTORY", 100))
+# Số sự kiện tối đa giữ lại cho mỗi job (client kết nối lại đọc từ Last-Event-ID)
+JOB_EVENT_HISTORY = int(os.environ.get("SLIDEGEN_JOB_EVENT_HISTORY", 1000))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobFiles:
+    """
+    Status and event log of one job in its state directory, readable by
+    every worker process. Only the process running the job writes them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _locked(self, mode):
+        with open(self._file(LOCK_FILE_NAME), "a") as lock:
+            fcntl.flock(lock, mode)
+            yield
+
+    def create(self):
+        os.makedirs(self.path, exist_ok=True)
+        open(self._file(EVENTS_FILE_NAME), "a").close()
+
+    def hold_owner(self):
+        """Shared flock held by the running process until the returned file is closed."""
+        owner = open(self._file(OWNER_LOCK_NAME), "a")
+        fcntl.flock(owner, fcntl.LOCK_SH)
+        return owner
+
+    def owner_alive(self):
+        try:
+            with open(self._file(OWNER_LOCK_NAME), "a") as owner:
+                fcntl.flock(owner, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        return False
+
+    def write_status(self, state):
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, self._file(STATUS_FILE_NAME))
+        except (OSError, TypeError, ValueError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def read_status(self):
+        try:
+            with open(self._file(STATUS_FILE_NAME), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def append_events(self, entries, rewrite=False):
+        """Append entries to the log, or replace the whole log with them when rewrite is set."""
+        lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+        with self._locked(fcntl.LOCK_EX):
+            with open(self._file(EVENTS_FILE_NAME), "w" if rewrite else "a", encoding="utf-8") as f:
+                f.write(lines)
+
+    def events_version(self):
+        try:
+            stat = os.stat(self._file(EVENTS_FILE_NAME))
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def read_events(self):
+        with self._locked(fcntl.LOCK_SH):
+            try:
+                with open(self._file(EVENTS_FILE_NAME), encoding="utf-8") as f:
+                    lines = f.readlines()
+            except OSError:
+                return []
+        return [tuple(json.loads(line)) for line in lines if line.endswith("\n")]
+
+    def remove(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class Job:
+    """
+    State of one submitted task, updated by the worker thread.
+
+    Every change is also appended to job.events as (id, event, data), which
+    asyncio consumers wait on with wait_events() (e.g. a Server-Sent Events
+    stream); ids increase so a reconnecting client can resume. With files
+    set, status and events are mirrored there for the other worker processes.
+    """
+
+    def __init__(self, job_id, name, files=None):
+        self.id = job_id
+        self.name = name
+        self.status = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self.files = files
+        self.events = []
+        self._next_event_id = 0
+        self._waiters = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event, data):
+        """Append an event and wake every waiting consumer (callable from any thread)."""
+        with self._lock:
+            self._next_event_id += 1
+            entry = (self._next_event_id, event, data)
+            self.events.append(entry)
+            trimmed = len(self.events) > JOB_EVENT_HISTORY
+            if trimmed:
+                del self.events[0]
+            if self.files is not None:
+                # Ghi dưới khóa của job: thứ tự trong file giống thứ tự id
+                self._write(self.files.append_events, self.events if trimmed else [entry], rewrite=trimmed)
+            waiters = list(self._waiters)
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                # Event loop của consumer đã đóng
+                pass
+
+    def events_after(self, event_id):
+        with self._lock:
+            return [entry for entry in self.events if entry[0] > event_id]
+
+    async def wait_events(self, after_id, timeout=None):
+        """Events newer than after_id, waiting (up to timeout seconds) until there is one."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            events = self.events_after(after_id)
+            if not events and not self.finished:
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                events = self.events_after(after_id)
+            return events
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    def _write(self, write, *args, **kwargs):
+        try:
+            write(*args, **kwargs)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Job {self.id}: cannot write shared job state: {e}")
+
+    def save(self):
+        """Write the current status (and the result once done) for the other worker processes."""
+        if self.files is not None:
+            state = self.to_dict()
+            state["result"] = self.result
+            self._write(self.files.write_status, state)
+
+    def report(self, **progress):
+        """Progress callback for the task: merges the given fields into job.progress."""
+        with self._lock:
+            self.progress.update(progress)
+            snapshot = dict(self.progress)
+        self.publish("progress", snapshot)
+        self.save()
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "name": self.name,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class StoredJob:
+    """
+    Read-only view of a job run by another worker process, loaded from its
+    JobFiles. A job left unfinished by a process that exited reads as failed.
+    """
+
+    def __init__(self, job_id, files):
+        self.id = job_id
+        self.files = files
+        self._state = {}
+        self._events = []
+        self._events_version = None
+
+    @classmethod
+    def load(cls, job_id, files):
+        job = cls(job_id, files)
+        return job if job.refresh() else None
+
+    def refresh(self):
+        state = self.files.read_status()
+        if state is None:
+            return False
+        if state["status"] not in (DONE, FAILED) and not self.files.owner_alive():
+            state.update(status=FAILED, error="The worker process running the job exited")
+        self._state = state
+        return True
+
+    @property
+    def status(self):
+        return self._state["status"]
+
+    @property
+    def error(self):
+        return self._state.get("error")
+
+    @property
+    def result(self):
+        return self._state.get("result")
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self):
+        return {name: value for name, value in self._state.items() if name != "result"}
+
+    def events_after(self, event_id):
+        # Chỉ đọc lại file khi nó đổi (kích thước/mtime)
+        version = self.files.events_version()
+        if version != self._events_version:
+            self._events = self.files.read_events()
+            self._events_version = version
+        return [entry for entry in self._events if entry[0] > event_id]
+
+    async def wait_events(self, after_id, timeout=None):
+        """Events newer than after_id, polling the log (up to timeout seconds) until there is one."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Đọc trạng thái trước sự kiện: worker chạy job ghi sự kiện cuối trước khi ghi trạng thái xong
+            await asyncio.to_thread(self.refresh)
+            events = await asyncio.to_thread(self.events_after, after_id)
+            if events or self.finished:
+                return events
+            if deadline is not None and time.monotonic() >= deadline:
+                return []
+            await asyncio.sleep(JOB_POLL_SECONDS)
+
+
+class JobManager:
+    """
+    Runs submitted functions on a bounded worker pool and keeps their state.
+
+    The function receives the Job as its first argument so it can report
+    progress; its return value becomes job.result. cleanup, when given, runs
+    once the job ends, including when it is cancelled before starting.
+    Once start() is given a state directory, every job's status and events
+    are shared there and get() also finds jobs of other worker processes.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, queue_limit=JOB_QUEUE_LIMIT, history=JOB_HISTORY):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="slidegen-job")
+        self.queue_limit = queue_limit
+        self.history = history
+        self.state_dir = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, state_dir):
+        """Share job state with the other worker processes through state_dir."""
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_dir = state_dir
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.state_dir, JOB_DIR_PREFIX + job_id)
+
+    def _pending(self):
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            job = self._jobs.pop(job_id)
+            if job.files is not None:
+                job.files.remove()
+
+    def submit(self, name, fn, *args, cleanup=None, **kwargs):
+        job_id = uuid.uuid4().hex
+        files = JobFiles(self._job_dir(job_id)) if self.state_dir is not None else None
+        owner = None
+        if files is not None:
+            files.create()
+            # Trạng thái của job chưa xong không bị dọn; worker khác biết job còn sống nhờ khóa owner
+            storage_manager.pin(files.path)
+            owner = files.hold_owner()
+        with self._lock:
+            full = self._pending() >= self.queue_limit
+            if not full:
+                job = Job(job_id, name, files)
+                self._jobs[job.id] = job
+                self._forget_finished()
+        if full:
+            if files is not None:
+                owner.close()
+                storage_manager.unpin(files.path)
+                files.remove()
+            raise QueueFullError(f"Too many jobs in the queue ({self.queue_limit})")
+        job.save()
+        ended = threading.Lock()
+
+        def end():
+            # Chạy đúng một lần: khi job kết thúc hoặc bị hủy lúc còn xếp hàng
+            if not ended.acquire(blocking=False):
+                return
+            try:
+                if cleanup is not None:
+                    cleanup()
+            except Exception as e:
+                logger.warning(f"Job {job.id} ({name}): cleanup failed: {e}")
+            finally:
+                if owner is not None:
+                    owner.close()
+                    storage_manager.unpin(files.path)
+
+        def cancelled(future):
+            if not future.cancelled():
+                return
+            self._finish(job, FAILED, error="Job cancelled")
+            end()
+
+        job.future = self.executor.submit(self._run, job, end, fn, args, kwargs)
+        job.future.add_done_callback(cancelled)
+        logger.info(f"Job {job.id} ({name}) queued")
+        return job
+
+    def _finish(self, job, status, result=None, error=None):
+        with job._lock:
+            job.result = result
+            job.error = error
+            job.status = status
+            job.finished_at = time.time()
+        job.publish("status", {"status": status, "error": error} if error is not None else {"status": status})
+        job.save()
+
+    def _run(self, job, end, fn, args, kwargs):
+        try:
+            with job._lock:
+                job.status = RUNNING
+                job.started_at = time.time()
+            job.publish("status", {"status": RUNNING})
+            job.save()
+            logger.info(f"Job {job.id} ({job.name}) started")
+            try:
+                result = fn(job, *args, **kwargs)
+            except Exception as e:
+                logger.exception(f"Job {job.id} ({job.name}) failed: {e}")
+                self._finish(job, FAILED, error=str(e))
+                raise
+            self._finish(job, DONE, result=result)
+            logger.info(f"Job {job.id} ({job.name}) done in {job.finished_at - job.started_at:.1f}s")
+            return result
+        finally:
+            end()
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None or self.state_dir is None or not _JOB_ID.match(job_id):
+            return job
+        # Job do worker khác chạy
+        return StoredJob.load(job_id, JobFiles(self._job_dir(job_id)))
+
+    def shutdown(self):
+        # Job còn xếp hàng bị hủy; callback của chúng vẫn dọn upload và bỏ pin
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+job_manager = JobManager()
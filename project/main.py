@@ -1,19 +1,36 @@
+import asyncio
+import json
 import logging
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+import mimetypes
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, HTMLResponse, FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import os
+import re
 import shutil
 import tempfile
-import zipfile
 import uvicorn
-from slide_generator import process_slides  # Giả định hàm xử lý DOCX từ slide_generator.py
+from thumbnails import ThumbnailStaticFiles, THUMB_DIR, THUMB_URL_PREFIX, thumbnail_urls_for_bytes
+from slide_generator import process_slides, capture_slide_image, IMAGE_EXTENSIONS  # Giả định hàm xử lý DOCX từ slide_generator.py
+from deck_format import CSS_DIR_NAME
+from media_store import MEDIA_DIR, MEDIA_DIR_NAME
+from deck_result import ZIP_FILE_NAME
+from deck_store import DeckStore, LATEST_DIR_NAME
+from storage import storage_manager, StorageArea, GB, DAY, STATE_DIR_NAME
+from render_cache import render_cache
+from deck_index import (DeckIndex, DeckFiles, VersionConflict, edit_index, inline_deck_files, is_archive_deck,
+                        iter_deck_entries, read_deck_file)
+from deck_manifest import content_hash
+from deck_archive import DeckArchive, ArchiveError, iter_archive_member, ARCHIVE_FILE_NAME, ZIP_MAX_UPLOAD_BYTES
+from pdf_stream import iter_pdf
+from zip_stream import iter_zip
+from jobs import job_manager, QueueFullError, DONE, FAILED
 from typing import List
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-import img2pdf
-import asyncio
+from urllib.parse import urlsplit
 
 # Cấu hình logging
 logging.basicConfig(level=logging.INFO)
@@ -32,15 +49,65 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Mount thumbnail phải đứng trước /static để được match trước
+app.mount(THUMB_URL_PREFIX, ThumbnailStaticFiles(directory=THUMB_DIR), name="thumbs")
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
-UPLOAD_DIR = os.path.join(STATIC_DIR, "uploads")
 OUTPUT_DIR = os.path.join(STATIC_DIR, "output")
 TEMP_DIR = os.path.join(STATIC_DIR, "temp")
 
-for directory in [UPLOAD_DIR, OUTPUT_DIR, TEMP_DIR]:
+# Comment SSE định kỳ để proxy không đóng kết nối khi một slide sinh lâu
+SSE_KEEPALIVE_SECONDS = 15
+
+for directory in [OUTPUT_DIR, TEMP_DIR]:
     os.makedirs(directory, exist_ok=True)
 
+# Deck đã sinh/nhập, mỗi deck một thư mục OUTPUT_DIR/<deck id>
+deck_store = DeckStore(OUTPUT_DIR)
+
+def referenced_thumbnails():
+    # Thumbnail còn được slides.json của một deck trỏ tới thì không bị xóa
+    names = set()
+    for folder in deck_store.decks():
+        index = DeckIndex.load(folder)
+        for slide in index.slides if index is not None else ():
+            names.update(url.rsplit("/", 1)[-1] for url in (slide["thumbnails"] or {}).values())
+    return names
+
+# Hạn mức và thời gian sống của từng vùng (ghi đè bằng SLIDEGEN_<VÙNG>_QUOTA_BYTES / _TTL_SECONDS).
+# Upload nằm trong temp (mỗi upload một thư mục mkdtemp); deck có bản sao ảnh riêng nên media chỉ là bộ nhớ đệm.
+storage_manager.add_area(StorageArea.from_env("output", OUTPUT_DIR, 5 * GB, 14 * DAY, keep=[LATEST_DIR_NAME]))
+storage_manager.add_area(StorageArea.from_env("temp", TEMP_DIR, 1 * GB, 1 * DAY))
+storage_manager.add_area(StorageArea.from_env("media", MEDIA_DIR, 2 * GB, 7 * DAY))
+storage_manager.add_area(StorageArea.from_env("thumbs", THUMB_DIR, 2 * GB, 14 * DAY, in_use=referenced_thumbnails))
+
+# Link tương đối từ html/ (hoặc edits/) tới file dùng chung của deck
+DECK_LINKS = (('href="', CSS_DIR_NAME), ('src="', MEDIA_DIR_NAME))
+
+def resolve_deck_links(content, deck_url):
+    # Slide trỏ tới ../css/ (định dạng "shared") và ../media/ trong deck; đổi sang URL tuyệt đối để trình duyệt tải được
+    for attribute, dir_name in DECK_LINKS:
+        content = content.replace(f'{attribute}../{dir_name}/', f'{attribute}{deck_url}/{dir_name}/')
+    return content
+
+def relative_deck_links(content, deck_url):
+    # Ngược lại với resolve_deck_links: slide sửa trên trình duyệt được lưu với link tương đối như file gốc
+    for attribute, dir_name in DECK_LINKS:
+        content = content.replace(f'{attribute}{deck_url}/{dir_name}/', f'{attribute}../{dir_name}/')
+    return content
+
+@app.on_event("startup")
+def start_storage_sweeper():
+    # Mỗi worker uvicorn gọi hàm này; chỉ một worker quét, các worker khác đọc metrics của nó
+    storage_manager.start(os.path.join(OUTPUT_DIR, STATE_DIR_NAME))
+    # Trạng thái job nằm trong vùng temp: worker nào nhận request cũng đọc được
+    job_manager.start(TEMP_DIR)
+
+@app.on_event("shutdown")
+def stop_jobs():
+    job_manager.shutdown()
+    storage_manager.stop()
+
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
     try:
@@ -57,200 +124,513 @@ async def read_root():
         logger.exception(f"Error reading index.html: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+def archive_url(deck_id):
+    # File của deck nhập từ ZIP được đọc thẳng từ archive
+    return f"/api/decks/{deck_id}/files"
+
+def deck_base_url(deck_id, deck_folder):
+    return archive_url(deck_id) if is_archive_deck(deck_folder) else static_url(deck_folder)
+
+def copy_upload(source, target, max_bytes=None, chunk_size=1024 * 1024):
+    copied = 0
+    for chunk in iter(lambda: source.read(chunk_size), b""):
+        copied += len(chunk)
+        if max_bytes is not None and copied > max_bytes:
+            raise ArchiveError(f"File tải lên vượt quá {max_bytes} bytes")
+        target.write(chunk)
+
+async def save_upload(file, max_bytes=None):
+    # Mỗi upload một thư mục tạm riêng: hai lần tải cùng tên file không ghi đè nhau
+    upload_dir = tempfile.mkdtemp(dir=TEMP_DIR)
+    # Giữ cho tới khi job/request dùng xong (release_upload), kể cả lúc job còn xếp hàng
+    storage_manager.pin(upload_dir)
+    temp_path = os.path.join(upload_dir, os.path.basename(file.filename))
+    try:
+        with open(temp_path, "wb") as buffer:
+            await run_in_threadpool(copy_upload, file.file, buffer, max_bytes)
+    except BaseException:
+        release_upload(temp_path)
+        raise
+    return temp_path
+
+def release_upload(temp_path):
+    upload_dir = os.path.dirname(temp_path)
+    shutil.rmtree(upload_dir, ignore_errors=True)
+    storage_manager.unpin(upload_dir)
+
+def static_url(path):
+    return "/static/" + os.path.relpath(path, STATIC_DIR).replace(os.sep, '/')
+
+def slide_payload(slide, content):
+    thumbnails = thumbnail_urls_for_bytes(slide.image, slide.image_ext)
+    return {
+        "index": slide.index,
+        "content": content,
+        "type": "html",
+        "preview": thumbnails["full"],
+        "thumbnails": thumbnails,
+        "tool_call": slide.tool_call,
+        "status": slide.status,
+        "verdict": slide.verdict,
+    }
+
+def report_progress(job, slide_data=None, **progress):
+    # Mỗi slide hoàn tất được phát ngay dưới dạng sự kiện "slide": HTML tự chứa vì
+    # CSS chung của deck chỉ được ghi ra khi cả deck xong; ảnh gửi bằng URL theo hash
+    if slide_data is not None:
+        job.publish("slide", slide_payload(slide_data, slide_data.content))
+    job.report(**progress)
+
+def slide_entry(deck_id, base_url, slide):
+    preview_url = f"{base_url}/{slide['image']}" if slide["image"] else None
+    return {
+        "id": slide["id"],
+        "hash": slide["hash"],
+        "version": slide["version"],
+        "url": f"/api/decks/{deck_id}/slides/{slide['id']}",
+        "preview": preview_url,
+        # Deck nhập từ ZIP không có thumbnail (phải giải nén ảnh); trình duyệt tải lazy ảnh gốc
+        "thumbnails": slide["thumbnails"] or ({"grid": preview_url, "full": preview_url} if preview_url else None),
+    }
+
+def deck_response(deck_id, deck_folder, index):
+    # Chỉ danh sách slide; HTML từng slide tải riêng khi được mở
+    base_url = deck_base_url(deck_id, deck_folder)
+    return {
+        "deck_id": deck_id,
+        "slides": [slide_entry(deck_id, base_url, slide) for slide in index.slides],
+        "download_url": f"/api/decks/{deck_id}/download",
+    }
+
+def generate_deck(job, temp_path, source_name):
+    # Chạy trên worker của job_manager, không chặn event loop; mỗi job một workspace riêng
+    workspace = deck_store.new_workspace()
+    # Deck gần nhất của cùng tài liệu (manifest.json + ảnh) để dùng lại các slide không đổi
+    previous_folder = deck_store.latest(source_name)
+    try:
+        # Workspace và deck cũ đang được đọc không bị dọn trong lúc job chạy
+        with storage_manager.pinned(workspace, previous_folder):
+            deck = process_slides(temp_path, workspace,
+                                  progress_callback=lambda **progress: report_progress(job, **progress),
+                                  previous_folder=previous_folder)
+            index = DeckIndex.from_deck(deck, [thumbnail_urls_for_bytes(slide.image, slide.image_ext)
+                                               for slide in deck.slides])
+            index.write(workspace)
+            deck_id = deck_store.publish(workspace, source_name)
+        return deck_response(deck_id, deck_store.path(deck_id), index)
+    except BaseException:
+        deck_store.discard(workspace)
+        raise
+
+async def submit_deck_job(file):
+    if not file.filename.endswith('.docx'):
+        raise HTTPException(status_code=400, detail="Chỉ chấp nhận file DOCX")
+    temp_path = await save_upload(file)
+    try:
+        # Upload được xóa khi job kết thúc, kể cả khi job bị hủy lúc còn xếp hàng (shutdown)
+        return job_manager.submit(file.filename, generate_deck, temp_path, os.path.basename(file.filename),
+                                  cleanup=lambda: release_upload(temp_path))
+    except QueueFullError as e:
+        release_upload(temp_path)
+        raise HTTPException(status_code=503, detail=str(e))
+
+def get_job_or_404(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy job")
+    return job
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(file: UploadFile = File(...)):
+    job = await submit_deck_job(file)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/jobs/{job.id}",
+        "result_url": f"/api/jobs/{job.id}/result",
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = await run_in_threadpool(get_job_or_404, job_id)
+    return job.to_dict()
+
+@app.get("/api/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = await run_in_threadpool(get_job_or_404, job_id)
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail=f"Job chưa hoàn thành ({job.status})")
+    return JSONResponse(content=job.result)
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    job = await run_in_threadpool(get_job_or_404, job_id)
+    # EventSource tự gửi lại Last-Event-ID khi kết nối lại: chỉ gửi các sự kiện mới hơn
+    try:
+        last_id = int(request.headers.get("last-event-id", 0))
+    except ValueError:
+        last_id = 0
+
+    async def stream():
+        nonlocal last_id
+        while True:
+            if await request.is_disconnected():
+                break
+            events = await job.wait_events(last_id, timeout=SSE_KEEPALIVE_SECONDS)
+            if not events:
+                if job.finished:
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            for event_id, event, data in events:
+                last_id = event_id
+                yield f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+            if job.finished and not job.events_after(last_id):
+                break
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def not_modified(request, etag):
+    if_none_match = request.headers.get("if-none-match")
+    return bool(if_none_match) and (if_none_match.strip() == "*"
+                                    or etag in (tag.strip() for tag in if_none_match.split(",")))
+
+def load_deck_index(deck_id):
+    deck_folder = deck_store.get(deck_id)
+    index = DeckIndex.load(deck_folder) if deck_folder else None
+    if index is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy deck")
+    # Deck được mở/tải gần đây bị dọn sau cùng
+    storage_manager.touch(deck_folder)
+    return deck_folder, index
+
+@app.get("/api/decks/{deck_id}")
+async def get_deck(deck_id: str, request: Request):
+    deck_folder, index = await run_in_threadpool(load_deck_index, deck_id)
+    payload = deck_response(deck_id, deck_folder, index)
+    etag = f'"{content_hash(json.dumps(payload, sort_keys=True))}"'
+    # no-cache: trình duyệt luôn hỏi lại server, nhưng nhận 304 khi deck không đổi
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=payload, headers=headers)
+
+def read_slide_document(deck_id, deck_folder, slide):
+    content = read_deck_file(deck_folder, slide["html"]).decode("utf-8")
+    return resolve_deck_links(content, deck_base_url(deck_id, deck_folder))
+
+@app.get("/api/decks/{deck_id}/slides/{slide_id}")
+async def get_deck_slide(deck_id: str, slide_id: str, request: Request):
+    deck_folder, index = await run_in_threadpool(load_deck_index, deck_id)
+    slide = index.get(slide_id)
+    if slide is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy slide")
+    etag = f'"{slide["hash"]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    content = await run_in_threadpool(read_slide_document, deck_id, deck_folder, slide)
+    return HTMLResponse(content=content, headers=headers)
+
+@app.get("/api/storage")
+async def storage_metrics():
+    # Dung lượng đang giữ / đã dọn của từng vùng và của render cache
+    metrics = await run_in_threadpool(storage_manager.metrics)
+    metrics["render_cache"] = render_cache.stats()
+    return metrics
+
+@app.get("/api/decks/{deck_id}/download")
+async def download_deck(deck_id: str):
+    # Zip chỉ được dựng khi có người tải về
+    deck_folder = deck_store.get(deck_id)
+    if deck_folder is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy deck")
+    storage_manager.touch(deck_folder)
+    index = await run_in_threadpool(DeckIndex.load, deck_folder)
+    source_zip = os.path.join(deck_folder, ARCHIVE_FILE_NAME)
+    if os.path.exists(source_zip) and (index is None or not index.edited):
+        # Deck nhập từ ZIP chưa sửa: trả lại nguyên archive
+        return FileResponse(source_zip, media_type="application/zip", filename=ZIP_FILE_NAME)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy deck")
+    # Trạng thái hiện tại của deck (slide đã sửa thay cho bản gốc), nén theo luồng
+    return StreamingResponse(iter_zip(iter_pinned(deck_folder, iter_deck_entries(deck_folder, index))),
+                             media_type="application/zip",
+                             headers={"Content-Disposition": f'attachment; filename="{ZIP_FILE_NAME}"'})
+
+def slide_update(body, require_version=True):
+    content = body.get("content")
+    version = body.get("version")
+    if not isinstance(content, str) or (require_version and not isinstance(version, int)):
+        raise HTTPException(status_code=400, detail="Cần 'content' (chuỗi) và 'version' (số nguyên)")
+    return content, version
+
+def conflict(deck_id, deck_folder, error):
+    return HTTPException(status_code=409, detail={
+        "message": "Slide đã được thay đổi ở nơi khác",
+        "slide": slide_entry(deck_id, deck_base_url(deck_id, deck_folder), error.slide),
+    })
+
+def change_deck(deck_id, change):
+    # Đọc - sửa - ghi slides.json dưới khóa của deck
+    deck_folder = deck_store.get(deck_id)
+    if deck_folder is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy deck")
+    try:
+        with edit_index(deck_folder) as index:
+            if index is None:
+                raise HTTPException(status_code=404, detail="Không tìm thấy deck")
+            slide = change(deck_folder, index)
+    except VersionConflict as e:
+        raise conflict(deck_id, deck_folder, e)
+    return deck_folder, slide
+
+@app.patch("/api/decks/{deck_id}/slides/{slide_id}")
+async def update_deck_slide(deck_id: str, slide_id: str, body: dict):
+    # Chỉ slide đã sửa được gửi lên; version là phiên bản client đã sửa từ đó
+    content, version = slide_update(body)
+
+    def change(deck_folder, index):
+        document = relative_deck_links(content, deck_base_url(deck_id, deck_folder))
+        slide = index.update_slide(deck_folder, slide_id, document, version)
+        if slide is None:
+            raise HTTPException(status_code=404, detail="Không tìm thấy slide")
+        return slide
+
+    deck_folder, slide = await run_in_threadpool(change_deck, deck_id, change)
+    return slide_entry(deck_id, deck_base_url(deck_id, deck_folder), slide)
+
+@app.post("/api/decks/{deck_id}/slides", status_code=201)
+async def add_deck_slide(deck_id: str, body: dict):
+    content, _ = slide_update(body, require_version=False)
+
+    def change(deck_folder, index):
+        return index.add_slide(deck_folder, relative_deck_links(content, deck_base_url(deck_id, deck_folder)))
+
+    deck_folder, slide = await run_in_threadpool(change_deck, deck_id, change)
+    return slide_entry(deck_id, deck_base_url(deck_id, deck_folder), slide)
+
+@app.delete("/api/decks/{deck_id}/slides/{slide_id}", status_code=204)
+async def delete_deck_slide(deck_id: str, slide_id: str, version: int):
+    def change(deck_folder, index):
+        if not index.remove_slide(slide_id, version):
+            raise HTTPException(status_code=404, detail="Không tìm thấy slide")
+
+    await run_in_threadpool(change_deck, deck_id, change)
+    return Response(status_code=204)
+
+def iter_pinned(path, items):
+    # Mục được giữ (không bị dọn) trong suốt thời gian gửi response
+    with storage_manager.pinned(path):
+        yield from items
+
+def iter_deck_pages(deck_folder, index):
+    # Slide chưa sửa: ảnh có sẵn trong deck; slide đã sửa: HTML để render lại. Chrome mở
+    # HTML qua file:// nên CSS/ảnh của deck (cả trong archive) được nhúng thẳng vào trang
+    with storage_manager.pinned(deck_folder), DeckFiles(deck_folder) as files:
+        for slide in index.slides:
+            if slide["image"]:
+                yield files.read(slide["image"])
+            else:
+                yield inline_deck_files(files, files.read(slide["html"]).decode("utf-8"))
+
+@app.get("/api/decks/{deck_id}/pdf")
+async def export_deck_pdf(deck_id: str):
+    deck_folder, index = await run_in_threadpool(load_deck_index, deck_id)
+    return StreamingResponse(
+        iter_pdf_export(iter_deck_pages(deck_folder, index), len(index.slides)),
+        media_type='application/pdf',
+        headers={"Content-Disposition": 'attachment; filename="slides.pdf"'},
+    )
+
 @app.post("/api/upload-docx")
 async def upload_docx(file: UploadFile = File(...)):
+    # Giữ API đồng bộ cũ: đợi job xong mà không chặn event loop
+    job = await submit_deck_job(file)
     try:
-        if not file.filename.endswith('.docx'):
-            raise HTTPException(status_code=400, detail="Chỉ chấp nhận file DOCX")
-        temp_path = os.path.join(TEMP_DIR, file.filename)
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        output_folder = os.path.join(OUTPUT_DIR, os.path.splitext(file.filename)[0])
-        if os.path.exists(output_folder):
-            shutil.rmtree(output_folder)
-        os.makedirs(output_folder)
-        process_slides(temp_path, output_folder)
-        zip_files = [f for f in os.listdir(output_folder) if f.endswith('.zip')]
-        if not zip_files:
-            raise FileNotFoundError("Không tìm thấy file ZIP kết quả")
-        zip_path = os.path.join(output_folder, zip_files[0])
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(output_folder)
-        slides = []
-        html_dir = os.path.join(output_folder, 'html')
-        png_dir = os.path.join(output_folder, 'png')
-        if not os.path.exists(html_dir):
-            raise FileNotFoundError("Thư mục 'html' không tồn tại trong file ZIP")
-        html_files = sorted([f for f in os.listdir(html_dir) if f.endswith('.html')])
-        for html_file in html_files:
-            html_path = os.path.join(html_dir, html_file)
-            with open(html_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            png_file = html_file.replace('.html', '.png')
-            png_path = os.path.join(png_dir, png_file)
-            preview_url = None
-            if os.path.exists(png_path):
-                relative_path = os.path.relpath(png_path, STATIC_DIR)
-                preview_url = f"/static/{relative_path.replace(os.sep, '/')}"
-            slides.append({
-                "content": content,
-                "type": "html",
-                "preview": preview_url
-            })
-        os.remove(temp_path)
-        os.remove(zip_path)
-        return JSONResponse(content={"slides": slides})
+        result = await asyncio.wrap_future(job.future)
+        return JSONResponse(content=result)
     except Exception as e:
         logger.exception(f"Error processing DOCX file: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def import_zip(temp_path):
+    workspace = deck_store.new_workspace()
+    storage_manager.pin(workspace)
+    try:
+        # Archive trở thành deck, không giải nén; chỉ đọc HTML của các slide
+        archive_path = os.path.join(workspace, ARCHIVE_FILE_NAME)
+        shutil.move(temp_path, archive_path)
+        with DeckArchive(archive_path) as archive:
+            # Đọc HTML một lần để kiểm tra (UTF-8, giới hạn kích thước) và tính hash
+            index = DeckIndex.from_archive([(html, image, archive.read_text(html))
+                                            for html, image in archive.slides(IMAGE_EXTENSIONS.values())])
+        index.write(workspace)
+        deck_id = deck_store.publish(workspace)
+        return deck_response(deck_id, deck_store.path(deck_id), index)
+    except BaseException:
+        deck_store.discard(workspace)
+        raise
+    finally:
+        storage_manager.unpin(workspace)
+        release_upload(temp_path)
+
 @app.post("/api/upload-zip")
 async def upload_zip(file: UploadFile = File(...)):
+    if not file.filename.endswith('.zip'):
+        raise HTTPException(status_code=400, detail="Chỉ chấp nhận file ZIP")
     try:
-        if not file.filename.endswith('.zip'):
-            raise HTTPException(status_code=400, detail="Chỉ chấp nhận file ZIP")
-        temp_path = os.path.join(TEMP_DIR, file.filename)
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        output_folder = os.path.join(OUTPUT_DIR, os.path.splitext(file.filename)[0])
-        if os.path.exists(output_folder):
-            shutil.rmtree(output_folder)
-        os.makedirs(output_folder)
-        with zipfile.ZipFile(temp_path, 'r') as zip_ref:
-            zip_ref.extractall(output_folder)
-        slides = []
-        html_dir = os.path.join(output_folder, 'html')
-        png_dir = os.path.join(output_folder, 'png')
-        if not os.path.exists(html_dir):
-            raise FileNotFoundError("Thư mục 'html' không tồn tại trong file ZIP")
-        html_files = sorted([f for f in os.listdir(html_dir) if f.endswith('.html')])
-        for html_file in html_files:
-            html_path = os.path.join(html_dir, html_file)
-            with open(html_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            png_file = html_file.replace('.html', '.png')
-            png_path = os.path.join(png_dir, png_file)
-            preview_url = None
-            if os.path.exists(png_path):
-                relative_path = os.path.relpath(png_path, STATIC_DIR)
-                preview_url = f"/static/{relative_path.replace(os.sep, '/')}"
-            slides.append({
-                "content": content,
-                "type": "html",
-                "preview": preview_url
-            })
-        os.remove(temp_path)
-        return JSONResponse(content={"slides": slides})
+        temp_path = await save_upload(file, max_bytes=ZIP_MAX_UPLOAD_BYTES)
+        return JSONResponse(content=await run_in_threadpool(import_zip, temp_path))
+    except ArchiveError as e:
+        logger.warning(f"Rejected ZIP file {file.filename}: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.exception(f"Error processing ZIP file: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def open_deck_archive(deck_id):
+    deck_folder = deck_store.get(deck_id)
+    archive_path = os.path.join(deck_folder, ARCHIVE_FILE_NAME) if deck_folder else None
+    if archive_path is None or not os.path.exists(archive_path):
+        return None
+    storage_manager.touch(deck_folder)
+    return DeckArchive(archive_path)
+
+@app.get("/api/decks/{deck_id}/files/{path:path}")
+async def deck_archive_file(deck_id: str, path: str):
+    # Giải nén theo luồng từng file khi trình duyệt cần (ảnh preview, css)
+    archive = await run_in_threadpool(open_deck_archive, deck_id)
+    if archive is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy deck")
+    with archive:
+        info = archive.member(path)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy file trong deck")
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    # Deck đã công bố không bao giờ thay đổi
+    return StreamingResponse(iter_archive_member(archive.zip.filename, path), media_type=media_type,
+                             headers={"Content-Length": str(info.file_size),
+                                      "Cache-Control": "public, max-age=31536000, immutable"})
+
+def iter_edited_slides(slides):
+    for i, slide in enumerate(slides, 1):
+        yield f"html/slide_{i:02d}.html", slide["content"].encode("utf-8")
+
 @app.post("/api/save-slides")
 async def save_slides(slides: List[dict]):
-    try:
-        timestamp = tempfile.gettempdir().split(os.sep)[-1]
-        output_folder = os.path.join(OUTPUT_DIR, f"edited_slides_{timestamp}")
-        if os.path.exists(output_folder):
-            shutil.rmtree(output_folder)
-        os.makedirs(output_folder)
-        html_folder = os.path.join(output_folder, "html")
-        os.makedirs(html_folder, exist_ok=True)
-        for i, slide in enumerate(slides, 1):
-            file_name = f"slide_{i:02d}"
-            html_path = os.path.join(html_folder, f"{file_name}.html")
-            with open(html_path, "w", encoding="utf-8") as f:
-                f.write(slide["content"])
-        zip_filename = f"slides_{timestamp}.zip"
-        zip_path = os.path.join(OUTPUT_DIR, zip_filename)
-        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(output_folder):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, output_folder)
-                    zipf.write(file_path, arcname)
-        return FileResponse(zip_path, filename=zip_filename)
-    except Exception as e:
-        logger.exception(f"Error saving slides: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Zip dựng ngay trong luồng response từ payload, không ghi file trung gian
+    return StreamingResponse(
+        iter_zip(iter_edited_slides(slides)),
+        media_type='application/zip',
+        headers={"Content-Disposition": 'attachment; filename="slides.zip"'},
+    )
 
-@app.post("/api/export-pdf")
-async def export_pdf(slides: List[dict]):
-    temp_folder = None
-    try:
-        timestamp = tempfile.gettempdir().split(os.sep)[-1]
-        temp_folder = os.path.join(TEMP_DIR, f"pdf_{timestamp}")
-        if os.path.exists(temp_folder):
-            shutil.rmtree(temp_folder)
-        os.makedirs(temp_folder)
-        
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--window-size=1920,1080')
-        
-        driver = webdriver.Chrome(options=chrome_options)
-        
-        image_files = []
-        for i, slide in enumerate(slides, 1):
-            html_path = os.path.join(temp_folder, f'slide_{i:02d}.html')
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(f'''
-                    <!DOCTYPE html>
-                    <html>
-                        <head>
-                            <meta charset="UTF-8">
-                            <style>
-                                body {{
-                                    margin: 0;
-                                    padding: 20px;
-                                    width: 1920px;
-                                    height: 1080px;
-                                    display: flex;
-                                    align-items: center;
-                                    justify-content: center;
-                                }}
-                                .slide-content {{
-                                    width: 100%;
-                                    height: 100%;
-                                    padding: 40px;
-                                }}
-                            </style>
-                        </head>
-                        <body>
-                            <div class="slide-content">
-                                {slide["content"]}
-                            </div>
-                        </body>
-                    </html>
-                ''')
+def stored_slide_image(url):
+    """
+    Bytes of an image the server already has for a slide: its PNG in a
+    published deck (/static/output/<deck id>/png/...) or a content-addressed
+    thumbnail source (/static/thumbs/<digest>_full.<ext>). None otherwise.
+    """
+    if not url:
+        return None
+    path = urlsplit(url).path
+    deck_prefix = static_url(OUTPUT_DIR) + "/"
+    if path.startswith("/api/decks/"):
+        parts = path.split("/")
+        if len(parts) < 6 or parts[4] != "files":
+            return None
+        member = "/".join(parts[5:])
+        try:
+            archive = open_deck_archive(parts[3])
+            if archive is None:
+                return None
+            with archive:
+                return archive.read(member) if archive.member(member) else None
+        except ArchiveError:
+            return None
+    elif path.startswith(deck_prefix):
+        parts = path[len(deck_prefix):].split("/")
+        deck_folder = deck_store.get(parts[0]) if len(parts) == 3 and parts[1] == "png" else None
+        image_path = os.path.join(deck_folder, "png", parts[2]) if deck_folder else None
+    elif path.startswith(THUMB_URL_PREFIX + "/"):
+        name = path[len(THUMB_URL_PREFIX) + 1:]
+        image_path = os.path.join(THUMB_DIR, name) if "/" not in name and "_full." in name else None
+    else:
+        image_path = None
+    if image_path is None or not os.path.isfile(image_path):
+        return None
+    with open(image_path, "rb") as f:
+        return f.read()
+
+def iter_pdf_export(pages, page_count):
+    """
+    Bytes of a PDF of the given pages: image bytes are used as they are,
+    HTML strings are rendered first.
+    """
+    # Chạy trong threadpool (generator đồng bộ của StreamingResponse): mỗi trang được gửi ngay khi có ảnh
+    driver = None
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--window-size=1920,1080')
+
+    # Chỉ khởi động Chrome khi có slide chưa có ảnh và chưa có trong render cache
+    def get_driver():
+        nonlocal driver
+        if driver is None:
+            driver = webdriver.Chrome(options=chrome_options)
             # Tăng thời gian chờ tải trang
             driver.set_page_load_timeout(300)  # 5 phút
-            driver.get(f'file:///{html_path}')
-            # Đợi thêm để đảm bảo trang tải xong
-            await asyncio.sleep(1)
-            image_path = os.path.join(temp_folder, f'slide_{i:02d}.png')
-            driver.save_screenshot(image_path)
-            image_files.append(image_path)
-        
-        driver.quit()
-        
-        pdf_path = os.path.join(TEMP_DIR, f'slides_{timestamp}.pdf')
-        with open(pdf_path, "wb") as f:
-            f.write(img2pdf.convert(image_files))
-        
-        response = FileResponse(
-            pdf_path,
-            filename="slides.pdf",
-            media_type='application/pdf'
-        )
-        return response
+        return driver
+
+    def slide_images():
+        for i, page in enumerate(pages, 1):
+            if isinstance(page, str):
+                # Cùng bề rộng/định dạng với lúc sinh slide (và với ảnh đã lưu của các trang khác):
+                # cùng key render cache, slide chưa đổi HTML không phải chụp lại
+                page, _ = capture_slide_image(get_driver, page, decode=False)
+            logger.info(f"PDF export: page {i}/{page_count}")
+            yield page
+
+    try:
+        yield from iter_pdf(slide_images())
     except Exception as e:
+        # Header đã gửi: chỉ có thể cắt luồng, client nhận file PDF hỏng
         logger.exception(f"Error exporting PDF: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise
     finally:
-        if temp_folder and os.path.exists(temp_folder):
-            shutil.rmtree(temp_folder)
+        if driver is not None:
+            driver.quit()
+
+_ARCHIVE_LINK = re.compile(r'"/api/decks/([^/"]+)/files/')
+
+def inline_archive_links(content):
+    # Slide của deck nhập từ ZIP trỏ tới /api/decks/<id>/files/...: Chrome mở file:// không tải được, nhúng vào trang
+    match = _ARCHIVE_LINK.search(content)
+    deck_folder = deck_store.get(match.group(1)) if match else None
+    if deck_folder is None:
+        return content
+    with storage_manager.pinned(deck_folder), DeckFiles(deck_folder) as files:
+        return inline_deck_files(files, relative_deck_links(content, archive_url(match.group(1))))
+
+def iter_payload_pages(slides):
+    for slide in slides:
+        # Slide chưa sửa: dùng lại ảnh PNG của deck thay vì chụp lại
+        yield stored_slide_image(slide.get("image")) or inline_archive_links(slide["content"])
+
+@app.post("/api/export-pdf")
+async def export_pdf(slides: List[dict]):
+    # Slide chưa thuộc deck nào trên server (tạo mới trong editor)
+    return StreamingResponse(
+        iter_pdf_export(iter_payload_pages(slides), len(slides)),
+        media_type='application/pdf',
+        headers={"Content-Disposition": 'attachment; filename="slides.pdf"'},
+    )
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
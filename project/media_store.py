@@ -0,0 +1,88 @@
+import hashlib
+import logging
+import os
+import posixpath
+import re
+import tempfile
+
+from storage import touch_file
+
+logger = logging.getLogger(__name__)
+
+# Ảnh lấy từ DOCX được lưu nguyên byte gốc (không giải mã/nén lại), đặt tên theo
+# sha256 nội dung: cùng một ảnh chỉ có một file dù xuất hiện trong nhiều tài liệu.
+# Mỗi deck giữ bản sao riêng trong media/ của nó, nên thư mục này chỉ là bộ nhớ
+# đệm khi sinh deck và được storage_manager dọn theo hạn mức/thời gian sống.
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+MEDIA_DIR = os.path.join(PROJECT_DIR, "static", "media")
+MEDIA_URL = "/static/media"
+# Thư mục ảnh trong mỗi deck (và trong file zip): deck tải về không cần server
+MEDIA_DIR_NAME = "media"
+
+# Định dạng ảnh raster trình duyệt hiển thị được; EMF/WMF/TIFF... bị bỏ qua.
+# SVG cũng bị bỏ: nó là tài liệu có thể chứa script, phục vụ từ cùng origin là XSS.
+WEB_IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp"}
+HASH_CHARS = 32
+
+_MEDIA_LINK = re.compile(re.escape(MEDIA_URL) + r"/([0-9a-f]{%d}\.[a-z]+)" % HASH_CHARS)
+
+
+class MediaStore:
+    """
+    Content-addressed store for document images.
+
+    Calling the store with (member name, bytes) writes the bytes once as
+    <sha256>.<ext> and returns the URL slides reference it by; images in a
+    format browsers cannot show return None.
+    """
+
+    def __init__(self, media_dir=MEDIA_DIR, base_url=MEDIA_URL):
+        self.media_dir = media_dir
+        self.base_url = base_url
+        self.stored = 0
+        self.reused = 0
+        os.makedirs(self.media_dir, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.media_dir, name)
+
+    def __call__(self, member, data):
+        ext = posixpath.splitext(member)[1].lower()
+        if ext not in WEB_IMAGE_EXTENSIONS:
+            logger.info(f"Skipping image {member}: {ext or 'no extension'} is not shown by browsers")
+            return None
+        name = hashlib.sha256(data).hexdigest()[:HASH_CHARS] + ext
+        path = self.path(name)
+        if touch_file(path):
+            self.reused += 1
+        else:
+            # Ghi vào file tạm rồi đổi tên: không bao giờ phục vụ file ghi dở
+            fd, tmp_path = tempfile.mkstemp(dir=self.media_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self.stored += 1
+        return f"{self.base_url}/{name}"
+
+
+def deck_media_links(content, prefix):
+    """
+    Point the media store URLs in content at prefix/<name> (the copy in the
+    deck folder); return the new content and the referenced file names.
+    """
+    names = []
+
+    def relink(match):
+        name = match.group(1)
+        if posixpath.splitext(name)[1] not in WEB_IMAGE_EXTENSIONS:
+            return match.group(0)
+        names.append(name)
+        return f"{prefix}/{name}"
+
+    return _MEDIA_LINK.sub(relink, content), list(dict.fromkeys(names))
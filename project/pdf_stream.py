@@ -0,0 +1,183 @@
+import io
+import logging
+import struct
+import zlib
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Ghi PDF theo luồng: mỗi trang (ảnh slide) được ghi ra ngay khi có, chỉ giữ
+# offset của các object để dựng bảng xref ở cuối; bộ nhớ không tăng theo số trang.
+
+# Trang 16:9 theo điểm PDF (1920x1080 px ở 96 dpi)
+PAGE_WIDTH_PT = 1440
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SIGNATURE = b"\xff\xd8"
+
+# Object cố định, ghi ở cuối vì cần biết danh sách trang
+CATALOG_ID = 1
+PAGES_ID = 2
+
+
+def _png_chunks(data):
+    offset = len(PNG_SIGNATURE)
+    while offset + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[offset:offset + 8])
+        yield kind, data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+
+
+def _png_image(data):
+    """
+    (dictionary entries, stream) embedding a PNG as-is: the IDAT data is
+    already a Flate stream with PNG predictors, which PDF decodes natively.
+    None when the PNG needs decoding (alpha, transparency key, interlacing).
+    """
+    header = None
+    palette = None
+    idat = []
+    for kind, chunk in _png_chunks(data):
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"PLTE":
+            palette = chunk
+        elif kind == b"tRNS":
+            # Điểm ảnh trong suốt phải được phủ nền trắng khi decode
+            return None
+        elif kind == b"IDAT":
+            idat.append(chunk)
+        elif kind == b"IEND":
+            break
+    if header is None:
+        return None
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if interlace or color_type not in (0, 2, 3):
+        return None
+    if color_type == 3:
+        if palette is None:
+            return None
+        colors = 1
+        color_space = f"[/Indexed /DeviceRGB {len(palette) // 3 - 1} <{palette.hex()}>]"
+    else:
+        colors = 1 if color_type == 0 else 3
+        color_space = "/DeviceGray" if color_type == 0 else "/DeviceRGB"
+    entries = (
+        f"/Width {width} /Height {height} /ColorSpace {color_space} /BitsPerComponent {bit_depth} "
+        f"/Filter /FlateDecode /DecodeParms << /Predictor 15 /Colors {colors} "
+        f"/BitsPerComponent {bit_depth} /Columns {width} >>"
+    )
+    return (width, height), entries, b"".join(idat)
+
+
+def _decoded_image(data):
+    with Image.open(io.BytesIO(data)) as image:
+        if image.mode in ("RGBA", "LA", "P") or "transparency" in image.info:
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        entries = (f"/Width {image.width} /Height {image.height} /ColorSpace /DeviceRGB "
+                   f"/BitsPerComponent 8 /Filter /FlateDecode")
+        return image.size, entries, zlib.compress(image.tobytes(), 6)
+
+
+def _jpeg_image(data):
+    with Image.open(io.BytesIO(data)) as image:
+        size = image.size
+        color_space = {"L": "/DeviceGray", "CMYK": "/DeviceCMYK"}.get(image.mode, "/DeviceRGB")
+    entries = (f"/Width {size[0]} /Height {size[1]} /ColorSpace {color_space} "
+               f"/BitsPerComponent 8 /Filter /DCTDecode")
+    return size, entries, data
+
+
+def image_xobject(data):
+    """((width, height), dictionary entries, stream) of an image file for a PDF image XObject."""
+    if data.startswith(PNG_SIGNATURE):
+        embedded = _png_image(data)
+        if embedded is not None:
+            return embedded
+    elif data.startswith(JPEG_SIGNATURE):
+        return _jpeg_image(data)
+    return _decoded_image(data)
+
+
+class StreamingPdfWriter:
+    """
+    Incremental PDF writer for one image per page.
+
+    header(), add_page() and close() return the bytes to send next; the
+    concatenation is a complete PDF. Only object offsets and page ids are
+    kept between calls.
+    """
+
+    def __init__(self, page_width=PAGE_WIDTH_PT):
+        self.page_width = page_width
+        self.offset = 0
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = PAGES_ID + 1
+
+    def _object(self, object_id, body, stream=None):
+        out = [f"{object_id} 0 obj\n".encode("ascii")]
+        if stream is None:
+            out.append(body.encode("latin-1") + b"\nendobj\n")
+        else:
+            out.append(f"<< {body} /Length {len(stream)} >>\nstream\n".encode("latin-1"))
+            out.append(stream)
+            out.append(b"\nendstream\nendobj\n")
+        data = b"".join(out)
+        self.offsets[object_id] = self.offset
+        self.offset += len(data)
+        return data
+
+    def _new_id(self):
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def header(self):
+        data = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        self.offset += len(data)
+        return data
+
+    def add_page(self, image_bytes):
+        (width, height), entries, stream = image_xobject(image_bytes)
+        page_height = round(self.page_width * height / width, 2)
+        image_id, content_id, page_id = self._new_id(), self._new_id(), self._new_id()
+        content = f"q {self.page_width} 0 0 {page_height} 0 0 cm /Im0 Do Q".encode("ascii")
+        self.page_ids.append(page_id)
+        return b"".join((
+            self._object(image_id, f"/Type /XObject /Subtype /Image {entries}", stream),
+            self._object(content_id, "", content),
+            self._object(page_id, (
+                f"<< /Type /Page /Parent {PAGES_ID} 0 R /MediaBox [0 0 {self.page_width} {page_height}] "
+                f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>"
+            )),
+        ))
+
+    def close(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        parts = [
+            self._object(PAGES_ID, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>"),
+            self._object(CATALOG_ID, f"<< /Type /Catalog /Pages {PAGES_ID} 0 R >>"),
+        ]
+        xref_offset = self.offset
+        size = self.next_id
+        xref = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        xref.extend(f"{self.offsets[object_id]:010d} 00000 n \n" for object_id in range(1, size))
+        xref.append(f"trailer\n<< /Size {size} /Root {CATALOG_ID} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n")
+        data = b"".join(parts) + "".join(xref).encode("ascii")
+        self.offset += len(data)
+        return data
+
+
+def iter_pdf(images):
+    """Bytes of a PDF with one page per image, produced as images come in."""
+    writer = StreamingPdfWriter()
+    yield writer.header()
+    for image_bytes in images:
+        yield writer.add_page(image_bytes)
+    yield writer.close()
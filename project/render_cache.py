@@ -0,0 +1,142 @@
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+RENDER_CACHE_DIR = os.environ.get("SLIDEGEN_RENDER_CACHE_DIR", os.path.join(PROJECT_DIR, "cache", "render"))
+RENDER_CACHE_MAX_BYTES = int(os.environ.get("SLIDEGEN_RENDER_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# Khóa và tổng dung lượng dùng chung giữa các worker, nằm cùng thư mục cache
+LOCK_FILE_NAME = ".lock"
+TOTAL_FILE_NAME = ".total"
+
+
+def make_render_key(html_content, viewport=(1920, 1080), scale=1.0, image_format="png"):
+    """
+    Content-addressed key of a rendered slide: sha256 over the HTML and every
+    parameter that changes the produced bytes.
+    """
+    h = hashlib.sha256()
+    h.update(html_content.encode("utf-8"))
+    h.update(f"|{viewport[0]}x{viewport[1]}|{scale}|{image_format}".encode("utf-8"))
+    return h.hexdigest()
+
+
+class RenderCache:
+    """
+    Disk-backed cache mapping render keys to screenshot bytes.
+
+    Entries are plain files named after their key; their mtime is their last
+    use. The directory is shared by every worker process: the byte total is
+    kept in a file updated under an flock, and when it goes over max_bytes
+    the directory is re-scanned and the least recently used entries are
+    evicted, so the limit holds for all processes together.
+    """
+
+    def __init__(self, cache_dir=RENDER_CACHE_DIR, max_bytes=RENDER_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    @contextmanager
+    def _locked(self):
+        with open(os.path.join(self.cache_dir, LOCK_FILE_NAME), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _scan(self):
+        """(mtime, key, size) of every entry, oldest first."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith(".") or entry.name.endswith(".tmp"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, entry.name, stat.st_size))
+        return sorted(entries)
+
+    def _read_total(self):
+        try:
+            with open(os.path.join(self.cache_dir, TOTAL_FILE_NAME), "r") as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write_total(self, total):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(str(total))
+        os.replace(tmp_path, os.path.join(self.cache_dir, TOTAL_FILE_NAME))
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            # Chưa có, hoặc vừa bị process khác xóa
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+        with self._locked():
+            # Tổng chỉ tăng giữa các lần quét (ghi đè cùng key bị đếm hai lần): vượt hạn mức thì quét lại cho đúng
+            total = self._read_total()
+            total = sum(size for _, _, size in self._scan()) if total is None else total + len(data)
+            if total > self.max_bytes:
+                total = self._evict()
+            self._write_total(total)
+
+    def _evict(self):
+        entries = self._scan()
+        total = sum(size for _, _, size in entries)
+        for _, key, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                continue
+            total -= size
+            logger.info(f"Render cache evicted {key} ({size} bytes)")
+        return total
+
+    def stats(self):
+        entries = self._scan()
+        with self._lock:
+            return {
+                "entries": len(entries),
+                "bytes": sum(size for _, _, size in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+render_cache = RenderCache()
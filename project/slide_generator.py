@@ -1,7 +1,6 @@
 import os
 import shutil
 import tempfile
-from docx import Document
 import json
 import re
 from selenium import webdriver
@@ -9,33 +8,62 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from PIL import Image
 import io
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import base64
 from transformers import AutoTokenizer, AutoModelForCausalLM
 import torch
 from transformers import Qwen2_5_VLForConditionalGeneration, AutoProcessor, BitsAndBytesConfig
 from qwen_vl_utils import process_vision_info
 import logging
 import zipfile
+from collections import namedtuple
+from render_cache import render_cache, make_render_key
+from docx_stream import iter_paragraphs
+from media_store import MediaStore
+from deck_manifest import DeckManifest, pipeline_fingerprint
+from deck_result import DeckResult
+from chunking import iter_slide_units
+from inference import INFERENCE_SOCKET, InferenceClient, is_worker_process
+from token_budget import (
+    MIN_FILL_RATIO,
+    SLIDE_OUTPUT_TOKENS,
+    TokenCounter,
+    content_token_budget,
+    format_size_report,
+    size_report,
+)
 
 # Cấu hình logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SLIDEGEN_LOAD_MODELS=0 bỏ qua việc tải mô hình (benchmark, máy chỉ có CPU)
+LOAD_MODELS = os.environ.get("SLIDEGEN_LOAD_MODELS", "1") == "1"
+# Có SLIDEGEN_INFERENCE_SOCKET: mô hình nằm ở tiến trình inference (inference.py),
+# process web chỉ tải tokenizer (đếm token khi chia slide)
+REMOTE_INFERENCE = bool(INFERENCE_SOCKET) and not is_worker_process()
+inference_client = InferenceClient(INFERENCE_SOCKET) if REMOTE_INFERENCE else None
+
 # Tải mô hình Qwen2.5-7B-Instruct
 model_name_or_path = "Qwen/Qwen2.5-7B-Instruct"
-try:
-    tokenizer = AutoTokenizer.from_pretrained(model_name_or_path)
-    model = AutoModelForCausalLM.from_pretrained(
-        model_name_or_path,
-        torch_dtype=torch.bfloat16,
-        attn_implementation="flash_attention_2",
-        device_map="auto",
-    )
-    logger.info("Qwen2.5-7B-Instruct loaded successfully.")
-except Exception as e:
-    logger.error(f"Error loading Qwen2.5-7B-Instruct: {e}")
-    model = None
-    tokenizer = None
+model = None
+tokenizer = None
+if LOAD_MODELS:
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(model_name_or_path)
+        # Pad trái khi generate theo batch
+        tokenizer.padding_side = "left"
+        if not REMOTE_INFERENCE:
+            model = AutoModelForCausalLM.from_pretrained(
+                model_name_or_path,
+                torch_dtype=torch.bfloat16,
+                attn_implementation="flash_attention_2",
+                device_map="auto",
+            )
+            logger.info("Qwen2.5-7B-Instruct loaded successfully.")
+    except Exception as e:
+        logger.error(f"Error loading Qwen2.5-7B-Instruct: {e}")
+        model = None
+        tokenizer = None
 
 # Cấu hình quantization (8-bit)
 quantization_config = BitsAndBytesConfig(
@@ -45,1745 +73,46 @@ quantization_config = BitsAndBytesConfig(
 
 # Tải mô hình Qwen2.5-VL-7B-Instruct
 vlm_model_name = "Qwen/Qwen2.5-VL-7B-Instruct"
-try:
-    vlm_model = Qwen2_5_VLForConditionalGeneration.from_pretrained(
-        vlm_model_name,
-        torch_dtype=torch.bfloat16,
-        # quantization_config=quantization_config,  # Cấu hình quantization
-        max_memory={0: "6GB"},
-        attn_implementation="flash_attention_2",
-        device_map="auto",
-    )
-    vlm_processor = AutoProcessor.from_pretrained(vlm_model_name, use_fast=True)
-    logger.info("Qwen2.5-VL-7B-Instruct loaded successfully.")
-except Exception as e:
-    logger.error(f"Error loading Qwen2.5-VL-7B-Instruct: {e}")
-    vlm_model = None
-    vlm_processor = None
-
-# Các hàm tạo HTML slide 
-# @title Functions to
-def generate_intro_slide(
-    # Title parameters
-    title="Introduction",
-    title_color='#0F4662',
-    title_font_size="42px",
-    title_font_style="italic",
-    title_margin_bottom="5px",
-    title_margin_left="40px",
-
-    # Content parameters
-    content_text="Content",
-    content_color="#0F4662",
-    content_font_size="24px",
-    content_line_height="1.6",
-    content_width="70%",
-    content_margin="0 auto",
-    content_text_align="center",
-
-    # Decoration parameters
-    dot_color="#0F4662",
-    dot_size="10px",
-    dot_margin="0 5px",
-    dot_count=5,
-    line_color="#1a3d5c",
-    line_width="50%",
-    line_height="2px",
-    line_margin="30px auto",
-
-    # Slide parameters
-    slide_bg_color="#f5f5f5",
-    font_family="Roboto, Arial, sans-serif",
-    additional_css=""
-):
-    """
-    Generates a customizable HTML slide with a 'Conclusion' layout featuring dots and lines as decorations.
-
-    Args:
-        title: Slide title text
-        title_color: Color of the title
-        title_font_size: Font size of title
-        title_font_style: Font style for title (e.g., "italic")
-        title_margin_bottom: Bottom margin for title
-        title_margin_left: Left margin for title
-
-        content_text: Main content text
-        content_color: Color of content text
-        content_font_size: Font size of content
-        content_line_height: Line height for content
-        content_width: Width of content container
-        content_margin: Margin around content
-        content_text_align: Text alignment for content
-
-        dot_color: Color of decorative dots
-        dot_size: Size of decorative dots
-        dot_margin: Margin between dots
-        dot_count: Number of dots in each row
-        line_color: Color of horizontal lines
-        line_width: Width of horizontal lines
-        line_height: Height/thickness of horizontal lines
-        line_margin: Margin around horizontal lines
-
-        slide_bg_color: Background color of the slide
-        font_family: Font family for all text
-        additional_css: Additional CSS styles
-    """
-
-    # Generate dots HTML
-    dots_html = ""
-    for _ in range(dot_count):
-        dots_html += f'<span class="dot"></span>'
-
-    html_code = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body, html {{
-            margin: 0;
-            padding: 0;
-            height: 100%;
-            font-family: {font_family};
-            background-color: {slide_bg_color};
-        }}
-        .slide-container {{
-            display: flex;
-            flex-direction: column;
-            height: 100vh;
-            padding: 40px;
-            box-sizing: border-box;
-        }}
-        .title {{
-            font-size: {title_font_size};
-            color: {title_color};
-            font-style: {title_font_style};
-            margin-bottom: {title_margin_bottom};
-            margin-left: {title_margin_left};
-        }}
-        .content-container {{
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            justify-content: center;
-            flex: 1;
-        }}
-        .content {{
-            color: {content_color};
-            font-size: {content_font_size};
-            line-height: {content_line_height};
-            width: {content_width};
-            margin: {content_margin};
-            text-align: {content_text_align};
-        }}
-        .horizontal-line {{
-            width: {line_width};
-            height: {line_height};
-            background-color: {line_color};
-            margin: {line_margin};
-        }}
-        .dots-container {{
-            display: flex;
-            justify-content: center;
-            margin: 10px 0;
-        }}
-        .dot {{
-            display: inline-block;
-            width: {dot_size};
-            height: {dot_size};
-            border-radius: 50%;
-            background-color: {dot_color};
-            margin: {dot_margin};
-        }}
-        {additional_css}
-    </style>
-</head>
-<body>
-    <div class="slide-container">
-        <div class="title">{title}</div>
-
-        <div class="content-container">
-            <div class="dots-container">
-                {dots_html}
-            </div>
-
-            <div class="horizontal-line"></div>
-
-            <div class="content">
-                {content_text}
-            </div>
-
-            <div class="horizontal-line"></div>
-
-            <div class="dots-container">
-                {dots_html}
-            </div>
-        </div>
-    </div>
-</body>
-</html>"""
-
-    return html_code
-
-
-def generate_body_slide1(
-    title="Professional HTML Slide",
-    title_font_size="42px",
-    slide_title="Slide Title",
-    bg_color="#E8F5E9",
-    text_bg_color="#FFFFFF",
-    text_color="#2E7D32",
-    keyword_color="#1B5E20",
-    font_family="Roboto, Arial, sans-serif",
-    content_paragraph="This is a customizable slide. Add your content here:",
-    para_font_size="24px",
-    list_items=None
-):
-    """
-    Generate a professional HTML slide body with customizable parameters.
-
-    :param title: The title of the HTML document.
-    :param title_font_size: Font size of the slide title.
-    :param slide_title: The title displayed on the slide.
-    :param bg_color: Background color of the page.
-    :param text_bg_color: Background color of the text container.
-    :param text_color: Text color of the slide content.
-    :param keyword_color: Color for keywords.
-    :param font_family: Font family for the slide content.
-    :param content_paragraph: Main paragraph content.
-    :param para_font_size: Font size of the paragraph and list items.
-    :param list_items: A list of bullet points to include.
-    :return: A string containing the HTML code.
-    """
-    if list_items is None:
-        list_items = [
-            "<span class=\"keyword\">Point 1</span>: Description of point 1.",
-            "<span class=\"keyword\">Point 2</span>: Description of point 2.",
-            "<span class=\"keyword\">Point 3</span>: Description of point 3.",
-            "<span class=\"keyword\">Point 4</span>: Description of point 4."
-        ]
-
-    list_html = "\n".join(f"<li>{item}</li>" for item in list_items)
-
-    html_code = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body, html {{
-            height: 100%;
-            margin: 0;
-            font-family: {font_family};
-            background-color: {bg_color};
-        }}
-        .slide-container {{
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-            align-items: center;
-            height: 100vh;
-            padding: 20px;
-        }}
-        .slide-title {{
-            color: {keyword_color};
-            font-size: {title_font_size};
-            margin-bottom: 15px;
-            font-weight: bolder;
-        }}
-        .slide-content {{
-            background-color: {text_bg_color};
-            padding: 40px;
-            border-radius: 12px;
-            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.15);
-            color: {text_color};
-            max-width: 1000px; /* Adjusted width for a balanced look */
-            width: 90%;
-        }}
-        .text-content {{
-            width: 100%;
-        }}
-        .text-content p {{
-            margin-bottom: 18px;
-            font-size: {para_font_size};
-            line-height: 1.7;
-        }}
-        .text-content ul {{
-            list-style: none;
-            padding: 0;
-        }}
-        .text-content li {{
-            margin-top: 14px;
-            font-size: {para_font_size};
-        }}
-        .keyword {{
-            color: {keyword_color};
-            font-weight: bold;
-        }}
-        @media (max-width: 768px) {{
-            .slide-content {{
-                width: 100%;
-                padding: 20px;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="slide-container">
-        <div class="slide-title">{slide_title}</div>
-        <div class="slide-content">
-            <div class="text-content">
-                <p>{content_paragraph}</p>
-                <ul>
-                    {list_html}
-                </ul>
-            </div>
-        </div>
-    </div>
-</body>
-</html>"""
-
-    return html_code
-
-
-
-def generate_body_slide2(
-    title="Slide Header",
-    header_text="Key Insights",
-    header_font_size="42px",
-    background_color="#E8F5E9",
-    text_color="#004D40",
-    content_bg_color="#FFFFFF",
-    content_shadow="0 6px 12px rgba(0, 0, 0, 0.1)",
-    header_color="#00251A",
-    text_body_color="#00695C",
-    highlight_color="#FF4500",
-    font_family="Roboto, Arial, sans-serif",
-    paragraph_text="This is a customizable slide content area. You can add any relevant information here",
-    para_font_size="24px"
-):
-    """
-    Generate a professional HTML slide body for various presentation topics.
-
-    :param title: The title of the HTML document.
-    :param header_text: The main header of the slide.
-    :param background_color: The background color of the entire slide.
-    :param text_color: The default text color.
-    :param content_bg_color: Background color for the content box.
-    :param content_shadow: Box shadow for the content container.
-    :param header_color: Color of the header text.
-    :param text_body_color: Color of the body text.
-    :param highlight_color: Color for highlighted text.
-    :param font_family: The font family to use for all text.
-    :param paragraph_text: The content paragraph.
-    :param para_font_size: Font size of the paragraph text.
-    :return: A string containing the HTML code.
-    """
-
-    html_code = f"""<!DOCTYPE html>
-<html lang="en">
-
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <script src="https://polyfill.io/v3/polyfill.min.js?features=es6"></script>
-    <script id="MathJax-script" async src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>
-    <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">
-    <link href="https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body, html {{
-            height: 100%;
-            margin: 0;
-            font-family: {font_family};
-            background-color: {background_color};
-        }}
-
-        .slide-container {{
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            height: 100vh;
-            background-color: {background_color};
-            padding: 20px;
-        }}
-
-        .content-box {{
-            background-color: {content_bg_color};
-            border-radius: 12px;
-            box-shadow: {content_shadow};
-            padding: 40px;
-            color: {text_body_color};
-            width: 90%;
-            max-width: 1000px; 
-            text-align: left;
-        }}
-
-        h1 {{
-            color: {header_color};
-            font-size: {header_font_size};
-            margin-bottom: 20px;
-        }}
-
-        p {{
-            font-size: {para_font_size};
-            line-height: 1.8em;
-        }}
-
-        strong {{
-            color: {highlight_color};
-            font-weight: bold;
-        }}
-
-        @media (max-width: 768px) {{
-            .content-box {{
-                width: 100%;
-                padding: 20px;
-            }}
-        }}
-    </style>
-</head>
-
-<body>
-    <div class="slide-container">
-        <div class="content-box">
-            <h1>{header_text}</h1>
-            <p>{paragraph_text}</p>
-        </div>
-    </div>
-</body>
-
-</html>"""
-
-    return html_code
-
-def generate_body_slide3(
-    title="title",
-    tile_font_size = "42px",
-    subtitle="subtitle",
-    subtitle_font_size = "32px",
-    content_paragraphs=[
-        "Paragraph 1: Present with ease and wow any audience with Canva Presentations. Choose from over a thousand professionally-made templates to fit any objective or topic. Make it your own by customizing it with text and photos.",
-        "Paragraph 2: Present with ease and wow any audience with Canva Presentations. Choose from over a thousand professionally-made templates to fit any objective or topic. Make it your own by customizing it with text and photos."
-    ],
-    left_bg_color="#F3F6FA",
-    right_bg_color="#cdecda",
-    text_color="#333333",
-    title_color="#000000",
-    subtitle_color="#333333",
-    icon_color="#FF9800",
-    corner_icon_color="#3D5AFE",
-    font_family="Roboto, Arial, sans-serif"
-):
-    paragraphs_html = "".join(f"<p>{p}</p>" for p in content_paragraphs)
-
-    html_code = f"""<!DOCTYPE html>
-<html lang=\"en\">
-<head>
-    <meta charset=\"UTF-8\">
-    <meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">
-    <style>
-        body, html {{
-            margin: 0;
-            padding: 0;
-            font-family: {font_family};
-            height: 100vh;
-            width: 100vw;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            background-color: {left_bg_color};
-        }}
-        .slide-container {{
-            display: flex;
-            width: 100vw;
-            height: 100vh;
-            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-            border-radius: 0;
-            overflow: hidden;
-        }}
-        .left-container {{
-            flex: 1;
-            padding: 60px;
-            background-color: {left_bg_color};
-            display: flex;
-            flex-direction: column;
-            justify-content: flex-start;
-            align-items: flex-start;
-        }}
-        .title {{
-            font-size: {tile_font_size};
-            font-weight: bold;
-            color: {title_color};
-            margin-bottom: 20px;
-            align-self: flex-start;
-        }}
-        .subtitle {{
-            font-size: {subtitle_font_size};
-            color: {subtitle_color};
-            align-self: flex-start;
-        }}
-        .right-container {{
-            flex: 2;
-            padding: 40px;
-            background-color: {right_bg_color};
-            color: {text_color};
-            border-radius: 20px;
-            position: relative;
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-            align-items: center;
-        }}
-        .corner-icons {{
-            position: absolute;
-            top: 10px;
-            right: 10px;
-            display: flex;
-            gap: 5px;
-        }}
-        .corner-icons span, .bottom-icons span {{
-            width: 12px;
-            height: 12px;
-            background-color: {corner_icon_color};
-            border-radius: 50%;
-            display: inline-block;
-        }}
-        .bottom-icons {{
-            position: absolute;
-            bottom: 10px;
-            left: 20px;
-            display: flex;
-            gap: 5px;
-        }}
-        .bottom-icons span {{ background-color: {icon_color}; }}
-    </style>
-</head>
-<body>
-    <div class=\"slide-container\">
-        <div class=\"left-container\">
-            <div class=\"title\">{title}</div>
-            <div class=\"subtitle\">{subtitle}</div>
-        </div>
-        <div class=\"right-container\">
-            <div class=\"corner-icons\">
-                <span></span><span></span><span></span>
-            </div>
-            {paragraphs_html}
-            <div class=\"bottom-icons\">
-                <span></span><span></span><span></span>
-            </div>
-        </div>
-    </div>
-</body>
-</html>"""
-    return html_code
-
-
-def generate_body_slide5(
-    title="Title",
-    title_font_size="42px",
-    subtitle1 = "Subtitle1",
-    subtitle2 = "Subtitle2",
-    subtile_font_size="24px",
-    content_1="Lorem ipsum dolor sit amet, consectetur adipiscing elit. Mauris eleifend magna in sem rutrum luctus. Sed ullamcorper diam non venenatis dictum. Integer malesuada molestie mauris at scelerisque. Sed sit amet tempor nulla.",
-    content_2="Lorem ipsum dolor sit amet, consectetur adipiscing elit. Mauris eleifend magna in sem rutrum luctus. Sed ullamcorper diam non venenatis dictum. Integer malesuada molestie mauris at scelerisque. Sed sit amet tempor nulla.",
-    content_font_size="20px",
-    bg_color="#0277BD",  # Màu nền chính
-    title_color="#FFFFFF",  # Màu chữ tiêu đề
-    content_color="#E1F5FE",  # Màu chữ nội dung
-    number_bg_color="#039BE5",  # Màu nền số thứ tự
-    number_text_color="#FFFFFF",  # Màu chữ số thứ tự
-    image_bg_color="#E1F5FE",  # Màu nền khung chứa ảnh
-    image_width="70%",  # Chiều rộng khung chứa ảnh
-    image_height="60%",  # Chiều cao khung chứa ảnh
-    border_radius="10px",  # Độ bo tròn cho các phần tử
-    font_family="Roboto, Arial, sans-serif"  # Font chữ
-):
-    """
-    Generate a professional HTML slide body with customizable parameters.
-    :param title: Tiêu đề của slide.
-    :param content_1: Nội dung phần 01.
-    :param content_2: Nội dung phần 02.
-    :param bg_color: Màu nền chính.
-    :param title_color: Màu chữ tiêu đề.
-    :param content_color: Màu chữ nội dung.
-    :param number_bg_color: Màu nền số thứ tự.
-    :param number_text_color: Màu chữ số thứ tự.
-    :param image_bg_color: Màu nền khung chứa ảnh.
-    :param image_width: Chiều rộng khung chứa ảnh.
-    :param image_height: Chiều cao khung chứa ảnh.
-    :param border_radius: Độ bo tròn cho các phần tử.
-    :param font_family: Font chữ sử dụng.
-    :return: Mã HTML của slide.
-    """
-    html_code = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">
-    <link href=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css\" rel=\"stylesheet\">
-    <style>
-        body, html {{
-            margin: 0;
-            padding: 0;
-            height: 100%;
-            font-family: {font_family};
-            background-color: {bg_color};
-            color: {content_color};
-        }}
-        .container {{
-            display: flex;
-            height: 100vh;
-            overflow: hidden;
-        }}
-        .left-section {{
-            flex: 1;
-            padding: 40px;
-            box-sizing: border-box;
-        }}
-        .title {{
-            font-size: {title_font_size};
-            color: {title_color};
-            margin-bottom: 20px;
-        }}
-        .number {{
-            background-color: {number_bg_color};
-            color: {number_text_color};
-            font-size: {subtile_font_size};
-            padding: 10px 20px;
-            border-radius: {border_radius};
-            margin-bottom: 10px;
-        }}
-        .content {{
-            font-size: {content_font_size};
-            line-height: 1.6;
-            margin-bottom: 20px;
-        }}
-        .right-section {{
-            position: relative;
-            flex: 1;
-            display: flex;
-            align-items: center;
-            justify-content: flex-end;
-        }}
-        .image-container {{
-            width: {image_width};
-            height: {image_height};
-            background-color: {image_bg_color};
-            border-radius: {border_radius};
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }}
-        .bubble {{
-            position: absolute;
-            width: 20px;
-            height: 20px;
-            background-color: #00c6ff;
-            border-radius: 50%;
-            opacity: 0.8;
-        }}
-        .bubble.bubble-1 {{
-            top: 50px;
-            right: 150px;
-        }}
-        .bubble.bubble-2 {{
-            top: 100px;
-            right: 100px;
-        }}
-        .bubble.bubble-3 {{
-            top: 150px;
-            right: 50px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="left-section">
-            <h1 class="title">{title}</h1>
-            <div class="number">{subtitle1}</div>
-            <p class="content">{content_1}</p>
-            <div class="number">{subtitle2}</div>
-            <p class="content">{content_2}</p>
-        </div>
-        <div class="right-section">
-            <div class="image-container">Image</div>
-            <div class="bubble bubble-1"></div>
-            <div class="bubble bubble-2"></div>
-            <div class="bubble bubble-3"></div>
-        </div>
-    </div>
-</body>
-</html>"""
-    return html_code
-
-
-def generate_body_slide6(
-    title="TITLE",
-    sections=None,
-    title_font_size="42px",
-    section_title_font_size="24px",
-    section_content_font_size="20px",
-    title_color="#1a1a1a",
-    title_font_family="Roboto, Arial, sans-serif",
-    subtitle_bg_color="#1a1a1a",
-    subtitle_text_color="#ffffff",
-    box_border_color="#1a1a1a",
-    box_border_radius="12px",
-    box_padding="20px",
-    box_shadow="0 4px 12px rgba(0, 0, 0, 0.15)",
-    font_family="Roboto, Arial, sans-serif",
-    bullet_color="#333",
-):
-    if sections is None:
-        sections = {
-            "SubTitle1": [
-                "Content1",
-                "Content2",
-                "Content3",
-                "Content4",
-            ],
-            "SubTitle2": [
-                "Content5",
-                "Content6",
-                "Content7",
-            ],
-            "SubTitle3": [
-                "Content8",
-                "Content9",
-                "Content10",
-            ],
-        }
-
-    sections_html = "".join(
-        f"""
-        <div class="section">
-            <div class="section-title">{section}</div>
-            <div class="section-content">
-                <ul>
-                    {''.join(f'<li>{point}</li>' for point in points)}
-                </ul>
-            </div>
-        </div>
-        """
-        for section, points in sections.items()
-    )
-
-    html_code = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">
-    <link href=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css\" rel=\"stylesheet\">
-    <style>
-        body {{
-            font-family: {font_family};
-            margin: 0;
-            padding: 0;
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            background-color: #f8f9fa;
-        }}
-        .title {{
-            font-size: {title_font_size};
-            font-family: {title_font_family};
-            font-weight: bold;
-            color: {title_color};
-            text-align: center;
-            margin-top: 40px;
-        }}
-        .divider {{
-            width: 60%;
-            height: 3px;
-            background-color: {title_color};
-            margin: 10px auto 20px;
-            position: relative;
-        }}
-        .dots {{
-            display: flex;
-            justify-content: flex-end;
-            gap: 8px;
-            position: absolute;
-            right: 0;
-            top: -6px;
-        }}
-        .dot {{
-            width: 12px;
-            height: 12px;
-            border-radius: 50%;
-        }}
-        .dot:nth-child(1) {{ background-color: #ff6b6b; }}
-        .dot:nth-child(2) {{ background-color: #ffa502; }}
-        .dot:nth-child(3) {{ background-color: #1e90ff; }}
-        .sections-container {{
-            display: flex;
-            justify-content: center;
-            gap: 20px;
-            flex-wrap: wrap;
-            margin-top: 20px;
-        }}
-        .section {{
-            width: 300px;
-            border: 2px solid {box_border_color};
-            border-radius: {box_border_radius};
-            box-shadow: {box_shadow};
-            overflow: hidden;
-            background: white;
-        }}
-        .section-title {{
-            background-color: {subtitle_bg_color};
-            color: {subtitle_text_color};
-            font-size: {section_title_font_size};
-            font-weight: bold;
-            padding: 12px;
-            text-align: center;
-            border-top-left-radius: {box_border_radius};
-            border-top-right-radius: {box_border_radius};
-        }}
-        .section-content {{
-            padding: {box_padding};
-        }}
-        .section-content ul {{
-            padding-left: 20px;
-            margin: 0;
-        }}
-        .section-content li {{
-            font-size: {section_content_font_size};
-            line-height: 1.6;
-            color: {bullet_color};
-            list-style-type: disc;
-        }}
-    </style>
-</head>
-<body>
-    <div class="title">{title}</div>
-    <div class="divider">
-        <div class="dots">
-            <div class="dot"></div>
-            <div class="dot"></div>
-            <div class="dot"></div>
-        </div>
-    </div>
-    <div class="sections-container">
-        {sections_html}
-    </div>
-</body>
-</html>"""
-
-    return html_code
-
-def generate_body_slide7(
-    title="Title",
-    content="Lorem ipsum dolor sit amet, consectetur adipiscing elit. Duis vel dolor ante. Nullam feugiat egestas elit et vehicula. Proin venenatis, orci nec cursus tristique, nulla risus mattis eros, id accumsan massa elit eu augue. Mauris massa ipsum, pharetra id nibh eget, sodales facilisis enim.",
-    title_font_size="42px",
-    content_font_size="24px",
-    bg_color="#FFFBEB",
-    title_color="#000000",
-    content_color="#333333",
-    corner_decoration_color="#FDE68A",
-    font_family="Roboto, Arial, sans-serif"
-):
-    html_code = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">
-    <link href=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css\" rel=\"stylesheet\">
-    <style>
-        html, body {{
-            margin: 0;
-            padding: 0;
-            height: 100%;
-            width: 100%;
-            overflow: hidden;
-        }}
-        body {{
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            background-color: {bg_color};
-            font-family: {font_family};
-        }}
-        .slide-container {{
-            position: relative;
-            width: 100vw;
-            height: 100vh;
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-            align-items: center;
-            padding: 0 10%;
-            box-sizing: border-box;
-            background-color: white;
-        }}
-        .corner-decoration {{
-            position: absolute;
-            width: 200px;
-            height: 200px;
-            background-color: {corner_decoration_color};
-            opacity: 0.3;
-            z-index: 1;
-        }}
-        .top-left {{
-            top: 0;
-            left: 0;
-            border-radius: 0 0 100% 0;
-        }}
-        .bottom-right {{
-            bottom: 0;
-            right: 0;
-            border-radius: 100% 0 0 0;
-        }}
-        .title {{
-            font-size: {title_font_size};
-            text-align: center;
-            color: {title_color};
-            margin-bottom: 30px;
-            font-weight: bold;
-            letter-spacing: 4px;
-            z-index: 2;
-            position: relative;
-            top: -50px;
-        }}
-        .content {{
-            font-size: {content_font_size};
-            color: {content_color};
-            line-height: 1.8;
-            max-width: 1000px;
-            padding: 0 30px;
-            z-index: 2;
-        }}
-    </style>
-</head>
-<body>
-    <div class="slide-container">
-        <div class="corner-decoration top-left"></div>
-        <div class="corner-decoration bottom-right"></div>
-        <h1 class="title">{title}</h1>
-        <p class="content">{content}</p>
-    </div>
-</body>
-</html>"""
-    return html_code
-
-def generate_body_slide7(
-    title="Title",
-    content="Lorem ipsum dolor sit amet, consectetur adipiscing elit. Duis vel dolor ante. Nullam feugiat egestas elit et vehicula. Proin venenatis, orci nec cursus tristique, nulla risus mattis eros, id accumsan massa elit eu augue. Mauris massa ipsum, pharetra id nibh eget, sodales facilisis enim.",
-    title_font_size="42px",
-    content_font_size="24px",
-    bg_color="#FFFBEB",
-    title_color="#000000",
-    content_color="#333333",
-    corner_decoration_color="#FDE68A",
-    font_family="Roboto, Arial, sans-serif"
-):
-    html_code = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">
-    <link href=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css\" rel=\"stylesheet\">
-    <style>
-        html, body {{
-            margin: 0;
-            padding: 0;
-            height: 100%;
-            width: 100%;
-            overflow: hidden;
-        }}
-        body {{
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            background-color: {bg_color};
-            font-family: {font_family};
-        }}
-        .slide-container {{
-            position: relative;
-            width: 100vw;
-            height: 100vh;
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-            align-items: center;
-            padding: 0 10%;
-            box-sizing: border-box;
-            background-color: white;
-        }}
-        .corner-decoration {{
-            position: absolute;
-            width: 200px;
-            height: 200px;
-            background-color: {corner_decoration_color};
-            opacity: 0.3;
-            z-index: 1;
-        }}
-        .top-left {{
-            top: 0;
-            left: 0;
-            border-radius: 0 0 100% 0;
-        }}
-        .bottom-right {{
-            bottom: 0;
-            right: 0;
-            border-radius: 100% 0 0 0;
-        }}
-        .title {{
-            font-size: {title_font_size};
-            text-align: center;
-            color: {title_color};
-            margin-bottom: 30px;
-            font-weight: bold;
-            letter-spacing: 4px;
-            z-index: 2;
-            position: relative;
-            top: -50px;
-        }}
-        .content {{
-            font-size: {content_font_size};
-            color: {content_color};
-            line-height: 1.8;
-            max-width: 1000px;
-            padding: 0 30px;
-            z-index: 2;
-        }}
-    </style>
-</head>
-<body>
-    <div class="slide-container">
-        <div class="corner-decoration top-left"></div>
-        <div class="corner-decoration bottom-right"></div>
-        <h1 class="title">{title}</h1>
-        <p class="content">{content}</p>
-    </div>
-</body>
-</html>"""
-    return html_code
-    
-def generate_body_slide8(
-    title="DISCUSSION",
-    points=[
-        "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Duis vel dolor ante.",
-        "Nullam feugiat egestas elit et vehicula. Proin venenatis, orci nec cursus tristique."
-    ],
-    title_font_size="42px",
-    content_font_size="24px",
-    bg_color="#FFFBEB",
-    title_color="#000000",
-    content_color="#333333",
-    corner_decoration_color="#FDE68A",
-    font_family="Roboto, Arial, sans-serif"
-):
-    # Xử lý danh sách các điểm
-    points_html = "".join(f"<li>{point}</li>" for point in points)
-
-    html_code = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">
-    <link href=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css\" rel=\"stylesheet\">
-    <style>
-        html, body {{
-            margin: 0;
-            padding: 0;
-            height: 100%;
-            width: 100%;
-            overflow: hidden;
-        }}
-        body {{
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            background-color: {bg_color};
-            font-family: {font_family};
-        }}
-        .slide-container {{
-            position: relative;
-            width: 100vw;
-            height: 100vh;
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-            align-items: center;
-            padding: 0 10%;
-            box-sizing: border-box;
-            background-color: white;
-        }}
-        .corner-decoration {{
-            position: absolute;
-            width: 200px;
-            height: 200px;
-            background-color: {corner_decoration_color};
-            opacity: 0.3;
-            z-index: 1;
-        }}
-        .top-left {{
-            top: 0;
-            left: 0;
-            border-radius: 0 0 100% 0;
-        }}
-        .bottom-right {{
-            bottom: 0;
-            right: 0;
-            border-radius: 100% 0 0 0;
-        }}
-        .title {{
-            font-size: {title_font_size};
-            text-align: center;
-            color: {title_color};
-            margin-bottom: 30px;
-            font-weight: bold;
-            letter-spacing: 4px;
-            z-index: 2;
-            position: relative;
-            top: -50px;
-        }}
-        .content {{
-            font-size: {content_font_size};
-            color: {content_color};
-            line-height: 1.8;
-            max-width: 1000px;
-            padding: 0 30px;
-            z-index: 2;
-        }}
-        /* List styling */
-        ul {{
-            list-style-type: disc;
-            padding-left: 40px;
-            margin: 0;
-        }}
-        li {{
-            margin-bottom: 10px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="slide-container">
-        <div class="corner-decoration top-left"></div>
-        <div class="corner-decoration bottom-right"></div>
-        <h1 class="title">{title}</h1>
-        <div class="content">
-            <ul>
-                {points_html}
-            </ul>
-        </div>
-    </div>
-</body>
-</html>"""
-    return html_code
-
-def generate_conclusion_slide(
-    # Title parameters
-    title="Conclusion",
-    title_color='#0F4662',
-    title_font_size="32px",
-    title_font_style="italic",
-    title_margin_bottom="5px",
-    title_margin_left="40px",
-
-    # Content parameters
-    content_text="Content",
-    content_color="#0F4662",
-    content_font_size="16px",
-    content_line_height="1.6",
-    content_width="70%",
-    content_margin="0 auto",
-    content_text_align="center",
-
-    # Decoration parameters
-    dot_color="#0F4662",
-    dot_size="10px",
-    dot_margin="0 5px",
-    dot_count=5,
-    line_color="#1a3d5c",
-    line_width="50%",
-    line_height="2px",
-    line_margin="30px auto",
-
-    # Slide parameters
-    slide_bg_color="#f5f5f5",
-    font_family="Roboto, Arial, sans-serif",
-    additional_css=""
-):
-    """
-    Generates a customizable HTML slide with a 'Conclusion' layout featuring dots and lines as decorations.
-
-    Args:
-        title: Slide title text
-        title_color: Color of the title
-        title_font_size: Font size of title
-        title_font_style: Font style for title (e.g., "italic")
-        title_margin_bottom: Bottom margin for title
-        title_margin_left: Left margin for title
-
-        content_text: Main content text
-        content_color: Color of content text
-        content_font_size: Font size of content
-        content_line_height: Line height for content
-        content_width: Width of content container
-        content_margin: Margin around content
-        content_text_align: Text alignment for content
-
-        dot_color: Color of decorative dots
-        dot_size: Size of decorative dots
-        dot_margin: Margin between dots
-        dot_count: Number of dots in each row
-        line_color: Color of horizontal lines
-        line_width: Width of horizontal lines
-        line_height: Height/thickness of horizontal lines
-        line_margin: Margin around horizontal lines
-
-        slide_bg_color: Background color of the slide
-        font_family: Font family for all text
-        additional_css: Additional CSS styles
-    """
-
-    # Generate dots HTML
-    dots_html = ""
-    for _ in range(dot_count):
-        dots_html += f'<span class="dot"></span>'
-
-    html_code = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body, html {{
-            margin: 0;
-            padding: 0;
-            height: 100%;
-            font-family: {font_family};
-            background-color: {slide_bg_color};
-        }}
-        .slide-container {{
-            display: flex;
-            flex-direction: column;
-            height: 100vh;
-            padding: 40px;
-            box-sizing: border-box;
-        }}
-        .title {{
-            font-size: {title_font_size};
-            color: {title_color};
-            font-style: {title_font_style};
-            margin-bottom: {title_margin_bottom};
-            margin-left: {title_margin_left};
-        }}
-        .content-container {{
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            justify-content: center;
-            flex: 1;
-        }}
-        .content {{
-            color: {content_color};
-            font-size: {content_font_size};
-            line-height: {content_line_height};
-            width: {content_width};
-            margin: {content_margin};
-            text-align: {content_text_align};
-        }}
-        .horizontal-line {{
-            width: {line_width};
-            height: {line_height};
-            background-color: {line_color};
-            margin: {line_margin};
-        }}
-        .dots-container {{
-            display: flex;
-            justify-content: center;
-            margin: 10px 0;
-        }}
-        .dot {{
-            display: inline-block;
-            width: {dot_size};
-            height: {dot_size};
-            border-radius: 50%;
-            background-color: {dot_color};
-            margin: {dot_margin};
-        }}
-        {additional_css}
-    </style>
-</head>
-<body>
-    <div class="slide-container">
-        <div class="title">{title}</div>
-
-        <div class="content-container">
-            <div class="dots-container">
-                {dots_html}
-            </div>
-
-            <div class="horizontal-line"></div>
-
-            <div class="content">
-                {content_text}
-            </div>
-
-            <div class="horizontal-line"></div>
-
-            <div class="dots-container">
-                {dots_html}
-            </div>
-        </div>
-    </div>
-</body>
-</html>"""
-
-    return html_code
+vlm_model = None
+vlm_processor = None
+if LOAD_MODELS and not REMOTE_INFERENCE:
+    try:
+        vlm_model = Qwen2_5_VLForConditionalGeneration.from_pretrained(
+            vlm_model_name,
+            torch_dtype=torch.bfloat16,
+            # quantization_config=quantization_config,  # Cấu hình quantization
+            max_memory={0: "6GB"},
+            attn_implementation="flash_attention_2",
+            device_map="auto",
+        )
+        vlm_processor = AutoProcessor.from_pretrained(vlm_model_name, use_fast=True)
+        vlm_processor.tokenizer.padding_side = "left"
+        logger.info("Qwen2.5-VL-7B-Instruct loaded successfully.")
+    except Exception as e:
+        logger.error(f"Error loading Qwen2.5-VL-7B-Instruct: {e}")
+        vlm_model = None
+        vlm_processor = None
+
+# Các hàm tạo HTML slide (template đã biên dịch sẵn trong slide_templates.py),
+# mỗi hàm tự đăng ký vào tool_registry khi import
+from tool_registry import get_tool, prompt_prefix, tools_digest
+from text_fit import fit_arguments
+from slide_templates import (
+    generate_intro_slide,
+    generate_body_slide1,
+    generate_body_slide2,
+    generate_body_slide3,
+    generate_body_slide5,
+    generate_body_slide6,
+    generate_body_slide7,
+    generate_body_slide8,
+    generate_conclusion_slide,
+)
 
 def get_function_by_name(name):
-    if name == "generate_intro_slide":
-        return generate_intro_slide
-    elif name == "generate_body_slide1":
-        return generate_body_slide1
-    elif name == "generate_body_slide2":
-        return generate_body_slide2
-    elif name == "generate_body_slide3":
-        return generate_body_slide3
-    elif name == "generate_body_slide6":
-        return generate_body_slide6
-    elif name == "generate_body_slide7":
-        return generate_body_slide7
-    elif name == "generate_body_slide8":
-        return generate_body_slide8
-    elif name == "generate_conclusion_slide":
-        return generate_conclusion_slide
-    else:
-        raise ValueError(f"Function with name '{name}' not found.")
-
-
-
-
-TOOLS = [
-    {
-        "type": "function",
-        "function": {
-            "name": "generate_intro_slide",
-            "description": "Generates a customizable HTML slide with an introduction layout featuring dots and lines as decorations.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "title": {"type": "string", "default": "Introduction", "description": "Slide title text"},
-                    "title_color": {"type": "string", "default": "#0F4662", "description": "Color of the title"},
-                    "title_font_size": {"type": "string", "default": "42px", "description": "Font size of the title"},
-                    "title_font_style": {"type": "string", "default": "italic", "description": "Font style for the title (e.g., 'italic')"},
-                    "title_margin_bottom": {"type": "string", "default": "5px", "description": "Bottom margin for the title"},
-                    "title_margin_left": {"type": "string", "default": "40px", "description": "Left margin for the title"},
-                    "content_text": {"type": "string", "default": "Content", "description": "Main content text"},
-                    "content_color": {"type": "string", "default": "#0F4662", "description": "Color of content text"},
-                    "content_font_size": {"type": "string", "default": "24px", "description": "Font size of content"},
-                    "content_line_height": {"type": "string", "default": "1.6", "description": "Line height for content"},
-                    "content_width": {"type": "string", "default": "70%", "description": "Width of content container"},
-                    "content_margin": {"type": "string", "default": "0 auto", "description": "Margin around content"},
-                    "content_text_align": {"type": "string", "default": "center", "description": "Text alignment for content"},
-                    "dot_color": {"type": "string", "default": "#0F4662", "description": "Color of decorative dots"},
-                    "dot_size": {"type": "string", "default": "10px", "description": "Size of decorative dots"},
-                    "dot_margin": {"type": "string", "default": "0 5px", "description": "Margin between dots"},
-                    "dot_count": {"type": "integer", "default": 5, "description": "Number of dots in each row"},
-                    "line_color": {"type": "string", "default": "#1a3d5c", "description": "Color of horizontal lines"},
-                    "line_width": {"type": "string", "default": "50%", "description": "Width of horizontal lines"},
-                    "line_height": {"type": "string", "default": "2px", "description": "Height/thickness of horizontal lines"},
-                    "line_margin": {"type": "string", "default": "30px auto", "description": "Margin around horizontal lines"},
-                    "slide_bg_color": {"type": "string", "default": "#f5f5f5", "description": "Background color of the slide"},
-                    "font_family": {"type": "string", "default": "Roboto, Arial, sans-serif", "description": "Font family for all text"},
-                    "additional_css": {"type": "string", "default": "", "description": "Additional CSS styles"}
-                },
-                "required": []
-            }
-        }
-    },
-   {
-  "type": "function",
-  "function": {
-    "name": "generate_body_slide1",
-    "description": "Generate a professional HTML slide body with a centered content frame, featuring a slide title, a paragraph, and a list of bullet points. The slide is designed for presenting structured textual information in a clean and balanced manner, with customizable colors, fonts, and shadow effects. Ideal for focused presentation slides.",
-    "parameters": {
-      "title": {
-        "type": "string",
-        "default": "Professional HTML Slide",
-        "description": "The title of the HTML document, displayed in the browser tab."
-      },
-      "title_font_size": {
-        "type": "string",
-        "default": "42px",
-        "description": "Font size of the slide title displayed at the top of the slide."
-      },
-      "slide_title": {
-        "type": "string",
-        "default": "Slide Title",
-        "description": "The main title displayed at the top of the slide, above the content frame."
-      },
-      "bg_color": {
-        "type": "string",
-        "default": "#E8F5E9",
-        "description": "Background color of the entire slide."
-      },
-      "text_bg_color": {
-        "type": "string",
-        "default": "#FFFFFF",
-        "description": "Background color of the content frame."
-      },
-      "text_color": {
-        "type": "string",
-        "default": "#2E7D32",
-        "description": "Text color of the paragraph and list items in the content frame."
-      },
-      "keyword_color": {
-        "type": "string",
-        "default": "#1B5E20",
-        "description": "Color for keywords (used for the slide title and within <span class=\"keyword\"> tags in list items)."
-      },
-      "font_family": {
-        "type": "string",
-        "default": "Roboto, Arial, sans-serif",
-        "description": "Font family for all text in the slide."
-      },
-      "content_paragraph": {
-        "type": "string",
-        "default": "This is a customizable slide. Add your content here:",
-        "description": "The main paragraph text displayed above the list in the content frame."
-      },
-      "para_font_size": {
-        "type": "string",
-        "default": "24px",
-        "description": "Font size of the paragraph and list items."
-      },
-      "list_items": {
-        "type": "list",
-        "default": [
-          "<span class=\"keyword\">Point 1</span>: Description of point 1.",
-          "<span class=\"keyword\">Point 2</span>: Description of point 2.",
-          "<span class=\"keyword\">Point 3</span>: Description of point 3.",
-          "<span class=\"keyword\">Point 4</span>: Description of point 4."
-        ],
-        "description": "A list of bullet points to include in the content frame. Each item can include HTML tags like <span class=\"keyword\"> for styling keywords. If not provided, defaults to four sample bullet points."
-      }
-    }
-  }
-},
-    {
-  "type": "function",
-  "function": {
-    "name": "generate_body_slide2",
-    "description": "Generate a professional HTML slide body with a centered content frame, featuring a main header and a paragraph. The slide is designed for presenting textual information in a clean and balanced manner, with a customizable background, text colors, and shadow effects. Ideal for simple, focused presentation slides.",
-    "parameters": {
-      "title": {
-        "type": "string",
-        "default": "Slide Header",
-        "description": "The title of the HTML document, displayed in the browser tab."
-      },
-      "header_text": {
-        "type": "string",
-        "default": "Key Insights",
-        "description": "The main header text of the slide, displayed at the top of the content frame."
-      },
-      "header_font_size": {
-        "type": "string",
-        "default": "42px",
-        "description": "Font size of the main header text."
-      },
-      "background_color": {
-        "type": "string",
-        "default": "#E8F5E9",
-        "description": "Background color of the entire slide."
-      },
-      "text_color": {
-        "type": "string",
-        "default": "#004D40",
-        "description": "Default text color for the slide (not currently used in styling but reserved for future use)."
-      },
-      "content_bg_color": {
-        "type": "string",
-        "default": "#FFFFFF",
-        "description": "Background color of the content frame."
-      },
-      "content_shadow": {
-        "type": "string",
-        "default": "0 6px 12px rgba(0, 0, 0, 0.1)",
-        "description": "Box shadow effect applied to the content frame for a 3D appearance."
-      },
-      "header_color": {
-        "type": "string",
-        "default": "#00251A",
-        "description": "Color of the main header text."
-      },
-      "text_body_color": {
-        "type": "string",
-        "default": "#00695C",
-        "description": "Color of the paragraph text in the content frame."
-      },
-      "highlight_color": {
-        "type": "string",
-        "default": "#FF4500",
-        "description": "Color for highlighted text (used for <strong> tags)."
-      },
-      "font_family": {
-        "type": "string",
-        "default": "Roboto, Arial, sans-serif",
-        "description": "Font family for all text in the slide."
-      },
-      "paragraph_text": {
-        "type": "string",
-        "default": "This is a customizable slide content area. You can add any relevant information here",
-        "description": "The paragraph text displayed below the header in the content frame."
-      },
-      "para_font_size": {
-        "type": "string",
-        "default": "24px",
-        "description": "Font size of the paragraph text."
-      }
-    }
-  }
-},
-    {
-        "type": "function",
-        "function": {
-            "name": "generate_body_slide3",
-            "description": "Generate a professional HTML slide body with a split layout, including a title, subtitle, and multiple content paragraphs.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "title": {"type": "string", "default": "title", "description": "The main title of the slide"},
-                    "tile_font_size": {"type": "string", "default": "42px", "description": "Font size of the title (Note: parameter name in function is 'tile_font_size', not 'title_font_size')"},
-                    "subtitle": {"type": "string", "default": "subtitle", "description": "The subtitle of the slide"},
-                    "subtitle_font_size": {"type": "string", "default": "32px", "description": "Font size of the subtitle"},
-                    "content_paragraphs": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "default": [
-                            "Paragraph 1: Present with ease and wow any audience with Canva Presentations. Choose from over a thousand professionally-made templates to fit any objective or topic. Make it your own by customizing it with text and photos.",
-                            "Paragraph 2: Present with ease and wow any audience with Canva Presentations. Choose from over a thousand professionally-made templates to fit any objective or topic. Make it your own by customizing it with text and photos."
-                        ],
-                        "description": "A list of paragraphs to display in the right section. It should be contained paragraphs with long content."
-                    },
-                    "left_bg_color": {"type": "string", "default": "#F3F6FA", "description": "Background color of the left section"},
-                    "right_bg_color": {"type": "string", "default": "#0B1320", "description": "Background color of the right section"},
-                    "text_color": {"type": "string", "default": "#FFFFFF", "description": "Text color of the content paragraphs"},
-                    "title_color": {"type": "string", "default": "#000000", "description": "Color of the title"},
-                    "subtitle_color": {"type": "string", "default": "#333333", "description": "Color of the subtitle"},
-                    "icon_color": {"type": "string", "default": "#FF9800", "description": "Color of the bottom decorative icons"},
-                    "corner_icon_color": {"type": "string", "default": "#3D5AFE", "description": "Color of the corner decorative icons"},
-                    "font_family": {"type": "string", "default": "Roboto, Arial, sans-serif", "description": "Font family for the slide content"}
-                },
-                "required": []
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "generate_body_slide5",
-            "description": "Generate a structured HTML slide with two content sections and an image placeholder.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "title": {"type": "string", "default": "Title", "description": "The main title of the slide"},
-                    "title_font_size": {"type": "string", "default": "42px", "description": "Font size of the title"},
-                    "subtitle1": {"type": "string", "default": "Subtitle1", "description": "Subtitle for the first content section"},
-                    "subtitle2": {"type": "string", "default": "Subtitle2", "description": "Subtitle for the second content section"},
-                    "subtile_font_size": {"type": "string", "default": "24px", "description": "Font size of the subtitles (Note: parameter name in function is 'subtile_font_size', not 'subtitle_font_size')"},
-                    "content_1": {"type": "string", "default": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Mauris eleifend magna in sem rutrum luctus. Sed ullamcorper diam non venenatis dictum. Integer malesuada molestie mauris at scelerisque. Sed sit amet tempor nulla.", "description": "The content for the first section"},
-                    "content_2": {"type": "string", "default": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Mauris eleifend magna in sem rutrum luctus. Sed ullamcorper diam non venenatis dictum. Integer malesuada molestie mauris at scelerisque. Sed sit amet tempor nulla.", "description": "The content for the second section"},
-                    "content_font_size": {"type": "string", "default": "20px", "description": "Font size of the content text"},
-                    "bg_color": {"type": "string", "default": "#0277BD", "description": "The main background color of the slide"},
-                    "title_color": {"type": "string", "default": "#FFFFFF", "description": "The text color of the title"},
-                    "content_color": {"type": "string", "default": "#E1F5FE", "description": "The text color of the content sections"},
-                    "number_bg_color": {"type": "string", "default": "#039BE5", "description": "The background color of the numbered elements"},
-                    "number_text_color": {"type": "string", "default": "#FFFFFF", "description": "The text color of the numbered elements"},
-                    "image_bg_color": {"type": "string", "default": "#E1F5FE", "description": "The background color of the image container"},
-                    "image_width": {"type": "string", "default": "70%", "description": "The width of the image container"},
-                    "image_height": {"type": "string", "default": "60%", "description": "The height of the image container"},
-                    "border_radius": {"type": "string", "default": "10px", "description": "The border radius applied to various elements"},
-                    "font_family": {"type": "string", "default": "Roboto, Arial, sans-serif", "description": "The font family used for the slide content"}
-                },
-                "required": []
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "generate_body_slide6",
-            "description": "Generate a professional HTML slide body with a main title and multiple sections, each containing a subtitle and a list of bullet points.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "title": {"type": "string", "default": "TITLE", "description": "The main title of the slide"},
-                    "sections": {
-                        "type": "object",
-                        "default": {
-                            "SubTitle1": ["Content1", "Content2", "Content3", "Content4"],
-                            "SubTitle2": ["Content5", "Content6", "Content7"],
-                            "SubTitle3": ["Content8", "Content9", "Content10"]
-                        },
-                        "description": "A dictionary where keys are section subtitles and values are lists of bullet points for each section. Limited to a maximum of 4 subtitles. The total word count of all bullet points per subtitle must not exceed 50 words. If not provided, defaults to three sections with sample content."
-                    },
-                    "title_font_size": {"type": "string", "default": "42px", "description": "Font size of the main title"},
-                    "section_title_font_size": {"type": "string", "default": "24px", "description": "Font size of the section subtitles"},
-                    "section_content_font_size": {"type": "string", "default": "20px", "description": "Font size of the bullet point content"},
-                    "title_color": {"type": "string", "default": "#1a1a1a", "description": "Color of the main title and the divider line"},
-                    "title_font_family": {"type": "string", "default": "Roboto, Arial, sans-serif", "description": "Font family for the main title"},
-                    "subtitle_bg_color": {"type": "string", "default": "#1a1a1a", "description": "Background color of the section subtitles"},
-                    "subtitle_text_color": {"type": "string", "default": "#ffffff", "description": "Text color of the section subtitles"},
-                    "box_border_color": {"type": "string", "default": "#1a1a1a", "description": "Color of the border around each section box"},
-                    "box_border_radius": {"type": "string", "default": "12px", "description": "Border radius for the section boxes"},
-                    "box_padding": {"type": "string", "default": "20px", "description": "Padding inside each section box"},
-                    "box_shadow": {"type": "string", "default": "0 4px 12px rgba(0, 0, 0, 0.15)", "description": "Box shadow effect for each section box"},
-                    "font_family": {"type": "string", "default": "Roboto, Arial, sans-serif", "description": "Font family for the overall slide content"},
-                    "bullet_color": {"type": "string", "default": "#333", "description": "Color of the bullet point text"}
-                },
-                "required": []
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "generate_body_slide7",
-            "description": "Generate a professional HTML slide body with a centered title and a paragraph of content, enhanced with decorative semi-transparent circular corners.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "title": {"type": "string", "default": "Title", "description": "The main title of the slide"},
-                    "content": {"type": "string", "default": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Duis vel dolor ante. Nullam feugiat egestas elit et vehicula. Proin venenatis, orci nec cursus tristique, nulla risus mattis eros, id accumsan massa elit eu augue. Mauris massa ipsum, pharetra id nibh eget, sodales facilisis enim.", "description": "The main content paragraph"},
-                    "title_font_size": {"type": "string", "default": "42px", "description": "Font size of the main title"},
-                    "content_font_size": {"type": "string", "default": "24px", "description": "Font size of the content paragraph"},
-                    "bg_color": {"type": "string", "default": "#FFFBEB", "description": "Background color of the entire slide body"},
-                    "title_color": {"type": "string", "default": "#000000", "description": "Color of the main title text"},
-                    "content_color": {"type": "string", "default": "#333333", "description": "Color of the content paragraph text"},
-                    "corner_decoration_color": {"type": "string", "default": "#FDE68A", "description": "Color of the semi-transparent circular decorations in the corners"},
-                    "font_family": {"type": "string", "default": "Roboto, Arial, sans-serif", "description": "Font family for both title and content"}
-                },
-                "required": []
-            }
-        }
-    },
-    
-    {
-        "type": "function",
-        "function": {
-            "name": "generate_body_slide8",
-            "description": "Generate a professional HTML slide body with a centered title and a list of bullet points, enhanced with decorative semi-transparent circular corners.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "title": {"type": "string", "default": "DISCUSSION", "description": "The main title of the slide"},
-                    "points": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "default": [
-                            "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Duis vel dolor ante.",
-                            "Nullam feugiat egestas elit et vehicula. Proin venenatis, orci nec cursus tristique."
-                        ],
-                        "description": "A list of bullet points to be displayed"
-                    },
-                    "title_font_size": {"type": "string", "default": "42px", "description": "Font size of the main title"},
-                    "content_font_size": {"type": "string", "default": "24px", "description": "Font size of the bullet point text"},
-                    "bg_color": {"type": "string", "default": "#FFFBEB", "description": "Background color of the entire slide body"},
-                    "title_color": {"type": "string", "default": "#000000", "description": "Color of the main title text"},
-                    "content_color": {"type": "string", "default": "#333333", "description": "Color of the bullet point text"},
-                    "corner_decoration_color": {"type": "string", "default": "#FDE68A", "description": "Color of the semi-transparent circular decorations in the corners"},
-                    "font_family": {"type": "string", "default": "Roboto, Arial, sans-serif", "description": "Font family for both title and content"}
-                },
-                "required": []
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "generate_conclusion_slide",
-            "description": "Generates a customizable HTML slide with a 'Conclusion' layout featuring dots and lines as decorations.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "title": {"type": "string", "default": "Conclusion", "description": "Slide title text"},
-                    "title_color": {"type": "string", "default": "#0F4662", "description": "Color of the title"},
-                    "title_font_size": {"type": "string", "default": "32px", "description": "Font size of the title"},
-                    "title_font_style": {"type": "string", "default": "italic", "description": "Font style for the title (e.g., 'italic')"},
-                    "title_margin_bottom": {"type": "string", "default": "5px", "description": "Bottom margin for the title"},
-                    "title_margin_left": {"type": "string", "default": "40px", "description": "Left margin for the title"},
-                    "content_text": {"type": "string", "default": "Content", "description": "Main content text"},
-                    "content_color": {"type": "string", "default": "#0F4662", "description": "Color of content text"},
-                    "content_font_size": {"type": "string", "default": "16px", "description": "Font size of content"},
-                    "content_line_height": {"type": "string", "default": "1.6", "description": "Line height for content"},
-                    "content_width": {"type": "string", "default": "70%", "description": "Width of content container"},
-                    "content_margin": {"type": "string", "default": "0 auto", "description": "Margin around content"},
-                    "content_text_align": {"type": "string", "default": "center", "description": "Text alignment for content"},
-                    "dot_color": {"type": "string", "default": "#0F4662", "description": "Color of decorative dots"},
-                    "dot_size": {"type": "string", "default": "10px", "description": "Size of decorative dots"},
-                    "dot_margin": {"type": "string", "default": "0 5px", "description": "Margin between dots"},
-                    "dot_count": {"type": "integer", "default": 5, "description": "Number of dots in each row"},
-                    "line_color": {"type": "string", "default": "#1a3d5c", "description": "Color of horizontal lines"},
-                    "line_width": {"type": "string", "default": "50%", "description": "Width of horizontal lines"},
-                    "line_height": {"type": "string", "default": "2px", "description": "Height/thickness of horizontal lines"},
-                    "line_margin": {"type": "string", "default": "30px auto", "description": "Margin around horizontal lines"},
-                    "slide_bg_color": {"type": "string", "default": "#f5f5f5", "description": "Background color of the slide"},
-                    "font_family": {"type": "string", "default": "Roboto, Arial, sans-serif", "description": "Font family for all text"},
-                    "additional_css": {"type": "string", "default": "", "description": "Additional CSS styles"}
-                },
-                "required": []
-            }
-        }
-    }
-    
-]
-def extract_text_from_docx(file_path):
-    logger.info(f"Extracting text from {file_path}")
-    doc = Document(file_path)
-    text = [para.text for para in doc.paragraphs if para.text.strip()]
-    return "\n".join(text)
-
-def split_text_into_chunks(text, chunk_size=300, chunk_overlap=50):
-    logger.info("Splitting text into chunks")
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
-    )
-    return text_splitter.split_text(text)
-
-def create_slide_list(chunks):
-    logger.info("Creating slide list")
-    slide_list = []
-    current_slide = ""
-    for section in chunks:
-        section = section.strip()
-        if not section:
-            continue
-        if not current_slide:
-            current_slide = section
-        else:
-            if len(current_slide) + len(section) <= 1000:
-                current_slide += "\n" + section
-            else:
-                slide_list.append(current_slide)
-                current_slide = section
-    if current_slide:
-        slide_list.append(current_slide)
-    return slide_list
+    return get_tool(name).function
 
-def get_html_slide(pre_slide_content, pre_function_call, slide_content):
-    logger.info(f"Generating HTML slide for content: {slide_content[:50]}...")
-    demand_prompt = """
+SLIDE_PROMPT = """
     # slide_content's language
     language = "Vietnamese" if is_vietnamese(slide_content) else "English"
     Create a slide that matches the following content, choose a function when you think it is best suited with the content and the content of the slide should be base on input slide content. If the input text is in language, your output (including all text fields in the function call) MUST also be in language:
@@ -1792,17 +121,42 @@ def get_html_slide(pre_slide_content, pre_function_call, slide_content):
     Current slide content: {}
     Current function call:
     """
-    messages = [
-        {"role": "system", "content": "You are Qwen, created by Alibaba Cloud."},
-        {"role": "user", "content": demand_prompt.format(pre_slide_content, pre_function_call, slide_content)},
-    ]
+
+def get_html_slide(pre_slide_content, pre_function_call, slide_content):
+    logger.info(f"Generating HTML slide for content: {slide_content[:50]}...")
+    if REMOTE_INFERENCE:
+        return inference_client.call("slide_call", pre_slide_content, pre_function_call, slide_content)
+    return generate_slide_calls([(pre_slide_content, pre_function_call, slide_content)])[0]
+
+def generate_slide_calls(requests):
+    """
+    Tool call outputs for a batch of (previous slide content, previous
+    function call, slide content), generated together.
+    """
     if not model or not tokenizer:
         logger.error("Model or tokenizer not loaded")
-        return '<tool_call>\n{"name": "generate_split_layout_slide1", "arguments": {"left_title": "Error", "left_subtitle": "Model not loaded"}}\n</tool_call>'
-    text = tokenizer.apply_chat_template(messages, tools=TOOLS, add_generation_prompt=True, tokenize=False)
-    inputs = tokenizer(text, return_tensors="pt").to(model.device)
-    outputs = model.generate(**inputs, max_new_tokens=512)
-    return tokenizer.batch_decode(outputs)[0][len(text):]
+        return ['<tool_call>\n{"name": "generate_split_layout_slide1", "arguments": {"left_title": "Error", "left_subtitle": "Model not loaded"}}\n</tool_call>'] * len(requests)
+    # System message + schema của các tool giống nhau cho mọi slide: chỉ tokenize một lần
+    prefix = prompt_prefix(tokenizer, SYSTEM_PROMPT)
+    prompts = [prefix.encode(tokenizer, SLIDE_PROMPT.format(*request)) for request in requests]
+    pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+    if len(prompts) == 1:
+        input_ids = torch.tensor(prompts, device=model.device)
+        attention_mask = torch.ones_like(input_ids)
+    else:
+        # Pad trái để mọi prompt kết thúc cùng vị trí
+        width = max(len(prompt) for prompt in prompts)
+        input_ids = torch.tensor([[pad_id] * (width - len(prompt)) + prompt for prompt in prompts],
+                                 device=model.device)
+        attention_mask = torch.tensor([[0] * (width - len(prompt)) + [1] * len(prompt) for prompt in prompts],
+                                      device=model.device)
+    outputs = model.generate(
+        input_ids=input_ids,
+        attention_mask=attention_mask,
+        max_new_tokens=SLIDE_OUTPUT_TOKENS,
+        pad_token_id=pad_id,
+    )
+    return [tokenizer.decode(output[input_ids.shape[1]:]) for output in outputs]
 
 def try_parse_tool_calls(content: str):
     tool_calls = []
@@ -1842,14 +196,50 @@ def clean_slide_function(slide_function_calling_list):
         fixed_list[i] = check_and_insert_char(fixed_list[i], -20, '/')
     return fixed_list
 
-def process_tool_call(tool_call_output):
-    logger.info(f"Processing tool call: {tool_call_output}")
+def parse_tool_call(tool_call_output):
+    """Return (fn_name, fn_args) with the arguments coerced to the tool's schema."""
     parsed_response = try_parse_tool_calls(tool_call_output)
     if not parsed_response or "tool_calls" not in parsed_response or not parsed_response["tool_calls"]:
         raise ValueError(f"Invalid tool_call_output: {tool_call_output}")
     tool_call = parsed_response["tool_calls"][0]
-    fn_name = tool_call["function"]["name"]
-    fn_args = tool_call["function"]["arguments"]
+    fn_name = tool_call["function"].get("name")
+    spec = get_tool(fn_name)
+    fn_args = spec.coerce_arguments(tool_call["function"].get("arguments"))
+    if TEXT_FIT:
+        fn_args = fit_arguments(spec, fn_args, allow_split=False)[0]
+    return fn_name, fn_args
+
+def format_tool_call(fn_name, fn_args):
+    return "<tool_call>\n" + json.dumps({"name": fn_name, "arguments": fn_args}, ensure_ascii=False) + "\n</tool_call>"
+
+def fit_slide_calls(slide_list, slide_function_calling_list):
+    """
+    Size the text of every tool call before rendering: font sizes are shrunk
+    to fit, and calls whose list content cannot fit are split into several
+    slides (the slide content is repeated for each part).
+    """
+    fitted_slides = []
+    fitted_calls = []
+    for slide_content, tool_call_output in zip(slide_list, slide_function_calling_list):
+        try:
+            fn_name, fn_args = parse_tool_call(tool_call_output)
+            parts = fit_arguments(get_tool(fn_name), fn_args)
+        except Exception as e:
+            # Lỗi parse được xử lý (và thử lại) ở vòng render
+            logger.warning(f"Cannot fit tool call: {e}")
+            parts = None
+        if not parts:
+            fitted_slides.append(slide_content)
+            fitted_calls.append(tool_call_output)
+            continue
+        for part in parts:
+            fitted_slides.append(slide_content)
+            fitted_calls.append(format_tool_call(fn_name, part))
+    return fitted_slides, fitted_calls
+
+def process_tool_call(tool_call_output):
+    logger.info(f"Processing tool call: {tool_call_output}")
+    fn_name, fn_args = parse_tool_call(tool_call_output)
     try:
         return get_function_by_name(fn_name)(**fn_args)
     except Exception as e:
@@ -1873,19 +263,100 @@ def initialize_chromedriver():
         logger.error(f"Error initializing ChromeDriver: {e}")
         return None
 
-def capture_slide_image(driver, html_content, output_path):
-    logger.info(f"Capturing slide image to {output_path}")
-    temp_html_path = "temporal_slide.html"
-    with open(temp_html_path, "w", encoding="utf-8") as file:
-        file.write(html_content)
-    driver.get(f"file://{os.path.abspath(temp_html_path)}")
-    driver.set_window_size(1920, 1080)
-    screenshot_bytes = driver.get_screenshot_as_png()
-    image = Image.open(io.BytesIO(screenshot_bytes))
-    image = image.resize((900, 500))
-    image.save(output_path)
-    os.remove(temp_html_path)
-    return image
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+media_store = MediaStore()
+
+SYSTEM_PROMPT = "You are Qwen, created by Alibaba Cloud."
+# Đếm token (có cache) cho việc chia nội dung slide; ước lượng theo byte khi chưa tải tokenizer
+token_counter = TokenCounter(tokenizer)
+# Ước lượng chữ có vừa slide không (font metric) trước khi render
+TEXT_FIT = os.environ.get("SLIDEGEN_TEXT_FIT", "1") == "1"
+
+# "shared": slide chỉ chứa markup + biến theme, CSS template nằm trong css/;
+# "standalone": mỗi slide là một trang HTML đầy đủ như trước
+DECK_FORMAT = os.environ.get("SLIDEGEN_DECK_FORMAT", "shared")
+
+# Kích thước viewport khi render và ảnh slide đầu ra (giữ tỉ lệ 16:9)
+SLIDE_VIEWPORT = (1920, 1080)
+SLIDE_IMAGE_WIDTH = int(os.environ.get("SLIDEGEN_IMAGE_WIDTH", 900))
+# png, webp hoặc jpeg; quality chỉ áp dụng cho webp/jpeg
+SLIDE_IMAGE_FORMAT = os.environ.get("SLIDEGEN_IMAGE_FORMAT", "png")
+SLIDE_IMAGE_QUALITY = int(os.environ.get("SLIDEGEN_IMAGE_QUALITY", 90))
+IMAGE_EXTENSIONS = {"png": "png", "webp": "webp", "jpeg": "jpg"}
+# Thời gian tối đa chờ web font (Google Fonts/CDN) tải xong trước khi chụp
+FONT_WAIT_SECONDS = int(os.environ.get("SLIDEGEN_FONT_WAIT_SECONDS", 10))
+
+
+def wait_for_fonts(driver, timeout=FONT_WAIT_SECONDS):
+    """Wait for document.fonts.ready; False when it did not resolve in time."""
+    try:
+        driver.set_script_timeout(timeout)
+        return driver.execute_async_script(
+            "const done = arguments[arguments.length - 1];"
+            "document.fonts.ready.then(() => done(true), () => done(false));"
+        ) is True
+    except Exception as e:
+        logger.warning(f"Fonts not ready before capture: {e}")
+        return False
+
+
+def slide_image_size(width=SLIDE_IMAGE_WIDTH):
+    return width, round(width * SLIDE_VIEWPORT[1] / SLIDE_VIEWPORT[0])
+
+
+def capture_slide_image(driver, html_content, output_path=None, width=SLIDE_IMAGE_WIDTH,
+                        image_format=SLIDE_IMAGE_FORMAT, quality=SLIDE_IMAGE_QUALITY, decode=True):
+    """
+    Render html_content and return (image_bytes, image) at the requested width.
+
+    Chrome scales and encodes the screenshot itself through the DevTools clip
+    parameter, so the bytes are final and are only decoded once for the
+    evaluator (skipped with decode=False). driver may be a WebDriver or a
+    callable returning one; it is only touched on a render cache miss.
+    """
+    logger.info(f"Capturing slide image ({width}px {image_format})")
+    if image_format not in IMAGE_EXTENSIONS:
+        raise ValueError(f"Unsupported image format: {image_format}")
+    scale = width / SLIDE_VIEWPORT[0]
+    format_key = image_format if image_format == "png" else f"{image_format}:{quality}"
+    cache_key = make_render_key(html_content, viewport=SLIDE_VIEWPORT, scale=scale, image_format=format_key)
+    image_bytes = render_cache.get(cache_key)
+    if image_bytes is None:
+        if callable(driver):
+            driver = driver()
+        # File tạm riêng cho mỗi lần render: nhiều job/worker web render cùng lúc
+        fd, temp_html_path = tempfile.mkstemp(prefix="temporal_slide_", suffix=".html")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            # Slide dùng stylesheet chung trỏ tới /static/..., Chrome mở qua file://
+            file.write(html_content.replace('"/static/', f'"file://{STATIC_DIR}/'))
+        try:
+            driver.set_window_size(*SLIDE_VIEWPORT)
+            driver.get(f"file://{os.path.abspath(temp_html_path)}")
+            # driver.get chờ stylesheet, nhưng font của stylesheet tải sau đó
+            fonts_ready = wait_for_fonts(driver)
+            params = {
+                "format": image_format,
+                "clip": {"x": 0, "y": 0, "width": SLIDE_VIEWPORT[0], "height": SLIDE_VIEWPORT[1], "scale": scale},
+            }
+            if image_format != "png":
+                params["quality"] = quality
+            result = driver.execute_cdp_cmd("Page.captureScreenshot", params)
+            image_bytes = base64.b64decode(result["data"])
+        finally:
+            os.remove(temp_html_path)
+        # Ảnh chụp với font dự phòng không được cache, lần sau chụp lại
+        if fonts_ready:
+            render_cache.put(cache_key, image_bytes)
+    else:
+        logger.info("Render cache hit, skipping Chrome")
+    if output_path:
+        with open(output_path, "wb") as f:
+            f.write(image_bytes)
+    if not decode:
+        return image_bytes, None
+    image = Image.open(io.BytesIO(image_bytes))
+    image.load()
+    return image_bytes, image
 
 def filter_invalid_slides(html_content):
     invalid_html = "<html><body><h1>Lỗi tạo slide</h1></body></html>"
@@ -1900,14 +371,19 @@ criteria = """
 6. If there is a previous slide, ensure consistency in background color, text color, font size, and font family.
 """
 
-def evaluate_slide_with_qwen(image_path, previous_image_path, tool_call_output):
-    logger.info(f"Evaluating slide: {image_path} with previous: {previous_image_path}")
-    if not vlm_model or not vlm_processor:
-        logger.error("VLM model or processor not loaded")
-        return "Model not loaded"
-    
+def evaluate_slide_with_qwen(image, previous_image, tool_call_output):
+    """image/previous_image là ảnh PIL đã decode hoặc đường dẫn tới file ảnh."""
+    logger.info(f"Evaluating slide (has previous: {previous_image is not None})")
     # Load ảnh slide hiện tại
-    image = Image.open(image_path)
+    if isinstance(image, str):
+        image = Image.open(image)
+    if isinstance(previous_image, str):
+        previous_image = Image.open(previous_image) if os.path.exists(previous_image) else None
+    if REMOTE_INFERENCE:
+        return inference_client.call("evaluate", image, previous_image, tool_call_output)
+    return evaluate_slides([(image, previous_image, tool_call_output)])[0]
+
+def evaluation_messages(image, previous_image, tool_call_output):
     messages = [
         {
             "role": "user",
@@ -1919,8 +395,7 @@ def evaluate_slide_with_qwen(image_path, previous_image_path, tool_call_output):
     ]
     
     # Thêm ảnh slide trước đó nếu có
-    if previous_image_path and os.path.exists(previous_image_path):
-        previous_image = Image.open(previous_image_path)
+    if previous_image is not None:
         messages.append(
             {
                 "role": "user",
@@ -1945,11 +420,19 @@ Your response must follow this format:
 </tool_call>
 """
     messages.append({"role": "user", "content": [{"type": "text", "text": question}]})
+    return messages
 
-    text = vlm_processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-    image_inputs, video_inputs = process_vision_info(messages)
+def evaluate_slides(requests):
+    """VLM verdicts for a batch of (image, previous image or None, tool call), evaluated together."""
+    if not vlm_model or not vlm_processor:
+        logger.error("VLM model or processor not loaded")
+        return ["Model not loaded"] * len(requests)
+    conversations = [evaluation_messages(*request) for request in requests]
+    texts = [vlm_processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+             for messages in conversations]
+    image_inputs, video_inputs = process_vision_info(conversations)
     inputs = vlm_processor(
-        text=[text],
+        text=texts,
         images=image_inputs,
         videos=video_inputs,
         padding=True,
@@ -1959,7 +442,7 @@ Your response must follow this format:
         generated_ids = vlm_model.generate(**inputs, max_new_tokens=512)
     generated_ids_trimmed = [out_ids[len(in_ids):] for in_ids, out_ids in zip(inputs.input_ids, generated_ids)]
     output_text = vlm_processor.batch_decode(generated_ids_trimmed, skip_special_tokens=True, clean_up_tokenization_spaces=False)
-    return output_text[0].strip()
+    return [text.strip() for text in output_text]
 
 def parse_vlm_response(vlm_response):
     logger.info(f"Parsing VLM response: {vlm_response}")
@@ -1984,126 +467,223 @@ def generate_plan_from_html(html_content):
     return "Kế hoạch chưa được triển khai"
 
 
-def process_slides(docx_file, output_folder):
-    logger.info(f"Processing slides from {docx_file}")
-    text = extract_text_from_docx(docx_file)
-    chunks = split_text_into_chunks(text)
-    slide_list = create_slide_list(chunks)
+# Một slide cần render: nội dung, lời gọi hàm, đơn vị trong manifest mới và
+# bản ghi slide của lần chạy trước khi được dùng lại (None nếu sinh mới)
+SlideCall = namedtuple("SlideCall", "content tool_call unit reused")
 
-    slide_function_calling_list = []
+
+def iter_slide_calls(docx_file, slide_sizes=None, previous=None, manifest=None):
+    """
+    Yield a SlideCall for each slide while the document is still being read:
+    paragraphs are streamed from the DOCX into the structure-aware chunker,
+    and each slide's LLM call is made as soon as its section is complete, so
+    rendering of the first slides starts before parsing ends. Units are sized
+    in tokens against content_token_budget(); their sizes are appended to
+    slide_sizes when given.
+
+    Units found in the previous run's manifest with the same content and the
+    same preceding content skip the LLM and yield the slides accepted last
+    time (reused set). Every unit is recorded in manifest.
+    """
+    if manifest is None:
+        manifest = DeckManifest(None)
     pre_slide_content = ""
     pre_function_call = ""
-    for slide_content in slide_list:
+    budget = content_token_budget()
+    # Đơn vị slide theo tiêu đề/danh sách/bảng của tài liệu, không chồng lấn
+    # Ảnh được lưu nguyên byte vào media store và đưa vào nội dung dưới dạng "[image: URL]"
+    units = iter_slide_units(iter_paragraphs(docx_file, media_store=media_store), max_len=budget,
+                             min_len=int(budget * MIN_FILL_RATIO), length=token_counter)
+    for slide_content in units:
+        if slide_sizes is not None:
+            slide_sizes.append(token_counter(slide_content))
+        record = previous.match(pre_slide_content, slide_content) if previous is not None else None
+        if record is not None:
+            logger.info(f"Reusing unchanged slide content: {slide_content[:50]}...")
+            unit = manifest.add_unit(pre_slide_content, slide_content, record["generated_call"])
+            pre_slide_content = slide_content
+            pre_function_call = record["generated_call"]
+            for slide in record["slides"]:
+                yield SlideCall(slide_content, slide["tool_call"], unit, slide)
+            continue
+
         html_slide_call = get_html_slide(pre_slide_content, pre_function_call, slide_content)
-        slide_function_calling_list.append(html_slide_call)
+        unit = manifest.add_unit(pre_slide_content, slide_content, html_slide_call)
         pre_slide_content = slide_content
         pre_function_call = html_slide_call
 
-    slide_function_calling_list = clean_slide_function(slide_function_calling_list)
-    for x in slide_function_calling_list:
-        logger.info(x)
+        tool_call_output = clean_slide_function([html_slide_call])[0]
+        logger.info(tool_call_output)
         logger.info("-------------------")
+        if TEXT_FIT:
+            for content, call in zip(*fit_slide_calls([slide_content], [tool_call_output])):
+                yield SlideCall(content, call, unit, None)
+        else:
+            yield SlideCall(slide_content, tool_call_output, unit, None)
 
-    driver = initialize_chromedriver()
-    if not driver:
-        raise Exception("Cannot initialize ChromeDriver")
-
-    # Sử dụng tempfile.TemporaryDirectory() để quản lý thư mục tạm *bên trong* process_slides
-    with tempfile.TemporaryDirectory() as tmpdir:
-        html_folder = os.path.join(tmpdir, "html")
-        png_folder = os.path.join(tmpdir, "png")
-        os.makedirs(html_folder, exist_ok=True)
-        os.makedirs(png_folder, exist_ok=True)
-
-        html_files = []
-        png_files = []
-        max_attempts = 3
-        previous_image_path = None
-
-        for i, (slide_content, tool_call_output) in enumerate(zip(slide_list, slide_function_calling_list)):
-            attempts = 0
-            html_content = ""
-            slide_image = None
-
-            while attempts < max_attempts:
-                attempts += 1
-                logger.info(f"Processing slide {i+1}, attempt {attempts}")
-                try:
-                    html_content = process_tool_call(tool_call_output)
-                    if not filter_invalid_slides(html_content):
-                        logger.warning(f"Slide {i+1} is invalid")
-                        break
-
-                    temp_html_path = os.path.join(html_folder, f"slide_{i+1}_attempt_{attempts}.html")
-                    with open(temp_html_path, "w", encoding="utf-8") as file:
-                        file.write(html_content)
-
-                    temp_image_path = os.path.join(png_folder, f"slide_{i+1}_attempt_{attempts}.png")
-                    slide_image = capture_slide_image(driver, html_content, temp_image_path)
-
-                    evaluation_content = evaluate_slide_with_qwen(temp_image_path, previous_image_path, tool_call_output)
-                    status, reason, new_tool_call = parse_vlm_response(evaluation_content)
-
-                    if status == "accept":
-                        final_html_path = os.path.join(html_folder, f"slide_{i+1}.html")
-                        final_png_path = os.path.join(png_folder, f"slide_{i+1}.png")
-                        os.rename(temp_html_path, final_html_path)
-                        os.rename(temp_image_path, final_png_path)
-                        html_files.append(final_html_path)
-                        png_files.append(final_png_path)
-                        previous_image_path = final_png_path
-                        logger.info(f"Slide {i+1} accepted")
-                        break  # Thoát vòng lặp while nếu slide được chấp nhận
-                    elif status == "deny" and new_tool_call:
-                        tool_call_output = new_tool_call
-                        logger.info(f"Slide {i+1} denied, retrying with new tool call")
 
-                except Exception as e:
-                    logger.error(f"Error processing slide {i+1}, attempt {attempts}: {e}")
-                    # Không break ở đây, để thử lại nếu còn attempts
-
-            if attempts == max_attempts:  # Đã thử hết số lần cho phép
-                logger.warning(f"Slide {i+1} max attempts reached")
-                # Có thể xử lý bằng cách bỏ qua slide này hoặc thêm một slide lỗi
-                # Ví dụ: Thêm một slide lỗi
-                final_html_path = os.path.join(html_folder, f"slide_{i+1}.html")
-                final_png_path = os.path.join(png_folder, f"slide_{i + 1}.png")
-
-                with open(final_html_path, 'w') as f:
-                    f.write('<html><body><h1>Error Creating Slide</h1></body></html>')  # Tạo nội dung HTML lỗi
-                # Tạo 1 ảnh trắng để thay thế.
-                img = Image.new('RGB', (900, 500), color='white')
-                img.save(final_png_path)
-
-                html_files.append(final_html_path)
-                png_files.append(final_png_path)
-                previous_image_path = final_png_path  # CẬP NHẬT previous_image_path
+def loaded_models():
+    return {
+        "model": model_name_or_path if model is not None else None,
+        "vlm": vlm_model_name if vlm_model is not None else None,
+    }
 
-        driver.quit()
-        logger.info("ChromeDriver closed")
 
+def inference_handlers():
+    """Batch handlers served by the inference worker (inference.py)."""
+    return {
+        "slide_call": generate_slide_calls,
+        "evaluate": evaluate_slides,
+        "info": lambda requests: [loaded_models()] * len(requests),
+    }
+
+
+def deck_pipeline():
+    """Fingerprint of the generation settings; a manifest made with other settings is not reused."""
+    # Mô hình ở tiến trình inference: hỏi tiến trình đó đã tải mô hình nào
+    models = inference_client.info() if REMOTE_INFERENCE else loaded_models()
+    return pipeline_fingerprint(
+        tools=tools_digest(),
+        model=models["model"],
+        vlm=models["vlm"],
+        system_prompt=SYSTEM_PROMPT,
+        budget=content_token_budget(),
+        text_fit=TEXT_FIT,
+        deck_format=DECK_FORMAT,
+        image=(SLIDE_IMAGE_WIDTH, SLIDE_IMAGE_FORMAT, SLIDE_IMAGE_QUALITY),
+    )
+
+
+ERROR_SLIDE_HTML = '<html><body><h1>Error Creating Slide</h1></body></html>'
+
+
+def process_slides(docx_file, output_folder=None, progress_callback=None, previous_folder=None):
+    """
+    Generate the deck of docx_file and return it as a DeckResult held in
+    memory (HTML, image bytes, tool calls and verdicts of every slide).
+
+    When output_folder is given the new deck is written to it once.
+    Slides unchanged since the deck stored in previous_folder (by default
+    output_folder itself) are reused. progress_callback, when given, is called with keyword arguments
+    (phase, slides_done, slide, status) as the work advances; each finished
+    slide also comes with slide_data, its SlideResult.
+    """
+    logger.info(f"Processing slides from {docx_file}")
 
-        # Tạo file zip *trong* thư mục tạm của process_slide
-        zip_file_path = os.path.join(tmpdir, "slides.zip")  # Đặt tên file ZIP trong thư mục tạm
-        with zipfile.ZipFile(zip_file_path, 'w') as zipf:
-            for html_file in html_files:
-                if os.path.exists(html_file):  # Kiểm tra sự tồn tại *trước khi* thêm
-                    zipf.write(html_file, os.path.join("html", os.path.basename(html_file)))
-                else:
-                    logger.error(f"File not found: {html_file}") # Log lỗi nếu file không tồn tại
-            for png_file in png_files:
-                if os.path.exists(png_file):
-                    zipf.write(png_file, os.path.join("png", os.path.basename(png_file)))
-                else:
-                    logger.error(f"File not found: {png_file}")
+    def report(**progress):
+        if progress_callback is not None:
+            progress_callback(**progress)
 
-        # *Sau khi* tạo xong ZIP, kiểm tra xem nó có tồn tại không
-        if not os.path.exists(zip_file_path):
-            raise FileNotFoundError(f"ZIP file not created: {zip_file_path}")
+    report(phase="generating", slides_done=0)
 
-        # Copy file zip ra output_folder trước khi temp dir bị xóa
-        final_zip_path = os.path.join(output_folder, "slides.zip")
-        shutil.copy2(zip_file_path, final_zip_path) # copy cả metadata
+    # ChromeDriver chỉ được khởi tạo khi render cache miss lần đầu
+    driver = None
 
+    def get_driver():
+        nonlocal driver
+        if driver is None:
+            driver = initialize_chromedriver()
+            if not driver:
+                raise Exception("Cannot initialize ChromeDriver")
+        return driver
 
-    return final_zip_path  # Trả về đường dẫn đến file ZIP *trong output_folder*
\ No newline at end of file
+    max_attempts = 3
+    previous_image = None
+    image_ext = IMAGE_EXTENSIONS[SLIDE_IMAGE_FORMAT]
+
+    # Manifest lần chạy trước (nếu deck đã từng được sinh trong output_folder)
+    pipeline = deck_pipeline()
+    previous_folder = previous_folder or output_folder
+    previous = DeckManifest.load(previous_folder, pipeline) if previous_folder else None
+    manifest = DeckManifest(pipeline)
+    deck_title = os.path.splitext(os.path.basename(docx_file))[0]
+    deck = DeckResult(deck_title, shared_css=DECK_FORMAT == "shared", manifest=manifest,
+                      media_dir=media_store.media_dir)
+    reused_count = 0
+
+    def accept_slide(i, unit, tool_call_output, html_content, image_bytes, status, verdict):
+        fn_name, fn_args = parse_tool_call(tool_call_output)
+        template = getattr(get_function_by_name(fn_name), "template", None)
+        slide = deck.add_slide(i + 1, tool_call_output, html_content, image_bytes, image_ext, status, verdict,
+                               template=template, arguments=fn_args if template is not None else None)
+        manifest.add_slide(unit, tool_call_output, slide.image_path, image_bytes)
+        report(slides_done=len(deck.slides), slide=i + 1, status=status, slide_data=slide)
+
+    slide_sizes = []
+    slide_calls = iter_slide_calls(docx_file, slide_sizes, previous=previous, manifest=manifest)
+    for i, (slide_content, tool_call_output, unit, reused) in enumerate(slide_calls):
+        if reused is not None:
+            # Slide không đổi: dùng lại lời gọi hàm và ảnh đã được chấp nhận, bỏ qua render + đánh giá
+            image_bytes = DeckManifest.read_png(previous_folder, reused)
+            if image_bytes is not None:
+                try:
+                    accept_slide(i, unit, tool_call_output, process_tool_call(tool_call_output), image_bytes,
+                                 "reused", "reused")
+                    previous_image = Image.open(io.BytesIO(image_bytes))
+                    reused_count += 1
+                    logger.info(f"Slide {i+1} reused")
+                    continue
+                except Exception as e:
+                    logger.warning(f"Cannot reuse slide {i+1}, regenerating it: {e}")
+            else:
+                logger.info(f"Image of slide {i+1} is missing, rendering it again")
+
+        attempts = 0
+        html_content = ""
+        accepted = False
+
+        while attempts < max_attempts:
+            attempts += 1
+            logger.info(f"Processing slide {i+1}, attempt {attempts}")
+            try:
+                html_content = process_tool_call(tool_call_output)
+                if not filter_invalid_slides(html_content):
+                    logger.warning(f"Slide {i+1} is invalid")
+                    break
+
+                # Ảnh giữ trong bộ nhớ tới khi deck được ghi ra
+                image_bytes, slide_image = capture_slide_image(get_driver, html_content)
+
+                evaluation_content = evaluate_slide_with_qwen(slide_image, previous_image, tool_call_output)
+                status, reason, new_tool_call = parse_vlm_response(evaluation_content)
+
+                if status == "accept":
+                    accept_slide(i, unit, tool_call_output, html_content, image_bytes, "accepted", reason)
+                    previous_image = slide_image
+                    accepted = True
+                    logger.info(f"Slide {i+1} accepted")
+                    break  # Thoát vòng lặp while nếu slide được chấp nhận
+                elif status == "deny" and new_tool_call:
+                    tool_call_output = new_tool_call
+                    logger.info(f"Slide {i+1} denied, retrying with new tool call")
+
+            except Exception as e:
+                logger.error(f"Error processing slide {i+1}, attempt {attempts}: {e}")
+                # Không break ở đây, để thử lại nếu còn attempts
+
+        if not accepted and attempts == max_attempts:  # Đã thử hết số lần cho phép
+            logger.warning(f"Slide {i+1} max attempts reached")
+            # Thêm một slide lỗi với ảnh trắng thay thế
+            img = Image.new('RGB', slide_image_size(), color='white')
+            error_image = io.BytesIO()
+            img.save(error_image, format=SLIDE_IMAGE_FORMAT.upper())
+            slide = deck.add_slide(i + 1, None, ERROR_SLIDE_HTML, error_image.getvalue(), image_ext, "error",
+                                   "max attempts reached")
+            previous_image = img  # CẬP NHẬT previous_image
+            # Đơn vị có slide lỗi phải được sinh lại ở lần tải lên sau
+            unit["complete"] = False
+            report(slides_done=len(deck.slides), slide=i + 1, status="error", slide_data=slide)
+        elif not accepted:
+            unit["complete"] = False
+
+    if driver is not None:
+        driver.quit()
+        logger.info("ChromeDriver closed")
+    logger.info(f"Slide sizes: {format_size_report(size_report(slide_sizes))}")
+    logger.info(f"Reused {reused_count} of {len(deck.slides)} slides from the previous run")
+
+    if output_folder:
+        report(phase="writing", slides_done=len(deck.slides))
+        os.makedirs(output_folder, exist_ok=True)
+        deck.write(output_folder)
+    return deck
@@ -0,0 +1,1390 @@
+import functools
+import html
+import inspect
+
+from text_fit import FitSpec, TextBlock
+from tool_registry import tool
+
+# CSS tĩnh của mỗi layout được tách ra khỏi phần tham số (tham số CSS được đọc
+# qua var(--<tên tham số>)), nên mỗi lần gọi chỉ còn ghép các giá trị vào phần
+# markup và khối :root.
+
+ROBOTO_FONT_LINK = '<link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">'
+BOOTSTRAP_5_LINK = '<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">'
+BOOTSTRAP_5_ALPHA_LINK = '<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css" rel="stylesheet">'
+BOOTSTRAP_4_LINK = '<link href="https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/css/bootstrap.min.css" rel="stylesheet">'
+MATHJAX_SCRIPTS = (
+    '<script src="https://polyfill.io/v3/polyfill.min.js?features=es6"></script>',
+    '<script id="MathJax-script" async src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>',
+)
+
+
+class SlideTemplate:
+    """
+    The static part of a slide layout.
+
+    css is the stylesheet of the layout; every parameter it needs is read
+    through var(--<param>). Decorating a slide function with
+    @template.function turns it into the full-page function: the decorated
+    function is a plain f-string function returning the (theme, body) pair,
+    theme being the :root block with the CSS parameters of one slide, and is
+    kept as render_parts() for decks that link the static CSS once. defaults
+    replace None arguments (list markup defaults) in values().
+    """
+
+    def __init__(self, css, links=(), title=False, defaults=None):
+        self.css = css.strip("\n")
+        self.links = tuple(links)
+        self.title = title
+        self.defaults = dict(defaults or {})
+        self.name = None
+        self.render_parts = None
+        self._signature = None
+        self._head = (
+            '<!DOCTYPE html>\n<html lang="en">\n<head>\n'
+            '    <meta charset="UTF-8">\n'
+            '    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+            + "".join(f"    {link}\n" for link in self.links)
+            + "    <style>\n" + self.css + "\n    </style>\n"
+        )
+
+    def function(self, render_parts):
+        self.name = render_parts.__name__
+        self.render_parts = render_parts
+        self._signature = inspect.signature(render_parts)
+        head = self._head
+        if self.title:
+            # <title> lấy từ tham số đầu tiên, không cần bind cả chữ ký ở mỗi lần gọi
+            first = next(iter(self._signature.parameters.values()))
+            if first.name != "title":
+                raise ValueError(f"{self.name}: a layout with a <title> must take title as its first parameter")
+
+            @functools.wraps(render_parts)
+            def render(*args, **kwargs):
+                theme, body = render_parts(*args, **kwargs)
+                title = args[0] if args else kwargs.get("title", first.default)
+                return (f"{head}    <style>{theme}</style>\n    <title>{title}</title>\n"
+                        f"</head>\n<body>\n{body}\n</body>\n</html>")
+        else:
+            @functools.wraps(render_parts)
+            def render(*args, **kwargs):
+                theme, body = render_parts(*args, **kwargs)
+                return f"{head}    <style>{theme}</style>\n</head>\n<body>\n{body}\n</body>\n</html>"
+
+        render.template = self
+        return render
+
+    def values(self, *args, **kwargs):
+        """Every argument of the slide function, with defaults applied."""
+        bound = self._signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        values = dict(bound.arguments)
+        for name, default in self.defaults.items():
+            if values.get(name) is None:
+                values[name] = default
+        return values
+
+
+def _image_html(image_url):
+    # Ảnh được tham chiếu theo URL trong media store, không nhúng base64
+    if not image_url:
+        return "Image"
+    return f'<img src="{html.escape(image_url, quote=True)}" alt="">'
+
+
+def _dots_html(dot_count):
+    return '<span class="dot"></span>' * dot_count
+
+
+def _sections_html(sections):
+    return "".join(
+        f"""
+        <div class="section">
+            <div class="section-title">{section}</div>
+            <div class="section-content">
+                <ul>
+                    {''.join(f'<li>{point}</li>' for point in points)}
+                </ul>
+            </div>
+        </div>
+        """
+        for section, points in sections.items()
+    )
+
+
+DEFAULT_LIST_ITEMS = [
+    "<span class=\"keyword\">Point 1</span>: Description of point 1.",
+    "<span class=\"keyword\">Point 2</span>: Description of point 2.",
+    "<span class=\"keyword\">Point 3</span>: Description of point 3.",
+    "<span class=\"keyword\">Point 4</span>: Description of point 4."
+]
+
+DEFAULT_SECTIONS = {
+    "SubTitle1": [
+        "Content1",
+        "Content2",
+        "Content3",
+        "Content4",
+    ],
+    "SubTitle2": [
+        "Content5",
+        "Content6",
+        "Content7",
+    ],
+    "SubTitle3": [
+        "Content8",
+        "Content9",
+        "Content10",
+    ],
+}
+
+
+DOTS_LAYOUT_CSS = """
+body, html {
+    margin: 0;
+    padding: 0;
+    height: 100%;
+    font-family: var(--font_family);
+    background-color: var(--slide_bg_color);
+}
+.slide-container {
+    display: flex;
+    flex-direction: column;
+    height: 100vh;
+    padding: 40px;
+    box-sizing: border-box;
+}
+.title {
+    font-size: var(--title_font_size);
+    color: var(--title_color);
+    font-style: var(--title_font_style);
+    margin-bottom: var(--title_margin_bottom);
+    margin-left: var(--title_margin_left);
+}
+.content-container {
+    display: flex;
+    flex-direction: column;
+    align-items: center;
+    justify-content: center;
+    flex: 1;
+}
+.content {
+    color: var(--content_color);
+    font-size: var(--content_font_size);
+    line-height: var(--content_line_height);
+    width: var(--content_width);
+    margin: var(--content_margin);
+    text-align: var(--content_text_align);
+}
+.horizontal-line {
+    width: var(--line_width);
+    height: var(--line_height);
+    background-color: var(--line_color);
+    margin: var(--line_margin);
+}
+.dots-container {
+    display: flex;
+    justify-content: center;
+    margin: 10px 0;
+}
+.dot {
+    display: inline-block;
+    width: var(--dot_size);
+    height: var(--dot_size);
+    border-radius: 50%;
+    background-color: var(--dot_color);
+    margin: var(--dot_margin);
+}
+"""
+
+
+
+BODY_SLIDE1_CSS = """
+body, html {
+    height: 100%;
+    margin: 0;
+    font-family: var(--font_family);
+    background-color: var(--bg_color);
+}
+.slide-container {
+    display: flex;
+    flex-direction: column;
+    justify-content: center;
+    align-items: center;
+    height: 100vh;
+    padding: 20px;
+}
+.slide-title {
+    color: var(--keyword_color);
+    font-size: var(--title_font_size);
+    margin-bottom: 15px;
+    font-weight: bolder;
+}
+.slide-content {
+    background-color: var(--text_bg_color);
+    padding: 40px;
+    border-radius: 12px;
+    box-shadow: 0 4px 12px rgba(0, 0, 0, 0.15);
+    color: var(--text_color);
+    max-width: 1000px; /* Adjusted width for a balanced look */
+    width: 90%;
+}
+.text-content {
+    width: 100%;
+}
+.text-content p {
+    margin-bottom: 18px;
+    font-size: var(--para_font_size);
+    line-height: 1.7;
+}
+.text-content ul {
+    list-style: none;
+    padding: 0;
+}
+.text-content li {
+    margin-top: 14px;
+    font-size: var(--para_font_size);
+}
+.keyword {
+    color: var(--keyword_color);
+    font-weight: bold;
+}
+@media (max-width: 768px) {
+    .slide-content {
+        width: 100%;
+        padding: 20px;
+    }
+}
+"""
+
+
+
+BODY_SLIDE2_CSS = """
+body, html {
+    height: 100%;
+    margin: 0;
+    font-family: var(--font_family);
+    background-color: var(--background_color);
+}
+
+.slide-container {
+    display: flex;
+    justify-content: center;
+    align-items: center;
+    height: 100vh;
+    background-color: var(--background_color);
+    padding: 20px;
+}
+
+.content-box {
+    background-color: var(--content_bg_color);
+    border-radius: 12px;
+    box-shadow: var(--content_shadow);
+    padding: 40px;
+    color: var(--text_body_color);
+    width: 90%;
+    max-width: 1000px; 
+    text-align: left;
+}
+
+h1 {
+    color: var(--header_color);
+    font-size: var(--header_font_size);
+    margin-bottom: 20px;
+}
+
+p {
+    font-size: var(--para_font_size);
+    line-height: 1.8em;
+}
+
+strong {
+    color: var(--highlight_color);
+    font-weight: bold;
+}
+
+@media (max-width: 768px) {
+    .content-box {
+        width: 100%;
+        padding: 20px;
+    }
+}
+"""
+
+
+
+BODY_SLIDE3_CSS = """
+body, html {
+    margin: 0;
+    padding: 0;
+    font-family: var(--font_family);
+    height: 100vh;
+    width: 100vw;
+    display: flex;
+    justify-content: center;
+    align-items: center;
+    background-color: var(--left_bg_color);
+}
+.slide-container {
+    display: flex;
+    width: 100vw;
+    height: 100vh;
+    box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+    border-radius: 0;
+    overflow: hidden;
+}
+.left-container {
+    flex: 1;
+    padding: 60px;
+    background-color: var(--left_bg_color);
+    display: flex;
+    flex-direction: column;
+    justify-content: flex-start;
+    align-items: flex-start;
+}
+.title {
+    font-size: var(--tile_font_size);
+    font-weight: bold;
+    color: var(--title_color);
+    margin-bottom: 20px;
+    align-self: flex-start;
+}
+.subtitle {
+    font-size: var(--subtitle_font_size);
+    color: var(--subtitle_color);
+    align-self: flex-start;
+}
+.right-container {
+    flex: 2;
+    padding: 40px;
+    background-color: var(--right_bg_color);
+    color: var(--text_color);
+    border-radius: 20px;
+    position: relative;
+    display: flex;
+    flex-direction: column;
+    justify-content: center;
+    align-items: center;
+}
+.corner-icons {
+    position: absolute;
+    top: 10px;
+    right: 10px;
+    display: flex;
+    gap: 5px;
+}
+.corner-icons span, .bottom-icons span {
+    width: 12px;
+    height: 12px;
+    background-color: var(--corner_icon_color);
+    border-radius: 50%;
+    display: inline-block;
+}
+.bottom-icons {
+    position: absolute;
+    bottom: 10px;
+    left: 20px;
+    display: flex;
+    gap: 5px;
+}
+.bottom-icons span { background-color: var(--icon_color); }
+"""
+
+
+
+BODY_SLIDE5_CSS = """
+body, html {
+    margin: 0;
+    padding: 0;
+    height: 100%;
+    font-family: var(--font_family);
+    background-color: var(--bg_color);
+    color: var(--content_color);
+}
+.container {
+    display: flex;
+    height: 100vh;
+    overflow: hidden;
+}
+.left-section {
+    flex: 1;
+    padding: 40px;
+    box-sizing: border-box;
+}
+.title {
+    font-size: var(--title_font_size);
+    color: var(--title_color);
+    margin-bottom: 20px;
+}
+.number {
+    background-color: var(--number_bg_color);
+    color: var(--number_text_color);
+    font-size: var(--subtile_font_size);
+    padding: 10px 20px;
+    border-radius: var(--border_radius);
+    margin-bottom: 10px;
+}
+.content {
+    font-size: var(--content_font_size);
+    line-height: 1.6;
+    margin-bottom: 20px;
+}
+.right-section {
+    position: relative;
+    flex: 1;
+    display: flex;
+    align-items: center;
+    justify-content: flex-end;
+}
+.image-container {
+    width: var(--image_width);
+    height: var(--image_height);
+    background-color: var(--image_bg_color);
+    border-radius: var(--border_radius);
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    overflow: hidden;
+}
+.image-container img {
+    max-width: 100%;
+    max-height: 100%;
+    object-fit: contain;
+}
+.bubble {
+    position: absolute;
+    width: 20px;
+    height: 20px;
+    background-color: #00c6ff;
+    border-radius: 50%;
+    opacity: 0.8;
+}
+.bubble.bubble-1 {
+    top: 50px;
+    right: 150px;
+}
+.bubble.bubble-2 {
+    top: 100px;
+    right: 100px;
+}
+.bubble.bubble-3 {
+    top: 150px;
+    right: 50px;
+}
+"""
+
+
+
+BODY_SLIDE6_CSS = """
+body {
+    font-family: var(--font_family);
+    margin: 0;
+    padding: 0;
+    display: flex;
+    flex-direction: column;
+    align-items: center;
+    background-color: #f8f9fa;
+}
+.title {
+    font-size: var(--title_font_size);
+    font-family: var(--title_font_family);
+    font-weight: bold;
+    color: var(--title_color);
+    text-align: center;
+    margin-top: 40px;
+}
+.divider {
+    width: 60%;
+    height: 3px;
+    background-color: var(--title_color);
+    margin: 10px auto 20px;
+    position: relative;
+}
+.dots {
+    display: flex;
+    justify-content: flex-end;
+    gap: 8px;
+    position: absolute;
+    right: 0;
+    top: -6px;
+}
+.dot {
+    width: 12px;
+    height: 12px;
+    border-radius: 50%;
+}
+.dot:nth-child(1) { background-color: #ff6b6b; }
+.dot:nth-child(2) { background-color: #ffa502; }
+.dot:nth-child(3) { background-color: #1e90ff; }
+.sections-container {
+    display: flex;
+    justify-content: center;
+    gap: 20px;
+    flex-wrap: wrap;
+    margin-top: 20px;
+}
+.section {
+    width: 300px;
+    border: 2px solid var(--box_border_color);
+    border-radius: var(--box_border_radius);
+    box-shadow: var(--box_shadow);
+    overflow: hidden;
+    background: white;
+}
+.section-title {
+    background-color: var(--subtitle_bg_color);
+    color: var(--subtitle_text_color);
+    font-size: var(--section_title_font_size);
+    font-weight: bold;
+    padding: 12px;
+    text-align: center;
+    border-top-left-radius: var(--box_border_radius);
+    border-top-right-radius: var(--box_border_radius);
+}
+.section-content {
+    padding: var(--box_padding);
+}
+.section-content ul {
+    padding-left: 20px;
+    margin: 0;
+}
+.section-content li {
+    font-size: var(--section_content_font_size);
+    line-height: 1.6;
+    color: var(--bullet_color);
+    list-style-type: disc;
+}
+"""
+
+
+
+BODY_SLIDE7_CSS = """
+html, body {
+    margin: 0;
+    padding: 0;
+    height: 100%;
+    width: 100%;
+    overflow: hidden;
+}
+body {
+    display: flex;
+    justify-content: center;
+    align-items: center;
+    background-color: var(--bg_color);
+    font-family: var(--font_family);
+}
+.slide-container {
+    position: relative;
+    width: 100vw;
+    height: 100vh;
+    display: flex;
+    flex-direction: column;
+    justify-content: center;
+    align-items: center;
+    padding: 0 10%;
+    box-sizing: border-box;
+    background-color: white;
+}
+.corner-decoration {
+    position: absolute;
+    width: 200px;
+    height: 200px;
+    background-color: var(--corner_decoration_color);
+    opacity: 0.3;
+    z-index: 1;
+}
+.top-left {
+    top: 0;
+    left: 0;
+    border-radius: 0 0 100% 0;
+}
+.bottom-right {
+    bottom: 0;
+    right: 0;
+    border-radius: 100% 0 0 0;
+}
+.title {
+    font-size: var(--title_font_size);
+    text-align: center;
+    color: var(--title_color);
+    margin-bottom: 30px;
+    font-weight: bold;
+    letter-spacing: 4px;
+    z-index: 2;
+    position: relative;
+    top: -50px;
+}
+.content {
+    font-size: var(--content_font_size);
+    color: var(--content_color);
+    line-height: 1.8;
+    max-width: 1000px;
+    padding: 0 30px;
+    z-index: 2;
+}
+"""
+
+
+
+BODY_SLIDE8_CSS = """
+html, body {
+    margin: 0;
+    padding: 0;
+    height: 100%;
+    width: 100%;
+    overflow: hidden;
+}
+body {
+    display: flex;
+    justify-content: center;
+    align-items: center;
+    background-color: var(--bg_color);
+    font-family: var(--font_family);
+}
+.slide-container {
+    position: relative;
+    width: 100vw;
+    height: 100vh;
+    display: flex;
+    flex-direction: column;
+    justify-content: center;
+    align-items: center;
+    padding: 0 10%;
+    box-sizing: border-box;
+    background-color: white;
+}
+.corner-decoration {
+    position: absolute;
+    width: 200px;
+    height: 200px;
+    background-color: var(--corner_decoration_color);
+    opacity: 0.3;
+    z-index: 1;
+}
+.top-left {
+    top: 0;
+    left: 0;
+    border-radius: 0 0 100% 0;
+}
+.bottom-right {
+    bottom: 0;
+    right: 0;
+    border-radius: 100% 0 0 0;
+}
+.title {
+    font-size: var(--title_font_size);
+    text-align: center;
+    color: var(--title_color);
+    margin-bottom: 30px;
+    font-weight: bold;
+    letter-spacing: 4px;
+    z-index: 2;
+    position: relative;
+    top: -50px;
+}
+.content {
+    font-size: var(--content_font_size);
+    color: var(--content_color);
+    line-height: 1.8;
+    max-width: 1000px;
+    padding: 0 30px;
+    z-index: 2;
+}
+/* List styling */
+ul {
+    list-style-type: disc;
+    padding-left: 40px;
+    margin: 0;
+}
+li {
+    margin-bottom: 10px;
+}
+"""
+
+
+
+DOTS_LAYOUT_LINKS = (ROBOTO_FONT_LINK, BOOTSTRAP_5_LINK)
+
+INTRO_SLIDE_TEMPLATE = SlideTemplate(DOTS_LAYOUT_CSS, links=DOTS_LAYOUT_LINKS)
+BODY_SLIDE1_TEMPLATE = SlideTemplate(BODY_SLIDE1_CSS, links=(ROBOTO_FONT_LINK, BOOTSTRAP_5_LINK), title=True,
+                                     defaults={"list_items": DEFAULT_LIST_ITEMS})
+BODY_SLIDE2_TEMPLATE = SlideTemplate(BODY_SLIDE2_CSS, links=MATHJAX_SCRIPTS + (ROBOTO_FONT_LINK, BOOTSTRAP_4_LINK),
+                                     title=True)
+BODY_SLIDE3_TEMPLATE = SlideTemplate(BODY_SLIDE3_CSS)
+BODY_SLIDE5_TEMPLATE = SlideTemplate(BODY_SLIDE5_CSS, links=(ROBOTO_FONT_LINK, BOOTSTRAP_5_ALPHA_LINK))
+BODY_SLIDE6_TEMPLATE = SlideTemplate(BODY_SLIDE6_CSS, links=(ROBOTO_FONT_LINK, BOOTSTRAP_5_ALPHA_LINK),
+                                     defaults={"sections": DEFAULT_SECTIONS})
+BODY_SLIDE7_TEMPLATE = SlideTemplate(BODY_SLIDE7_CSS, links=(ROBOTO_FONT_LINK, BOOTSTRAP_5_ALPHA_LINK))
+BODY_SLIDE8_TEMPLATE = SlideTemplate(BODY_SLIDE8_CSS, links=(ROBOTO_FONT_LINK, BOOTSTRAP_5_ALPHA_LINK))
+CONCLUSION_SLIDE_TEMPLATE = SlideTemplate(DOTS_LAYOUT_CSS, links=DOTS_LAYOUT_LINKS)
+
+
+def _dots_layout_parts(title, title_color, title_font_size, title_font_style, title_margin_bottom,
+                      title_margin_left, content_text, content_color, content_font_size, content_line_height,
+                      content_width, content_margin, content_text_align, dot_color, dot_size, dot_margin,
+                      dot_count, line_color, line_width, line_height, line_margin, slide_bg_color,
+                      font_family, additional_css):
+    dots_html = _dots_html(dot_count)
+    theme = (f":root {{ --font_family: {font_family}; --slide_bg_color: {slide_bg_color}; "
+             f"--title_font_size: {title_font_size}; --title_color: {title_color}; "
+             f"--title_font_style: {title_font_style}; --title_margin_bottom: {title_margin_bottom}; "
+             f"--title_margin_left: {title_margin_left}; --content_color: {content_color}; "
+             f"--content_font_size: {content_font_size}; --content_line_height: {content_line_height}; "
+             f"--content_width: {content_width}; --content_margin: {content_margin}; "
+             f"--content_text_align: {content_text_align}; --line_width: {line_width}; "
+             f"--line_height: {line_height}; --line_color: {line_color}; --line_margin: {line_margin}; "
+             f"--dot_size: {dot_size}; --dot_color: {dot_color}; --dot_margin: {dot_margin}; }}{additional_css}")
+    return theme, f"""<div class="slide-container">
+    <div class="title">{title}</div>
+
+    <div class="content-container">
+        <div class="dots-container">
+            {dots_html}
+        </div>
+
+        <div class="horizontal-line"></div>
+
+        <div class="content">
+            {content_text}
+        </div>
+
+        <div class="horizontal-line"></div>
+
+        <div class="dots-container">
+            {dots_html}
+        </div>
+    </div>
+</div>"""
+
+
+# Vùng chứa chữ của từng layout ở viewport 1920x1080 (px), suy từ CSS ở trên
+DOTS_LAYOUT_FIT = FitSpec(1000, [
+    TextBlock("title", "title_font_size", 1840, gap=5, shrink=False),
+    TextBlock("content_text", "content_font_size", 1840, width_param="content_width",
+              line_height_param="content_line_height"),
+], fixed_height=184)
+BODY_SLIDE1_FIT = FitSpec(1040, [
+    TextBlock("slide_title", "title_font_size", 1880, gap=15, shrink=False),
+    TextBlock("content_paragraph", "para_font_size", 920, line_height=1.7, gap=18),
+    TextBlock("list_items", "para_font_size", 920, gap=14, kind="list"),
+], fixed_height=112, split_field="list_items", first_only=("content_paragraph",))
+BODY_SLIDE2_FIT = FitSpec(1040, [
+    TextBlock("header_text", "header_font_size", 920, gap=20, shrink=False),
+    TextBlock("paragraph_text", "para_font_size", 920, line_height=1.8),
+], fixed_height=96)
+BODY_SLIDE3_FIT = FitSpec(1000, [
+    TextBlock("content_paragraphs", None, 1200, gap=16, kind="list"),
+], fixed_height=16, split_field="content_paragraphs", first_only=("subtitle",))
+BODY_SLIDE5_FIT = FitSpec(1000, [
+    TextBlock("title", "title_font_size", 880, gap=20, shrink=False),
+    TextBlock("subtitle1", "subtile_font_size", 840, gap=30),
+    TextBlock("content_1", "content_font_size", 880, line_height=1.6, gap=36),
+    TextBlock("subtitle2", "subtile_font_size", 840, gap=30),
+    TextBlock("content_2", "content_font_size", 880, line_height=1.6, gap=36),
+], fixed_height=21)
+BODY_SLIDE6_FIT = FitSpec(1080, [
+    TextBlock("title", "title_font_size", 1880, gap=40, shrink=False),
+    TextBlock("sections", "section_content_font_size", 236, line_height=1.6, kind="sections",
+              heading_size_param="section_title_font_size", heading_height=24),
+], fixed_height=97, split_field="sections")
+BODY_SLIDE7_FIT = FitSpec(1080, [
+    TextBlock("title", "title_font_size", 1536, gap=30, shrink=False),
+    TextBlock("content", "content_font_size", 940, line_height=1.8, gap=32),
+], fixed_height=42)
+BODY_SLIDE8_FIT = FitSpec(1080, [
+    TextBlock("title", "title_font_size", 1536, gap=30, shrink=False),
+    TextBlock("points", "content_font_size", 900, line_height=1.8, gap=10, kind="list"),
+], fixed_height=42, split_field="points")
+
+
+@tool(
+    description="Generates a customizable HTML slide with an introduction layout featuring dots and lines as decorations.",
+    params={
+        "title_font_size": "Font size of the title",
+        "title_font_style": "Font style for the title (e.g., 'italic')",
+        "title_margin_bottom": "Bottom margin for the title",
+        "title_margin_left": "Left margin for the title",
+    },
+    fit=DOTS_LAYOUT_FIT,
+)
+@INTRO_SLIDE_TEMPLATE.function
+def generate_intro_slide(
+    # Title parameters
+    title="Introduction",
+    title_color='#0F4662',
+    title_font_size="42px",
+    title_font_style="italic",
+    title_margin_bottom="5px",
+    title_margin_left="40px",
+
+    # Content parameters
+    content_text="Content",
+    content_color="#0F4662",
+    content_font_size="24px",
+    content_line_height="1.6",
+    content_width="70%",
+    content_margin="0 auto",
+    content_text_align="center",
+
+    # Decoration parameters
+    dot_color="#0F4662",
+    dot_size="10px",
+    dot_margin="0 5px",
+    dot_count=5,
+    line_color="#1a3d5c",
+    line_width="50%",
+    line_height="2px",
+    line_margin="30px auto",
+
+    # Slide parameters
+    slide_bg_color="#f5f5f5",
+    font_family="Roboto, Arial, sans-serif",
+    additional_css=""
+):
+    """
+    Generates a customizable HTML slide with a 'Conclusion' layout featuring dots and lines as decorations.
+
+    Args:
+        title: Slide title text
+        title_color: Color of the title
+        title_font_size: Font size of title
+        title_font_style: Font style for title (e.g., "italic")
+        title_margin_bottom: Bottom margin for title
+        title_margin_left: Left margin for title
+
+        content_text: Main content text
+        content_color: Color of content text
+        content_font_size: Font size of content
+        content_line_height: Line height for content
+        content_width: Width of content container
+        content_margin: Margin around content
+        content_text_align: Text alignment for content
+
+        dot_color: Color of decorative dots
+        dot_size: Size of decorative dots
+        dot_margin: Margin between dots
+        dot_count: Number of dots in each row
+        line_color: Color of horizontal lines
+        line_width: Width of horizontal lines
+        line_height: Height/thickness of horizontal lines
+        line_margin: Margin around horizontal lines
+
+        slide_bg_color: Background color of the slide
+        font_family: Font family for all text
+        additional_css: Additional CSS styles
+    """
+    return _dots_layout_parts(title, title_color, title_font_size, title_font_style, title_margin_bottom,
+                              title_margin_left, content_text, content_color, content_font_size,
+                              content_line_height, content_width, content_margin, content_text_align,
+                              dot_color, dot_size, dot_margin, dot_count, line_color, line_width, line_height,
+                              line_margin, slide_bg_color, font_family, additional_css)
+
+
+@tool(
+    description="Generate a professional HTML slide body with a centered content frame, featuring a slide title, a paragraph, and a list of bullet points. The slide is designed for presenting structured textual information in a clean and balanced manner, with customizable colors, fonts, and shadow effects. Ideal for focused presentation slides.",
+    params={
+        "title": "The title of the HTML document, displayed in the browser tab.",
+        "title_font_size": "Font size of the slide title displayed at the top of the slide.",
+        "slide_title": "The main title displayed at the top of the slide, above the content frame.",
+        "bg_color": "Background color of the entire slide.",
+        "text_bg_color": "Background color of the content frame.",
+        "text_color": "Text color of the paragraph and list items in the content frame.",
+        "keyword_color": "Color for keywords (used for the slide title and within <span class=\"keyword\"> tags in list items).",
+        "font_family": "Font family for all text in the slide.",
+        "content_paragraph": "The main paragraph text displayed above the list in the content frame.",
+        "list_items": "A list of bullet points to include in the content frame. Each item can include HTML tags like <span class=\"keyword\"> for styling keywords. If not provided, defaults to four sample bullet points.",
+    },
+    fit=BODY_SLIDE1_FIT,
+)
+@BODY_SLIDE1_TEMPLATE.function
+def generate_body_slide1(
+    title="Professional HTML Slide",
+    title_font_size="42px",
+    slide_title="Slide Title",
+    bg_color="#E8F5E9",
+    text_bg_color="#FFFFFF",
+    text_color="#2E7D32",
+    keyword_color="#1B5E20",
+    font_family="Roboto, Arial, sans-serif",
+    content_paragraph="This is a customizable slide. Add your content here:",
+    para_font_size="24px",
+    list_items=None
+):
+    """
+    Generate a professional HTML slide body with customizable parameters.
+
+    :param title: The title of the HTML document.
+    :param title_font_size: Font size of the slide title.
+    :param slide_title: The title displayed on the slide.
+    :param bg_color: Background color of the page.
+    :param text_bg_color: Background color of the text container.
+    :param text_color: Text color of the slide content.
+    :param keyword_color: Color for keywords.
+    :param font_family: Font family for the slide content.
+    :param content_paragraph: Main paragraph content.
+    :param para_font_size: Font size of the paragraph and list items.
+    :param list_items: A list of bullet points to include.
+    :return: A string containing the HTML code.
+    """
+    list_items = DEFAULT_LIST_ITEMS if list_items is None else list_items
+    list_html = "\n".join(f"<li>{item}</li>" for item in list_items)
+    theme = (f":root {{ --font_family: {font_family}; --bg_color: {bg_color}; "
+             f"--keyword_color: {keyword_color}; --title_font_size: {title_font_size}; "
+             f"--text_bg_color: {text_bg_color}; --text_color: {text_color}; "
+             f"--para_font_size: {para_font_size}; }}")
+    return theme, f"""<div class="slide-container">
+    <div class="slide-title">{slide_title}</div>
+    <div class="slide-content">
+        <div class="text-content">
+            <p>{content_paragraph}</p>
+            <ul>
+                {list_html}
+            </ul>
+        </div>
+    </div>
+</div>"""
+
+
+@tool(
+    description="Generate a professional HTML slide body with a centered content frame, featuring a main header and a paragraph. The slide is designed for presenting textual information in a clean and balanced manner, with a customizable background, text colors, and shadow effects. Ideal for simple, focused presentation slides.",
+    params={
+        "title": "The title of the HTML document, displayed in the browser tab.",
+        "header_text": "The main header text of the slide, displayed at the top of the content frame.",
+        "header_font_size": "Font size of the main header text.",
+        "background_color": "Background color of the entire slide.",
+        "text_color": "Default text color for the slide (not currently used in styling but reserved for future use).",
+        "content_bg_color": "Background color of the content frame.",
+        "content_shadow": "Box shadow effect applied to the content frame for a 3D appearance.",
+        "header_color": "Color of the main header text.",
+        "text_body_color": "Color of the paragraph text in the content frame.",
+        "highlight_color": "Color for highlighted text (used for <strong> tags).",
+        "font_family": "Font family for all text in the slide.",
+        "paragraph_text": "The paragraph text displayed below the header in the content frame.",
+    },
+    fit=BODY_SLIDE2_FIT,
+)
+@BODY_SLIDE2_TEMPLATE.function
+def generate_body_slide2(
+    title="Slide Header",
+    header_text="Key Insights",
+    header_font_size="42px",
+    background_color="#E8F5E9",
+    text_color="#004D40",
+    content_bg_color="#FFFFFF",
+    content_shadow="0 6px 12px rgba(0, 0, 0, 0.1)",
+    header_color="#00251A",
+    text_body_color="#00695C",
+    highlight_color="#FF4500",
+    font_family="Roboto, Arial, sans-serif",
+    paragraph_text="This is a customizable slide content area. You can add any relevant information here",
+    para_font_size="24px"
+):
+    """
+    Generate a professional HTML slide body for various presentation topics.
+
+    :param title: The title of the HTML document.
+    :param header_text: The main header of the slide.
+    :param background_color: The background color of the entire slide.
+    :param text_color: The default text color.
+    :param content_bg_color: Background color for the content box.
+    :param content_shadow: Box shadow for the content container.
+    :param header_color: Color of the header text.
+    :param text_body_color: Color of the body text.
+    :param highlight_color: Color for highlighted text.
+    :param font_family: The font family to use for all text.
+    :param paragraph_text: The content paragraph.
+    :param para_font_size: Font size of the paragraph text.
+    :return: A string containing the HTML code.
+    """
+    theme = (f":root {{ --font_family: {font_family}; --background_color: {background_color}; "
+             f"--content_bg_color: {content_bg_color}; --content_shadow: {content_shadow}; "
+             f"--text_body_color: {text_body_color}; --header_color: {header_color}; "
+             f"--header_font_size: {header_font_size}; --para_font_size: {para_font_size}; "
+             f"--highlight_color: {highlight_color}; }}")
+    return theme, f"""<div class="slide-container">
+    <div class="content-box">
+        <h1>{header_text}</h1>
+        <p>{paragraph_text}</p>
+    </div>
+</div>"""
+
+
+@tool(
+    description="Generate a professional HTML slide body with a split layout, including a title, subtitle, and multiple content paragraphs.",
+    params={
+        "title": "The main title of the slide",
+        "tile_font_size": "Font size of the title (Note: parameter name in function is 'tile_font_size', not 'title_font_size')",
+        "subtitle": "The subtitle of the slide",
+        "subtitle_font_size": "Font size of the subtitle",
+        "content_paragraphs": "A list of paragraphs to display in the right section. It should be contained paragraphs with long content.",
+        "left_bg_color": "Background color of the left section",
+        "right_bg_color": "Background color of the right section",
+        "text_color": "Text color of the content paragraphs",
+        "title_color": "Color of the title",
+        "subtitle_color": "Color of the subtitle",
+        "icon_color": "Color of the bottom decorative icons",
+        "corner_icon_color": "Color of the corner decorative icons",
+        "font_family": "Font family for the slide content",
+    },
+    fit=BODY_SLIDE3_FIT,
+)
+@BODY_SLIDE3_TEMPLATE.function
+def generate_body_slide3(
+    title="title",
+    tile_font_size = "42px",
+    subtitle="subtitle",
+    subtitle_font_size = "32px",
+    content_paragraphs=[
+        "Paragraph 1: Present with ease and wow any audience with Canva Presentations. Choose from over a thousand professionally-made templates to fit any objective or topic. Make it your own by customizing it with text and photos.",
+        "Paragraph 2: Present with ease and wow any audience with Canva Presentations. Choose from over a thousand professionally-made templates to fit any objective or topic. Make it your own by customizing it with text and photos."
+    ],
+    left_bg_color="#F3F6FA",
+    right_bg_color="#cdecda",
+    text_color="#333333",
+    title_color="#000000",
+    subtitle_color="#333333",
+    icon_color="#FF9800",
+    corner_icon_color="#3D5AFE",
+    font_family="Roboto, Arial, sans-serif"
+):
+    paragraphs_html = "".join(f"<p>{p}</p>" for p in content_paragraphs)
+    theme = (f":root {{ --font_family: {font_family}; --left_bg_color: {left_bg_color}; "
+             f"--tile_font_size: {tile_font_size}; --title_color: {title_color}; "
+             f"--subtitle_font_size: {subtitle_font_size}; --subtitle_color: {subtitle_color}; "
+             f"--right_bg_color: {right_bg_color}; --text_color: {text_color}; "
+             f"--corner_icon_color: {corner_icon_color}; --icon_color: {icon_color}; }}")
+    return theme, f"""<div class="slide-container">
+    <div class="left-container">
+        <div class="title">{title}</div>
+        <div class="subtitle">{subtitle}</div>
+    </div>
+    <div class="right-container">
+        <div class="corner-icons">
+            <span></span><span></span><span></span>
+        </div>
+        {paragraphs_html}
+        <div class="bottom-icons">
+            <span></span><span></span><span></span>
+        </div>
+    </div>
+</div>"""
+
+
+@tool(
+    description="Generate a structured HTML slide with two content sections and an image (or an image placeholder).",
+    params={
+        "title": "The main title of the slide",
+        "title_font_size": "Font size of the title",
+        "subtitle1": "Subtitle for the first content section",
+        "subtitle2": "Subtitle for the second content section",
+        "subtile_font_size": "Font size of the subtitles (Note: parameter name in function is 'subtile_font_size', not 'subtitle_font_size')",
+        "content_1": "The content for the first section",
+        "content_2": "The content for the second section",
+        "content_font_size": "Font size of the content text",
+        "bg_color": "The main background color of the slide",
+        "title_color": "The text color of the title",
+        "content_color": "The text color of the content sections",
+        "number_bg_color": "The background color of the numbered elements",
+        "number_text_color": "The text color of the numbered elements",
+        "image_bg_color": "The background color of the image container",
+        "image_width": "The width of the image container",
+        "image_height": "The height of the image container",
+        "image_url": "URL of an image to show, copied exactly from an '[image: URL]' line of the content; empty for a placeholder",
+        "border_radius": "The border radius applied to various elements",
+        "font_family": "The font family used for the slide content",
+    },
+    fit=BODY_SLIDE5_FIT,
+)
+@BODY_SLIDE5_TEMPLATE.function
+def generate_body_slide5(
+    title="Title",
+    title_font_size="42px",
+    subtitle1 = "Subtitle1",
+    subtitle2 = "Subtitle2",
+    subtile_font_size="24px",
+    content_1="Lorem ipsum dolor sit amet, consectetur adipiscing elit. Mauris eleifend magna in sem rutrum luctus. Sed ullamcorper diam non venenatis dictum. Integer malesuada molestie mauris at scelerisque. Sed sit amet tempor nulla.",
+    content_2="Lorem ipsum dolor sit amet, consectetur adipiscing elit. Mauris eleifend magna in sem rutrum luctus. Sed ullamcorper diam non venenatis dictum. Integer malesuada molestie mauris at scelerisque. Sed sit amet tempor nulla.",
+    content_font_size="20px",
+    bg_color="#0277BD",  # Màu nền chính
+    title_color="#FFFFFF",  # Màu chữ tiêu đề
+    content_color="#E1F5FE",  # Màu chữ nội dung
+    number_bg_color="#039BE5",  # Màu nền số thứ tự
+    number_text_color="#FFFFFF",  # Màu chữ số thứ tự
+    image_bg_color="#E1F5FE",  # Màu nền khung chứa ảnh
+    image_width="70%",  # Chiều rộng khung chứa ảnh
+    image_height="60%",  # Chiều cao khung chứa ảnh
+    border_radius="10px",  # Độ bo tròn cho các phần tử
+    font_family="Roboto, Arial, sans-serif",  # Font chữ
+    image_url="",  # URL ảnh trong tài liệu (media store)
+):
+    """
+    Generate a professional HTML slide body with customizable parameters.
+    :param title: Tiêu đề của slide.
+    :param content_1: Nội dung phần 01.
+    :param content_2: Nội dung phần 02.
+    :param bg_color: Màu nền chính.
+    :param title_color: Màu chữ tiêu đề.
+    :param content_color: Màu chữ nội dung.
+    :param number_bg_color: Màu nền số thứ tự.
+    :param number_text_color: Màu chữ số thứ tự.
+    :param image_bg_color: Màu nền khung chứa ảnh.
+    :param image_width: Chiều rộng khung chứa ảnh.
+    :param image_height: Chiều cao khung chứa ảnh.
+    :param border_radius: Độ bo tròn cho các phần tử.
+    :param font_family: Font chữ sử dụng.
+    :param image_url: URL ảnh lấy từ tài liệu.
+    :return: Mã HTML của slide.
+    """
+    image_html = _image_html(image_url)
+    theme = (f":root {{ --font_family: {font_family}; --bg_color: {bg_color}; "
+             f"--content_color: {content_color}; --title_font_size: {title_font_size}; "
+             f"--title_color: {title_color}; --number_bg_color: {number_bg_color}; "
+             f"--number_text_color: {number_text_color}; --subtile_font_size: {subtile_font_size}; "
+             f"--border_radius: {border_radius}; --content_font_size: {content_font_size}; "
+             f"--image_width: {image_width}; --image_height: {image_height}; "
+             f"--image_bg_color: {image_bg_color}; }}")
+    return theme, f"""<div class="container">
+    <div class="left-section">
+        <h1 class="title">{title}</h1>
+        <div class="number">{subtitle1}</div>
+        <p class="content">{content_1}</p>
+        <div class="number">{subtitle2}</div>
+        <p class="content">{content_2}</p>
+    </div>
+    <div class="right-section">
+        <div class="image-container">{image_html}</div>
+        <div class="bubble bubble-1"></div>
+        <div class="bubble bubble-2"></div>
+        <div class="bubble bubble-3"></div>
+    </div>
+</div>"""
+
+
+@tool(
+    description="Generate a professional HTML slide body with a main title and multiple sections, each containing a subtitle and a list of bullet points.",
+    params={
+        "title": "The main title of the slide",
+        "sections": "A dictionary where keys are section subtitles and values are lists of bullet points for each section. Limited to a maximum of 4 subtitles. The total word count of all bullet points per subtitle must not exceed 50 words. If not provided, defaults to three sections with sample content.",
+        "title_font_size": "Font size of the main title",
+        "section_title_font_size": "Font size of the section subtitles",
+        "section_content_font_size": "Font size of the bullet point content",
+        "title_color": "Color of the main title and the divider line",
+        "title_font_family": "Font family for the main title",
+        "subtitle_bg_color": "Background color of the section subtitles",
+        "subtitle_text_color": "Text color of the section subtitles",
+        "box_border_color": "Color of the border around each section box",
+        "box_border_radius": "Border radius for the section boxes",
+        "box_padding": "Padding inside each section box",
+        "box_shadow": "Box shadow effect for each section box",
+        "font_family": "Font family for the overall slide content",
+        "bullet_color": "Color of the bullet point text",
+    },
+    fit=BODY_SLIDE6_FIT,
+)
+@BODY_SLIDE6_TEMPLATE.function
+def generate_body_slide6(
+    title="TITLE",
+    sections=None,
+    title_font_size="42px",
+    section_title_font_size="24px",
+    section_content_font_size="20px",
+    title_color="#1a1a1a",
+    title_font_family="Roboto, Arial, sans-serif",
+    subtitle_bg_color="#1a1a1a",
+    subtitle_text_color="#ffffff",
+    box_border_color="#1a1a1a",
+    box_border_radius="12px",
+    box_padding="20px",
+    box_shadow="0 4px 12px rgba(0, 0, 0, 0.15)",
+    font_family="Roboto, Arial, sans-serif",
+    bullet_color="#333",
+):
+    sections = DEFAULT_SECTIONS if sections is None else sections
+    sections_html = _sections_html(sections)
+    theme = (f":root {{ --font_family: {font_family}; --title_font_size: {title_font_size}; "
+             f"--title_font_family: {title_font_family}; --title_color: {title_color}; "
+             f"--box_border_color: {box_border_color}; --box_border_radius: {box_border_radius}; "
+             f"--box_shadow: {box_shadow}; --subtitle_bg_color: {subtitle_bg_color}; "
+             f"--subtitle_text_color: {subtitle_text_color}; "
+             f"--section_title_font_size: {section_title_font_size}; --box_padding: {box_padding}; "
+             f"--section_content_font_size: {section_content_font_size}; "
+             f"--bullet_color: {bullet_color}; }}")
+    return theme, f"""<div class="title">{title}</div>
+<div class="divider">
+    <div class="dots">
+        <div class="dot"></div>
+        <div class="dot"></div>
+        <div class="dot"></div>
+    </div>
+</div>
+<div class="sections-container">
+    {sections_html}
+</div>"""
+
+
+@tool(
+    description="Generate a professional HTML slide body with a centered title and a paragraph of content, enhanced with decorative semi-transparent circular corners.",
+    params={
+        "title": "The main title of the slide",
+        "content": "The main content paragraph",
+        "title_font_size": "Font size of the main title",
+        "content_font_size": "Font size of the content paragraph",
+        "bg_color": "Background color of the entire slide body",
+        "title_color": "Color of the main title text",
+        "content_color": "Color of the content paragraph text",
+        "corner_decoration_color": "Color of the semi-transparent circular decorations in the corners",
+        "font_family": "Font family for both title and content",
+    },
+    fit=BODY_SLIDE7_FIT,
+)
+@BODY_SLIDE7_TEMPLATE.function
+def generate_body_slide7(
+    title="Title",
+    content="Lorem ipsum dolor sit amet, consectetur adipiscing elit. Duis vel dolor ante. Nullam feugiat egestas elit et vehicula. Proin venenatis, orci nec cursus tristique, nulla risus mattis eros, id accumsan massa elit eu augue. Mauris massa ipsum, pharetra id nibh eget, sodales facilisis enim.",
+    title_font_size="42px",
+    content_font_size="24px",
+    bg_color="#FFFBEB",
+    title_color="#000000",
+    content_color="#333333",
+    corner_decoration_color="#FDE68A",
+    font_family="Roboto, Arial, sans-serif"
+):
+    theme = (f":root {{ --bg_color: {bg_color}; --font_family: {font_family}; "
+             f"--corner_decoration_color: {corner_decoration_color}; "
+             f"--title_font_size: {title_font_size}; --title_color: {title_color}; "
+             f"--content_font_size: {content_font_size}; --content_color: {content_color}; }}")
+    return theme, f"""<div class="slide-container">
+    <div class="corner-decoration top-left"></div>
+    <div class="corner-decoration bottom-right"></div>
+    <h1 class="title">{title}</h1>
+    <p class="content">{content}</p>
+</div>"""
+
+
+@tool(
+    description="Generate a professional HTML slide body with a centered title and a list of bullet points, enhanced with decorative semi-transparent circular corners.",
+    params={
+        "title": "The main title of the slide",
+        "points": "A list of bullet points to be displayed",
+        "title_font_size": "Font size of the main title",
+        "content_font_size": "Font size of the bullet point text",
+        "bg_color": "Background color of the entire slide body",
+        "title_color": "Color of the main title text",
+        "content_color": "Color of the bullet point text",
+        "corner_decoration_color": "Color of the semi-transparent circular decorations in the corners",
+        "font_family": "Font family for both title and content",
+    },
+    fit=BODY_SLIDE8_FIT,
+)
+@BODY_SLIDE8_TEMPLATE.function
+def generate_body_slide8(
+    title="DISCUSSION",
+    points=[
+        "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Duis vel dolor ante.",
+        "Nullam feugiat egestas elit et vehicula. Proin venenatis, orci nec cursus tristique."
+    ],
+    title_font_size="42px",
+    content_font_size="24px",
+    bg_color="#FFFBEB",
+    title_color="#000000",
+    content_color="#333333",
+    corner_decoration_color="#FDE68A",
+    font_family="Roboto, Arial, sans-serif"
+):
+    points_html = "".join(f"<li>{point}</li>" for point in points)
+    theme = (f":root {{ --bg_color: {bg_color}; --font_family: {font_family}; "
+             f"--corner_decoration_color: {corner_decoration_color}; "
+             f"--title_font_size: {title_font_size}; --title_color: {title_color}; "
+             f"--content_font_size: {content_font_size}; --content_color: {content_color}; }}")
+    return theme, f"""<div class="slide-container">
+    <div class="corner-decoration top-left"></div>
+    <div class="corner-decoration bottom-right"></div>
+    <h1 class="title">{title}</h1>
+    <div class="content">
+        <ul>
+            {points_html}
+        </ul>
+    </div>
+</div>"""
+
+
+@tool(
+    params={
+        "title_font_size": "Font size of the title",
+        "title_font_style": "Font style for the title (e.g., 'italic')",
+        "title_margin_bottom": "Bottom margin for the title",
+        "title_margin_left": "Left margin for the title",
+    },
+    fit=DOTS_LAYOUT_FIT,
+)
+@CONCLUSION_SLIDE_TEMPLATE.function
+def generate_conclusion_slide(
+    # Title parameters
+    title="Conclusion",
+    title_color='#0F4662',
+    title_font_size="32px",
+    title_font_style="italic",
+    title_margin_bottom="5px",
+    title_margin_left="40px",
+
+    # Content parameters
+    content_text="Content",
+    content_color="#0F4662",
+    content_font_size="16px",
+    content_line_height="1.6",
+    content_width="70%",
+    content_margin="0 auto",
+    content_text_align="center",
+
+    # Decoration parameters
+    dot_color="#0F4662",
+    dot_size="10px",
+    dot_margin="0 5px",
+    dot_count=5,
+    line_color="#1a3d5c",
+    line_width="50%",
+    line_height="2px",
+    line_margin="30px auto",
+
+    # Slide parameters
+    slide_bg_color="#f5f5f5",
+    font_family="Roboto, Arial, sans-serif",
+    additional_css=""
+):
+    """
+    Generates a customizable HTML slide with a 'Conclusion' layout featuring dots and lines as decorations.
+
+    Args:
+        title: Slide title text
+        title_color: Color of the title
+        title_font_size: Font size of title
+        title_font_style: Font style for title (e.g., "italic")
+        title_margin_bottom: Bottom margin for title
+        title_margin_left: Left margin for title
+
+        content_text: Main content text
+        content_color: Color of content text
+        content_font_size: Font size of content
+        content_line_height: Line height for content
+        content_width: Width of content container
+        content_margin: Margin around content
+        content_text_align: Text alignment for content
+
+        dot_color: Color of decorative dots
+        dot_size: Size of decorative dots
+        dot_margin: Margin between dots
+        dot_count: Number of dots in each row
+        line_color: Color of horizontal lines
+        line_width: Width of horizontal lines
+        line_height: Height/thickness of horizontal lines
+        line_margin: Margin around horizontal lines
+
+        slide_bg_color: Background color of the slide
+        font_family: Font family for all text
+        additional_css: Additional CSS styles
+    """
+    return _dots_layout_parts(title, title_color, title_font_size, title_font_style, title_margin_bottom,
+                              title_margin_left, content_text, content_color, content_font_size,
+                              content_line_height, content_width, content_margin, content_text_align,
+                              dot_color, dot_size, dot_margin, dot_count, line_color, line_width, line_height,
+                              line_margin, slide_bg_color, font_family, additional_css)
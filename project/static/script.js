@@ -1,3 +1,23 @@
+// Các slide của editor, theo thứ tự. Mỗi slide là một object (key, URL trên server,
+// id/version, ảnh, thumbnail); sidebar chỉ tạo DOM cho các slide đang nhìn thấy.
+const deckSlides = [];
+let activeSlide = null;
+let currentDeck = null;
+// HTML của các slide chưa có trên server (slide mới, slide đang sinh, slide đã sửa);
+// slide của deck đã lưu chỉ được tải về khi mở
+const slideContents = new Map();
+let nextSlideKey = 0;
+// Slide đã sửa được lưu lên server (PATCH từng slide) sau khi ngừng gõ
+const SAVE_DELAY_MS = 800;
+const saveTimers = new Map();
+const slideSaves = new Map();
+// Chiều cao cố định của một mục trong sidebar (khớp .slide-item trong styles.css + margin)
+const SLIDE_ITEM_HEIGHT = 188;
+// Số mục render thêm phía trên/dưới vùng nhìn thấy
+const SLIDE_LIST_OVERSCAN = 4;
+let thumbnailObserver = null;
+let slideListFrame = null;
+
 document.addEventListener('DOMContentLoaded', function() {
     const docxInput = document.getElementById('docxFile');
     if (docxInput) {
@@ -21,11 +41,29 @@ document.addEventListener('DOMContentLoaded', function() {
     if (slideContainer) {
         slideContainer.addEventListener('mouseup', updateToolbarFromSelection);
     }
+
+    const slideList = document.getElementById('slideList');
+    if (slideList) {
+        slideList.addEventListener('scroll', scheduleSlideListRender);
+        window.addEventListener('resize', scheduleSlideListRender);
+        slideList.addEventListener('click', onSlideListClick);
+        // Thumbnail chỉ tải khi mục của nó sắp cuộn tới
+        thumbnailObserver = new IntersectionObserver(entries => {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) {
+                    entry.target.src = entry.target.dataset.src;
+                    thumbnailObserver.unobserve(entry.target);
+                }
+            });
+        }, { root: slideList, rootMargin: '200px 0px' });
+    }
 });
 
 function showEditor() {
     document.getElementById('homePage').style.display = 'none';
     document.getElementById('editorPage').style.display = 'block';
+    // Sidebar vừa hiện: tính lại các mục nằm trong vùng nhìn thấy
+    scheduleSlideListRender();
 }
 
 function showHome() {
@@ -74,8 +112,8 @@ async function handleDocxImport() {
         const formData = new FormData();
         formData.append('file', file);
 
-        console.log('Sending DOCX file to /api/upload-docx'); // Debug
-        const response = await fetch('/api/upload-docx', {
+        console.log('Submitting DOCX file to /api/jobs'); // Debug
+        const response = await fetch('/api/jobs', {
             method: 'POST',
             body: formData
         });
@@ -85,19 +123,13 @@ async function handleDocxImport() {
             throw new Error(`Upload DOCX failed with status ${response.status}`);
         }
 
-        const data = await response.json();
-        console.log('Response data:', data); // Debug
-        if (data.slides && data.slides.length > 0) {
-            const slideList = document.getElementById('slideList');
-            slideList.innerHTML = '';
-
-            data.slides.forEach((slide, index) => {
-                addNewSlide(slide.content, index + 1);
-            });
-
-            selectFirstSlide();
-            showEditor();
+        const job = await response.json();
+        console.log('Job submitted:', job); // Debug
+        const slideCount = await followDeckJob(job.job_id);
+        if (slideCount > 0) {
             showToast('Import DOCX thành công!', 'success');
+        } else {
+            showToast('Không tạo được slide nào từ file DOCX', 'error');
         }
     } catch (error) {
         console.error('Error in handleDocxImport:', error);
@@ -107,6 +139,74 @@ async function handleDocxImport() {
     }
 }
 
+// Nhận slide qua Server-Sent Events ngay khi từng slide được chấp nhận;
+// trả về số slide khi job xong
+function followDeckJob(jobId) {
+    return new Promise((resolve, reject) => {
+        const events = new EventSource(`/api/jobs/${jobId}/events`);
+        let received = 0;
+
+        events.addEventListener('slide', (e) => {
+            const slide = JSON.parse(e.data);
+            if (received === 0) {
+                // Deck mới chưa được công bố: slide chưa có id trên server
+                resetSlides();
+            }
+            received += 1;
+            addNewSlide(slide.content, {
+                thumbnailUrl: slide.thumbnails ? slide.thumbnails.grid : null,
+                imageUrl: slide.preview
+            });
+            if (received === 1) {
+                // Slide đầu tiên: mở editor luôn, các slide sau được thêm dần vào danh sách
+                selectFirstSlide();
+                showEditor();
+                hideLoading();
+            }
+        });
+
+        events.addEventListener('progress', (e) => {
+            const progress = JSON.parse(e.data);
+            if (received === 0) {
+                showLoading(`Đang tạo slide ${(progress.slides_done || 0) + 1}...`);
+            }
+        });
+
+        events.addEventListener('status', async (e) => {
+            const status = JSON.parse(e.data);
+            if (status.status === 'failed') {
+                events.close();
+                reject(new Error(status.error || 'Job failed'));
+            } else if (status.status === 'done') {
+                events.close();
+                try {
+                    // Phòng khi mất sự kiện (kết nối lại quá muộn): lấy cả deck từ kết quả job
+                    const response = await fetch(`/api/jobs/${jobId}/result`);
+                    if (!response.ok) {
+                        throw new Error(`Fetching result failed with status ${response.status}`);
+                    }
+                    const deck = await response.json();
+                    if (deck.slides.length !== received) {
+                        loadDeck(deck);
+                    } else {
+                        attachDeck(deck);
+                    }
+                    resolve(deck.slides.length);
+                } catch (error) {
+                    reject(error);
+                }
+            }
+        });
+
+        events.onerror = () => {
+            // EventSource tự kết nối lại; chỉ dừng khi trình duyệt đã đóng hẳn kết nối
+            if (events.readyState === EventSource.CLOSED) {
+                reject(new Error('Mất kết nối tới server'));
+            }
+        };
+    });
+}
+
 async function handleZipImport() {
     const zipInput = document.getElementById('zipFile');
     if (zipInput.files.length === 0) {
@@ -131,18 +231,10 @@ async function handleZipImport() {
             throw new Error(`Upload ZIP failed with status ${response.status}`);
         }
 
-        const data = await response.json();
-        console.log('Response data:', data); // Debug
-        if (data.slides && data.slides.length > 0) {
-            const slideList = document.getElementById('slideList');
-            slideList.innerHTML = '';
-
-            data.slides.forEach((slide, index) => {
-                addNewSlide(slide.content, index + 1);
-            });
-
-            selectFirstSlide();
-            showEditor();
+        const deck = await response.json();
+        console.log('Response data:', deck); // Debug
+        if (deck.slides && deck.slides.length > 0) {
+            loadDeck(deck);
             showToast('Import ZIP thành công!', 'success');
         } else {
             showToast('Không tìm thấy slide nào trong ZIP', 'error');
@@ -155,9 +247,150 @@ async function handleZipImport() {
     }
 }
 
+// Danh sách slide của deck trên server: chỉ thumbnail và URL, HTML tải khi mở slide
+function loadDeck(deck) {
+    resetSlides();
+    currentDeck = deck.deck_id;
+    deck.slides.forEach(slide => {
+        addNewSlide(null, {
+            thumbnailUrl: slide.thumbnails ? slide.thumbnails.grid : null,
+            imageUrl: slide.preview,
+            contentUrl: slide.url,
+            slideId: slide.id,
+            version: slide.version
+        });
+    });
+    if (deck.slides.length > 0) {
+        selectFirstSlide();
+        showEditor();
+    }
+}
+
+// Các slide đã nhận qua SSE thuộc deck vừa công bố: gắn URL trên server và bỏ HTML
+// đang giữ trong bộ nhớ (trừ slide người dùng đã sửa)
+function attachDeck(deck) {
+    currentDeck = deck.deck_id;
+    deckSlides.forEach((slide, index) => {
+        const stored = deck.slides[index];
+        slide.src = stored.url;
+        slide.slideId = stored.id;
+        slide.version = stored.version;
+        if (slide.edited) {
+            // Sửa trong lúc deck đang sinh: giờ mới lưu được lên server
+            scheduleSlideSave(slide);
+        } else {
+            slideContents.delete(slide.key);
+        }
+    });
+}
+
+function resetSlides() {
+    deckSlides.length = 0;
+    slideContents.clear();
+    saveTimers.forEach(timer => clearTimeout(timer));
+    saveTimers.clear();
+    activeSlide = null;
+    currentDeck = null;
+    document.getElementById('slideList').scrollTop = 0;
+    renderSlideList();
+}
+
+function currentDeckId() {
+    return currentDeck;
+}
+
+function scheduleSlideSave(slide) {
+    if (!currentDeckId() || !slide.slideId) {
+        return;
+    }
+    clearTimeout(saveTimers.get(slide));
+    saveTimers.set(slide, setTimeout(() => saveSlide(slide), SAVE_DELAY_MS));
+}
+
+// Các lần lưu của cùng một slide chạy nối tiếp: lần sau gửi version mà lần trước trả về
+function saveSlide(slide) {
+    saveTimers.delete(slide);
+    const previous = slideSaves.get(slide) || Promise.resolve();
+    const next = previous.then(() => sendSlide(slide)).catch(error => {
+        console.error('Error saving slide:', error);
+        showToast(`Lỗi khi lưu slide: ${error.message}`, 'error');
+    });
+    slideSaves.set(slide, next);
+    return next;
+}
+
+async function sendSlide(slide) {
+    const content = slideContents.get(slide.key);
+    if (content === undefined || !deckSlides.includes(slide)) {
+        return;
+    }
+    const response = await fetch(`/api/decks/${currentDeckId()}/slides/${slide.slideId}`, {
+        method: 'PATCH',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ content: content, version: slide.version })
+    });
+    if (response.status === 409) {
+        // Giữ bản sửa trong trình duyệt, không ghi đè thay đổi của người khác
+        throw new Error('Slide đã được thay đổi ở nơi khác, hãy tải lại deck');
+    }
+    if (!response.ok) {
+        throw new Error(`Saving slide failed with status ${response.status}`);
+    }
+    const stored = await response.json();
+    slide.version = stored.version;
+    // Nếu slide lại bị sửa trong lúc gửi thì giữ bản mới để lưu ở lần sau
+    if (slideContents.get(slide.key) === content) {
+        slideContents.delete(slide.key);
+        slide.edited = false;
+    }
+}
+
+async function createDeckSlide(slide) {
+    const response = await fetch(`/api/decks/${currentDeckId()}/slides`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ content: slideContents.get(slide.key) })
+    });
+    if (!response.ok) {
+        throw new Error(`Creating slide failed with status ${response.status}`);
+    }
+    const stored = await response.json();
+    slide.slideId = stored.id;
+    slide.version = stored.version;
+    slide.src = stored.url;
+    if (slide.edited) {
+        scheduleSlideSave(slide);
+    } else {
+        slideContents.delete(slide.key);
+    }
+}
+
+async function deleteDeckSlide(slide) {
+    const deckId = currentDeckId();
+    if (!deckId || !slide.slideId) {
+        return;
+    }
+    clearTimeout(saveTimers.get(slide));
+    saveTimers.delete(slide);
+    await slideSaves.get(slide);
+    const response = await fetch(`/api/decks/${deckId}/slides/${slide.slideId}?version=${slide.version}`,
+                                 { method: 'DELETE' });
+    if (!response.ok && response.status !== 404) {
+        throw new Error(`Deleting slide failed with status ${response.status}`);
+    }
+}
+
+// Gửi ngay các bản sửa đang chờ; trả về true khi mọi slide đều đã có trên server
+async function flushSlideSaves() {
+    const pending = Array.from(saveTimers.keys()).map(slide => {
+        clearTimeout(saveTimers.get(slide));
+        return saveSlide(slide);
+    });
+    await Promise.all([...pending, ...slideSaves.values()]);
+    return currentDeckId() !== null && deckSlides.every(slide => slide.slideId && !slide.edited);
+}
+
 function createNewSlide() {
-    const slideList = document.getElementById('slideList');
-    const slideCount = slideList.children.length + 1;
     const defaultContent = `
         <!DOCTYPE html>
         <html>
@@ -223,93 +456,224 @@ function createNewSlide() {
             </body>
         </html>
     `;
-    addNewSlide(defaultContent, slideCount);
+    const slide = addNewSlide(defaultContent);
     showEditor();
+    openSlide(slide);
+    if (currentDeckId()) {
+        createDeckSlide(slide).catch(error => {
+            console.error('Error creating slide:', error);
+            showToast(`Lỗi khi lưu slide mới: ${error.message}`, 'error');
+        });
+    }
+}
+
+function addNewSlide(content, { thumbnailUrl = null, imageUrl = null, contentUrl = null,
+                                slideId = null, version = null } = {}) {
+    const slide = {
+        key: nextSlideKey++,
+        src: contentUrl,
+        slideId: slideId,
+        version: version,
+        edited: false,
+        // Ảnh gốc của slide trên server: xuất PDF dùng lại ảnh này khi slide chưa bị sửa
+        image: imageUrl,
+        thumbnailUrl: thumbnailUrl
+    };
+    if (content !== null) {
+        slideContents.set(slide.key, content);
+    }
+    deckSlides.push(slide);
+    scheduleSlideListRender();
+    return slide;
+}
+
+function scheduleSlideListRender() {
+    if (slideListFrame === null) {
+        slideListFrame = requestAnimationFrame(() => {
+            slideListFrame = null;
+            renderSlideList();
+        });
+    }
 }
 
-function addNewSlide(content, index) {
+// Sidebar ảo: chỉ các mục trong vùng nhìn thấy (cộng overscan) có DOM, đặt tuyệt đối
+// trong một spacer cao bằng cả danh sách
+function renderSlideList() {
     const slideList = document.getElementById('slideList');
+    let spacer = slideList.querySelector('.slide-list-spacer');
+    if (!spacer) {
+        slideList.innerHTML = '<div class="slide-list-spacer"></div>';
+        spacer = slideList.firstElementChild;
+    }
+    spacer.style.height = `${deckSlides.length * SLIDE_ITEM_HEIGHT}px`;
+
+    const first = Math.max(0, Math.floor(slideList.scrollTop / SLIDE_ITEM_HEIGHT) - SLIDE_LIST_OVERSCAN);
+    const last = Math.min(deckSlides.length,
+        Math.ceil((slideList.scrollTop + slideList.clientHeight) / SLIDE_ITEM_HEIGHT) + SLIDE_LIST_OVERSCAN);
+
+    const rendered = new Map();
+    Array.from(spacer.children).forEach(item => {
+        const index = Number(item.dataset.index);
+        if (index >= first && index < last && deckSlides[index] && deckSlides[index].key === Number(item.dataset.key)) {
+            rendered.set(index, item);
+        } else {
+            const thumb = item.querySelector('.slide-thumb');
+            if (thumb) {
+                thumbnailObserver.unobserve(thumb);
+            }
+            item.remove();
+        }
+    });
+    for (let index = first; index < last; index++) {
+        const item = rendered.get(index) || createSlideItem(deckSlides[index], index);
+        item.classList.toggle('active', deckSlides[index] === activeSlide);
+        if (!item.isConnected) {
+            spacer.appendChild(item);
+        }
+    }
+}
+
+function createSlideItem(slide, index) {
     const slideDiv = document.createElement("div");
     slideDiv.className = "slide-item";
+    slideDiv.dataset.index = index;
+    slideDiv.dataset.key = slide.key;
+    slideDiv.style.top = `${index * SLIDE_ITEM_HEIGHT}px`;
+    // Thumbnail nhỏ (grid): src chỉ được gán khi IntersectionObserver thấy mục sắp hiện
+    const thumbnailHtml = slide.thumbnailUrl
+        ? `<img class="slide-thumb" data-src="${slide.thumbnailUrl}" decoding="async" width="240" height="135" alt="Slide ${index + 1}">`
+        : '<div class="slide-thumb slide-thumb-empty"></div>';
     slideDiv.innerHTML = `
-        <div class="slide-title">Slide ${index}</div>
-        <div class="slide-content" style="display: none;">
-            ${content}
-        </div>
+        <div class="slide-title">Slide ${index + 1}</div>
+        ${thumbnailHtml}
         <button class="btn btn-sm btn-light delete-slide" title="Xóa slide">
             <i class="bi bi-x-lg"></i>
         </button>
     `;
+    const thumb = slideDiv.querySelector('img.slide-thumb');
+    if (thumb) {
+        thumbnailObserver.observe(thumb);
+    }
+    return slideDiv;
+}
 
-    slideDiv.addEventListener("click", function(e) {
-        if (!e.target.closest('.delete-slide')) {
-            document.querySelectorAll(".slide-item").forEach(item => {
-                item.classList.remove("active");
-            });
-            this.classList.add("active");
-            
-            const slideContent = this.querySelector(".slide-content").innerHTML;
-            const slideContainer = document.getElementById('slideContainer');
-            if (slideContainer) {
-                renderSlideInContainer(slideContent, slideContainer);
-            }
-        }
-    });
-
-    const deleteBtn = slideDiv.querySelector(".delete-slide");
-    deleteBtn.addEventListener("click", function(e) {
+// Một listener cho cả sidebar: các mục được tạo/xóa liên tục khi cuộn
+function onSlideListClick(e) {
+    const item = e.target.closest('.slide-item');
+    if (!item) {
+        return;
+    }
+    const slide = deckSlides[Number(item.dataset.index)];
+    if (e.target.closest('.delete-slide')) {
         e.stopPropagation();
         if (confirm("Bạn có chắc muốn xóa slide này?")) {
-            slideDiv.remove();
+            removeSlide(slide);
+        }
+    } else {
+        openSlide(slide);
+    }
+}
+
+function removeSlide(slide) {
+    deleteDeckSlide(slide).then(() => {
+        const index = deckSlides.indexOf(slide);
+        if (index === -1) {
+            return;
+        }
+        deckSlides.splice(index, 1);
+        slideContents.delete(slide.key);
+        slideSaves.delete(slide);
+        // Các mục phía sau đổi vị trí: dựng lại phần đang hiển thị
+        document.getElementById('slideList').innerHTML = '';
+        if (slide === activeSlide) {
+            activeSlide = null;
+            const next = deckSlides[Math.min(index, deckSlides.length - 1)];
+            if (next) {
+                openSlide(next);
+            }
         }
+        renderSlideList();
+    }).catch(error => {
+        console.error('Error deleting slide:', error);
+        showToast(`Lỗi khi xóa slide: ${error.message}`, 'error');
     });
+}
 
-    slideList.appendChild(slideDiv);
+async function getSlideContent(slide) {
+    if (slideContents.has(slide.key)) {
+        return slideContents.get(slide.key);
+    }
+    // Server trả ETag + no-cache: trình duyệt gửi If-None-Match và nhận 304 khi slide không đổi
+    const response = await fetch(slide.src);
+    if (!response.ok) {
+        throw new Error(`Fetching slide failed with status ${response.status}`);
+    }
+    return response.text();
 }
 
-function selectFirstSlide() {
-    const firstSlide = document.querySelector(".slide-item");
-    if (firstSlide) {
-        firstSlide.classList.add("active");
-        const slideContent = firstSlide.querySelector(".slide-content").innerHTML;
+async function openSlide(slide) {
+    activeSlide = slide;
+    renderSlideList();
+    try {
+        const slideContent = await getSlideContent(slide);
+        // Người dùng đã chọn slide khác trong lúc đang tải
+        if (activeSlide !== slide) {
+            return;
+        }
         const slideContainer = document.getElementById('slideContainer');
         if (slideContainer) {
             renderSlideInContainer(slideContent, slideContainer);
         }
+    } catch (error) {
+        console.error('Error loading slide:', error);
+        showToast(`Lỗi khi tải slide: ${error.message}`, 'error');
     }
 }
 
-function renderSlideInContainer(content, container) {
+function selectFirstSlide() {
+    if (deckSlides.length > 0) {
+        openSlide(deckSlides[0]);
+    }
+}
+
+// Một iframe (sandbox, không cùng origin với editor) và một vùng soạn thảo được dùng
+// lại cho mọi slide; chọn slide khác chỉ đổi srcdoc của iframe
+let slideView = null;
+
+function getSlideView(container) {
+    if (slideView && container.contains(slideView.wrapper)) {
+        return slideView;
+    }
+    container.innerHTML = `
+        <div class="slide-wrapper">
+            <div class="slide-styles"></div>
+        </div>
+    `;
+    const wrapper = container.querySelector('.slide-wrapper');
     const iframe = document.createElement('iframe');
     iframe.style.width = '1920px';
     iframe.style.height = '1080px';
     iframe.style.border = 'none';
     iframe.style.pointerEvents = 'none'; // Cho phép nhấp qua iframe
-
-    const blob = new Blob([content], { type: 'text/html' });
-    let url = URL.createObjectURL(blob);
-    iframe.src = url;
-
-    const parser = new DOMParser();
-    const doc = parser.parseFromString(content, 'text/html');
-    const bodyContent = doc.body.innerHTML;
-    const styles = Array.from(doc.head.getElementsByTagName('style')).map(style => style.outerHTML).join('');
-    const bodyStyle = doc.body.getAttribute('style') || '';
+    iframe.setAttribute('sandbox', 'allow-scripts');
 
     const editorDiv = document.createElement('div');
     editorDiv.className = 'slide-editor';
     editorDiv.contentEditable = true;
-    editorDiv.innerHTML = bodyContent;
-    editorDiv.style.cssText = bodyStyle + '; width: 1920px; height: 1080px; display: none;';
+    editorDiv.style.display = 'none';
 
-    container.innerHTML = `
-        <div class="slide-wrapper">
-            ${styles}
-        </div>
-    `;
-    const wrapper = container.querySelector('.slide-wrapper');
     wrapper.appendChild(iframe);
     wrapper.appendChild(editorDiv);
+    slideView = {
+        wrapper: wrapper,
+        styleHolder: wrapper.querySelector('.slide-styles'),
+        iframe: iframe,
+        editorDiv: editorDiv,
+        content: '',
+        styles: '',
+        bodyStyle: '',
+        editing: false
+    };
 
     editorDiv.addEventListener('input', function() {
         const updatedContent = `
@@ -317,45 +681,65 @@ function renderSlideInContainer(content, container) {
             <html>
                 <head>
                     <meta charset="UTF-8">
-                    ${styles}
+                    ${slideView.styles}
                 </head>
-                <body style="${bodyStyle}">
+                <body style="${slideView.bodyStyle}">
                     ${editorDiv.innerHTML}
                 </body>
             </html>
         `;
-        const newBlob = new Blob([updatedContent], { type: 'text/html' });
-        const newUrl = URL.createObjectURL(newBlob);
-        iframe.src = newUrl;
+        slideView.content = updatedContent;
         updateSlideContent(updatedContent);
-        URL.revokeObjectURL(url);
-        url = newUrl;
     });
 
-    let isEditing = false;
     container.addEventListener('dblclick', function(e) {
         console.log('Double-click detected on slideContainer'); // Debug
-        isEditing = !isEditing;
-        iframe.style.display = isEditing ? 'none' : 'block';
-        iframe.style.pointerEvents = isEditing ? 'none' : 'auto'; // Bật/tắt tương tác với iframe
-        editorDiv.style.display = isEditing ? 'block' : 'none';
-        if (isEditing) {
-            editorDiv.focus();
-            console.log('Switched to edit mode'); // Debug
-        } else {
-            console.log('Switched to view mode'); // Debug
-        }
+        setSlideEditing(slideView, !slideView.editing);
     });
+    return slideView;
+}
+
+function renderSlideInContainer(content, container) {
+    const view = getSlideView(container);
+    view.content = content;
+    setSlideEditing(view, false);
+}
+
+function setSlideEditing(view, editing) {
+    view.editing = editing;
+    if (editing) {
+        // Chỉ parse HTML của slide khi vào chế độ chỉnh sửa
+        const doc = new DOMParser().parseFromString(view.content, 'text/html');
+        view.styles = Array.from(doc.head.querySelectorAll('link[rel="stylesheet"], style')).map(style => style.outerHTML).join('');
+        view.bodyStyle = doc.body.getAttribute('style') || '';
+        view.styleHolder.innerHTML = view.styles;
+        view.editorDiv.innerHTML = doc.body.innerHTML;
+        view.editorDiv.style.cssText = view.bodyStyle + '; width: 1920px; height: 1080px; display: block;';
+        view.iframe.style.display = 'none';
+        view.editorDiv.focus();
+        console.log('Switched to edit mode'); // Debug
+    } else {
+        view.styleHolder.innerHTML = '';
+        view.editorDiv.innerHTML = '';
+        view.editorDiv.style.display = 'none';
+        view.iframe.style.display = 'block';
+        // srcdoc dùng base URL của trang: các link /static/... (CSS chung của deck) vẫn tải được
+        if (view.iframe.srcdoc !== view.content) {
+            view.iframe.srcdoc = view.content;
+        }
+        console.log('Switched to view mode'); // Debug
+    }
 }
 
 function updateSlideContent(updatedContent) {
-    const activeSlide = document.querySelector(".slide-item.active");
     if (activeSlide) {
-        const slideContent = activeSlide.querySelector(".slide-content");
-        slideContent.innerHTML = updatedContent;
+        slideContents.set(activeSlide.key, updatedContent);
+        activeSlide.edited = true;
+        // Slide đã sửa: ảnh cũ không còn đúng, phải render lại khi xuất
+        activeSlide.image = null;
+        scheduleSlideSave(activeSlide);
     }
 }
-
 function applyTextColor() {
     const colorPicker = document.getElementById('colorPicker');
     if (!colorPicker) {
@@ -487,18 +871,23 @@ function updateToolbarFromSelection() {
 }
 
 async function exportToPDF() {
-    const slides = Array.from(document.querySelectorAll('.slide-item')).map(item => {
-        return { content: item.querySelector('.slide-content').innerHTML };
-    });
-
     try {
         showLoading("Đang xuất PDF...");
-        const response = await fetch('/api/export-pdf', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(slides),
-            timeout: 300000
-        });
+        let response;
+        if (await flushSlideSaves()) {
+            // Deck đã lưu trên server: chỉ gửi id, server dùng lại ảnh của các slide chưa sửa
+            response = await fetch(`/api/decks/${currentDeckId()}/pdf`);
+        } else {
+            const slides = await Promise.all(deckSlides.map(async slide => {
+                return { content: await getSlideContent(slide), image: slide.image };
+            }));
+            response = await fetch('/api/export-pdf', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(slides),
+                timeout: 300000
+            });
+        }
 
         if (!response.ok) {
             throw new Error('Export PDF failed');
@@ -521,17 +910,21 @@ async function exportToPDF() {
 }
 
 async function exportToZip() {
-    const slides = Array.from(document.querySelectorAll('.slide-item')).map(item => {
-        return { content: item.querySelector('.slide-content').innerHTML };
-    });
-
     try {
         showLoading("Đang xuất ZIP...");
-        const response = await fetch('/api/save-slides', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(slides)
-        });
+        let response;
+        if (await flushSlideSaves()) {
+            response = await fetch(`/api/decks/${currentDeckId()}/download`);
+        } else {
+            const slides = await Promise.all(deckSlides.map(async slide => {
+                return { content: await getSlideContent(slide) };
+            }));
+            response = await fetch('/api/save-slides', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(slides)
+            });
+        }
 
         if (!response.ok) {
             throw new Error('Export ZIP failed');
@@ -0,0 +1,415 @@
+import fcntl
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Dọn dẹp static/output, temp, media, thumbs: mỗi thư mục là một vùng có hạn
+# mức dung lượng và thời gian sống. Đơn vị bị xóa là từng mục cấp một (một deck,
+# một thư mục upload, một ảnh); mục ít được truy cập gần đây nhất bị xóa trước.
+
+# Chu kỳ quét của luồng nền
+STORAGE_SWEEP_SECONDS = int(os.environ.get("SLIDEGEN_STORAGE_SWEEP_SECONDS", 300))
+# Ghi lại thời điểm truy cập (mtime của mục) tối đa một lần mỗi khoảng này
+STORAGE_TOUCH_SECONDS = 60
+# Mục đang bị xóa được đổi tên trước để người đọc không thấy deck dở dang
+EVICTING_PREFIX = ".evicting-"
+# Thư mục trạng thái trong mỗi vùng: file pin (flock dùng chung giữa các worker
+# uvicorn), khóa bầu luồng quét và metrics của lần quét gần nhất
+STATE_DIR_NAME = ".storage"
+PIN_SUFFIX = ".pin"
+SWEEPER_LOCK_NAME = "sweeper.lock"
+METRICS_FILE_NAME = "metrics.json"
+GB = 1024 * 1024 * 1024
+DAY = 24 * 3600
+
+
+def _area_setting(name, setting, default):
+    return int(os.environ.get(f"SLIDEGEN_{name.upper()}_{setting}", default))
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        os.remove(path)
+
+
+def _open_lock(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return open(path, "a")
+
+
+def _try_lock(path):
+    """File holding an exclusive flock on path, or None when someone holds a lock on it."""
+    f = _open_lock(path)
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return None
+    return f
+
+
+def _is_current(f, path):
+    """Whether the open file f is still the file linked at path."""
+    try:
+        return os.path.samestat(os.fstat(f.fileno()), os.stat(path))
+    except OSError:
+        return False
+
+
+def touch_file(path):
+    """
+    Mark a reused file as recently accessed (areas evict the least recently
+    accessed entries first); False when it no longer exists.
+    """
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _entry_size(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class StorageArea:
+    """
+    A directory whose top-level entries are evicted after ttl_seconds
+    without access, and in least-recently-accessed order while the area
+    holds more than quota_bytes. Names in keep are never touched, nor are
+    the names returned by in_use(), called once per sweep, for entries
+    other data still refers to.
+    """
+
+    def __init__(self, name, root, quota_bytes, ttl_seconds, keep=(), in_use=None):
+        self.name = name
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.ttl_seconds = ttl_seconds
+        self.keep = set(keep)
+        self.in_use = in_use
+        self.bytes = 0
+        self.entries = 0
+        self.pinned_bytes = 0
+        self.evicted_bytes = 0
+        self.evicted_entries = 0
+
+    @classmethod
+    def from_env(cls, name, root, quota_bytes, ttl_seconds, keep=(), in_use=None):
+        """Area with SLIDEGEN_<NAME>_QUOTA_BYTES / SLIDEGEN_<NAME>_TTL_SECONDS overriding the defaults."""
+        return cls(name, root, _area_setting(name, "QUOTA_BYTES", quota_bytes),
+                   _area_setting(name, "TTL_SECONDS", ttl_seconds), keep, in_use)
+
+    def pin_path(self, entry):
+        return os.path.join(self.root, STATE_DIR_NAME, os.path.basename(entry) + PIN_SUFFIX)
+
+    def entry_of(self, path):
+        """Top-level entry of the area containing path, or None."""
+        relative = os.path.relpath(os.path.abspath(path), os.path.abspath(self.root))
+        if relative == os.curdir or relative.startswith(os.pardir):
+            return None
+        return os.path.join(self.root, relative.split(os.sep, 1)[0])
+
+
+class StorageManager:
+    """
+    Enforces quotas and TTLs on a set of StorageAreas.
+
+    Access time is the entry's mtime, refreshed by touch() (filesystem atime
+    is usually disabled or coarse). Entries pinned by an in-flight job or
+    response are never evicted: a pin is a shared flock on the entry's pin
+    file, which eviction must lock exclusively, so pins taken by any worker
+    process count. sweep() runs on a background thread every interval
+    seconds once start() is called, in one process only.
+    """
+
+    def __init__(self, areas=(), interval=STORAGE_SWEEP_SECONDS):
+        self.areas = list(areas)
+        self.interval = interval
+        self.state_dir = None
+        self._pins = {}
+        self._touched = {}
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._sweeper_lock = None
+        self.sweeps = 0
+        self.last_sweep = None
+
+    def add_area(self, area):
+        self.areas.append(area)
+        os.makedirs(area.root, exist_ok=True)
+        return area
+
+    def _entry(self, path):
+        for area in self.areas:
+            entry = area.entry_of(path)
+            if entry is not None:
+                return area, entry
+        return None, None
+
+    def touch(self, path):
+        """Record an access to the entry containing path."""
+        _, entry = self._entry(path)
+        if entry is None:
+            return
+        now = time.time()
+        with self._lock:
+            if now - self._touched.get(entry, 0) < STORAGE_TOUCH_SECONDS:
+                return
+            self._touched[entry] = now
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+
+    def pin(self, path):
+        """
+        Protect the entry containing path from eviction until unpin().
+        Returns the entry, or None when path is outside every area or the
+        entry was evicted while waiting for the pin.
+        """
+        area, entry = self._entry(path)
+        if entry is None:
+            return None
+        pin_path = area.pin_path(entry)
+        while True:
+            # Mỗi pin một file mở riêng: chờ nếu luồng quét đang đổi tên mục này
+            pin_file = _open_lock(pin_path)
+            fcntl.flock(pin_file, fcntl.LOCK_SH)
+            # Luồng quét xóa file pin trước khi nhả khóa: khóa trên inode đã bị unlink không bảo vệ gì, mở lại
+            if _is_current(pin_file, pin_path):
+                break
+            pin_file.close()
+        if not os.path.exists(entry):
+            # Mục đã bị xóa trong lúc chờ
+            pin_file.close()
+            return None
+        with self._lock:
+            self._pins.setdefault(entry, []).append(pin_file)
+        return entry
+
+    def unpin(self, path):
+        _, entry = self._entry(path)
+        if entry is None:
+            return
+        with self._lock:
+            pin_files = self._pins.get(entry)
+            if not pin_files:
+                return
+            pin_file = pin_files.pop()
+            if not pin_files:
+                del self._pins[entry]
+        pin_file.close()
+
+    @contextmanager
+    def pinned(self, *paths):
+        paths = [path for path in paths if path]
+        for path in paths:
+            self.pin(path)
+        try:
+            yield
+        finally:
+            for path in paths:
+                self.unpin(path)
+
+    def _is_pinned(self, area, entry):
+        pin_path = area.pin_path(entry)
+        if not os.path.exists(pin_path):
+            return False
+        lock = _try_lock(pin_path)
+        if lock is None:
+            return True
+        lock.close()
+        return False
+
+    def _evict(self, area, entry, size, reason):
+        trash = os.path.join(area.root, f"{EVICTING_PREFIX}{uuid.uuid4().hex}")
+        # Giữ khóa độc quyền trên file pin trong lúc đổi tên: không worker nào pin được mục giữa hai bước
+        pin_path = area.pin_path(entry)
+        lock = _try_lock(pin_path)
+        if lock is None:
+            return False
+        try:
+            os.replace(entry, trash)
+        except OSError:
+            lock.close()
+            return False
+        try:
+            os.remove(pin_path)
+        except OSError:
+            pass
+        lock.close()
+        _remove(trash)
+        with self._lock:
+            self._touched.pop(entry, None)
+        area.evicted_bytes += size
+        area.evicted_entries += 1
+        logger.info(f"Storage {area.name}: evicted {os.path.basename(entry)} ({size} bytes, {reason})")
+        return True
+
+    def sweep_area(self, area, now=None):
+        now = time.time() if now is None else now
+        entries = []
+        self._remove_stale_pins(area)
+        in_use = area.in_use() if area.in_use is not None else ()
+        for item in os.scandir(area.root):
+            if item.name == STATE_DIR_NAME:
+                continue
+            if item.name.startswith(EVICTING_PREFIX):
+                # Lần xóa trước bị ngắt giữa chừng
+                _remove(item.path)
+                continue
+            if item.name in area.keep or item.name in in_use:
+                continue
+            try:
+                entries.append((item.stat().st_mtime, item.path, _entry_size(item.path)))
+            except OSError:
+                continue
+        entries.sort()
+        total = sum(size for _, _, size in entries)
+        kept = []
+        for accessed, entry, size in entries:
+            if now - accessed > area.ttl_seconds and self._evict(area, entry, size, "expired"):
+                total -= size
+            else:
+                kept.append((accessed, entry, size))
+        for accessed, entry, size in kept:
+            if total <= area.quota_bytes:
+                break
+            if self._evict(area, entry, size, "over quota"):
+                total -= size
+        area.bytes = total
+        area.entries = sum(1 for _, entry, _ in kept if os.path.exists(entry))
+        area.pinned_bytes = sum(size for _, entry, size in kept if self._is_pinned(area, entry))
+        if total > area.quota_bytes:
+            logger.warning(f"Storage {area.name}: {total} bytes held, over quota {area.quota_bytes} (pinned entries)")
+
+    def _remove_stale_pins(self, area):
+        # File pin của mục đã bị xóa (upload đã xử lý xong, deck đã bị xóa)
+        state_dir = os.path.join(area.root, STATE_DIR_NAME)
+        if not os.path.isdir(state_dir):
+            return
+        for name in os.listdir(state_dir):
+            if not name.endswith(PIN_SUFFIX) or os.path.exists(os.path.join(area.root, name[:-len(PIN_SUFFIX)])):
+                continue
+            lock = _try_lock(os.path.join(state_dir, name))
+            if lock is not None:
+                try:
+                    os.remove(os.path.join(state_dir, name))
+                except OSError:
+                    pass
+                lock.close()
+
+    def sweep(self):
+        with self._sweep_lock:
+            started = time.time()
+            for area in self.areas:
+                try:
+                    self.sweep_area(area, started)
+                except OSError as e:
+                    logger.warning(f"Storage {area.name}: sweep failed: {e}")
+            self.sweeps += 1
+            self.last_sweep = {"at": started, "seconds": time.time() - started}
+
+    def is_sweeper(self):
+        """
+        Whether this process runs the sweeps: the first worker to take the
+        sweeper lock in state_dir keeps it for its lifetime; another takes
+        over when it exits. Without state_dir every process sweeps.
+        """
+        if self.state_dir is None or self._sweeper_lock is not None:
+            return True
+        self._sweeper_lock = _try_lock(os.path.join(self.state_dir, SWEEPER_LOCK_NAME))
+        if self._sweeper_lock is not None:
+            logger.info(f"Storage sweeper running in process {os.getpid()}")
+        return self._sweeper_lock is not None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.is_sweeper():
+                self.sweep()
+                self._write_metrics()
+            self._stop.wait(self.interval)
+
+    def start(self, state_dir=None):
+        """Start the background sweeper; with state_dir only one process sweeps and shares its metrics."""
+        self.state_dir = state_dir
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="slidegen-storage", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _write_metrics(self):
+        if self.state_dir is None:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._sweep_metrics(), f)
+            os.replace(tmp_path, os.path.join(self.state_dir, METRICS_FILE_NAME))
+        except OSError as e:
+            logger.warning(f"Cannot write storage metrics: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def metrics(self):
+        """Metrics of the last sweep (read from the sweeping process when it is another one)."""
+        metrics = None
+        if self.state_dir is not None and self._sweeper_lock is None:
+            try:
+                with open(os.path.join(self.state_dir, METRICS_FILE_NAME), "r", encoding="utf-8") as f:
+                    metrics = json.load(f)
+            except (OSError, ValueError):
+                pass
+        if metrics is None:
+            metrics = self._sweep_metrics()
+        with self._lock:
+            metrics["pinned_here"] = sum(len(pin_files) for pin_files in self._pins.values())
+        metrics["sweeper_here"] = self._sweeper_lock is not None or self.state_dir is None
+        return metrics
+
+    def _sweep_metrics(self):
+        return {
+            "sweeps": self.sweeps,
+            "last_sweep": self.last_sweep,
+            "pid": os.getpid(),
+            "areas": {
+                area.name: {
+                    "root": area.root,
+                    "bytes": area.bytes,
+                    "entries": area.entries,
+                    "pinned_bytes": area.pinned_bytes,
+                    "quota_bytes": area.quota_bytes,
+                    "ttl_seconds": area.ttl_seconds,
+                    "evicted_bytes": area.evicted_bytes,
+                    "evicted_entries": area.evicted_entries,
+                }
+                for area in self.areas
+            },
+        }
+
+
+storage_manager = StorageManager()
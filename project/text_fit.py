@@ -0,0 +1,263 @@
+import html
+import logging
+import math
+import os
+import re
+from functools import lru_cache
+
+from PIL import ImageFont
+
+logger = logging.getLogger(__name__)
+
+# Ước lượng layout offline bằng metric font thật (PIL ImageFont) để chỉnh
+# *_font_size hoặc tách slide trước khi render, thay vì chờ Chrome + VLM báo tràn chữ.
+
+# Font dùng để đo, thử lần lượt. Roboto là font của các template: cài gói
+# fonts-roboto (PIL tìm theo tên file trong thư mục font hệ thống) hoặc đặt
+# SLIDEGEN_FIT_FONT là đường dẫn tới file .ttf. Arial/DejaVuSans rộng hơn
+# Roboto, nên khi phải dùng chúng chữ bị thu nhỏ/tách sớm hơn cần thiết.
+FIT_FONT = os.environ.get("SLIDEGEN_FIT_FONT")
+TEMPLATE_FONT_NAMES = ("Roboto-Regular.ttf", "Roboto.ttf")
+FIT_FONT_CANDIDATES = tuple(filter(None, (FIT_FONT,) + TEMPLATE_FONT_NAMES + (
+    "Arial.ttf",
+    "DejaVuSans.ttf",
+)))
+MIN_FONT_PX = int(os.environ.get("SLIDEGEN_FIT_MIN_FONT_PX", 16))
+SHRINK_STEP = 0.92
+DEFAULT_FONT_PX = 16
+
+_TAG = re.compile(r"<[^>]+>")
+_SIZE = re.compile(r"^\s*([\d.]+)\s*(px|pt|em|rem)?\s*$")
+_PERCENT = re.compile(r"^\s*(\d*\.?\d+)\s*%\s*$")
+
+
+@lru_cache(maxsize=None)
+def _font_path():
+    for candidate in FIT_FONT_CANDIDATES:
+        try:
+            ImageFont.truetype(candidate, DEFAULT_FONT_PX)
+        except OSError:
+            if candidate == FIT_FONT:
+                logger.warning(f"SLIDEGEN_FIT_FONT={FIT_FONT} cannot be loaded, trying the default fonts")
+            continue
+        if candidate != FIT_FONT and candidate not in TEMPLATE_FONT_NAMES:
+            logger.warning(f"Roboto not found, measuring text with {candidate}: text is fitted more "
+                           f"conservatively than needed (install fonts-roboto or set SLIDEGEN_FIT_FONT)")
+        return candidate
+    logger.warning("No TrueType font found for text fitting, using PIL's default font")
+    return None
+
+
+@lru_cache(maxsize=256)
+def _font(size_px):
+    path = _font_path()
+    if path is None:
+        try:
+            return ImageFont.load_default(size_px)
+        except TypeError:
+            # Pillow < 10.1: font bitmap cỡ cố định, chỉ dùng để ước lượng thô
+            return ImageFont.load_default()
+    return ImageFont.truetype(path, size_px)
+
+
+def parse_font_px(value):
+    """CSS font size to pixels; None when it cannot be measured (e.g. 'larger', '2vw')."""
+    match = _SIZE.match(str(value))
+    if not match:
+        return None
+    number = float(match.group(1))
+    unit = match.group(2) or "px"
+    if unit == "pt":
+        return number * 4 / 3
+    if unit in ("em", "rem"):
+        return number * DEFAULT_FONT_PX
+    return number
+
+
+def plain_text(value):
+    return html.unescape(_TAG.sub("", str(value)))
+
+
+def wrapped_lines(text, size_px, width):
+    """Number of lines text wraps to in a box width pixels wide."""
+    font = _font(max(1, round(size_px)))
+    width = max(width, 1)
+    space = font.getlength(" ")
+    lines = 0
+    for paragraph in plain_text(text).split("\n"):
+        lines += 1
+        used = 0.0
+        for word in paragraph.split():
+            word_width = font.getlength(word)
+            if used and used + space + word_width > width:
+                lines += 1
+                used = word_width
+            else:
+                used += (space if used else 0.0) + word_width
+            # Một từ dài hơn cả dòng bị bẻ ở nhiều dòng
+            if used > width:
+                overflow = math.ceil(used / width) - 1
+                lines += overflow
+                used -= overflow * width
+    return lines
+
+
+class TextBlock:
+    """
+    A text field of a template and the box it is laid out in.
+
+    size_param None means the text uses the browser default size. kind is 'text' (one string), 'list' (one item per line group, as in
+    list_items) or 'sections' (dict of heading -> items, laid out in side by
+    side columns; the tallest column counts). width is in pixels; when
+    width_param names a percentage parameter it is taken relative to width.
+    gap is the vertical space added per paragraph/item.
+    """
+
+    def __init__(self, field, size_param, width, line_height=1.2, gap=0, kind="text",
+                 shrink=True, width_param=None, line_height_param=None, heading_size_param=None,
+                 heading_height=0):
+        self.field = field
+        self.size_param = size_param
+        self.width = width
+        self.line_height = line_height
+        self.gap = gap
+        self.kind = kind
+        self.shrink = shrink
+        self.width_param = width_param
+        self.line_height_param = line_height_param
+        self.heading_size_param = heading_size_param
+        self.heading_height = heading_height
+
+    def _width(self, values):
+        if self.width_param:
+            match = _PERCENT.match(str(values.get(self.width_param, "")))
+            # Phần trăm <= 0 (model gửi "0%") không phải bề rộng hợp lệ
+            if match and float(match.group(1)) > 0:
+                return self.width * float(match.group(1)) / 100
+        return self.width
+
+    def _line_height(self, values):
+        if self.line_height_param:
+            try:
+                return float(values[self.line_height_param])
+            except (KeyError, TypeError, ValueError):
+                pass
+        return self.line_height
+
+    def height(self, values, size_px):
+        value = values.get(self.field)
+        if value is None:
+            return 0.0
+        width = self._width(values)
+        line_px = size_px * self._line_height(values)
+        if self.kind == "text":
+            return wrapped_lines(value, size_px, width) * line_px + self.gap
+        if self.kind == "list":
+            return sum(wrapped_lines(item, size_px, width) * line_px + self.gap for item in value)
+        # sections: các cột cạnh nhau, lấy cột cao nhất
+        heading_px = parse_font_px(values.get(self.heading_size_param, "")) or size_px
+        tallest = 0.0
+        for heading, items in value.items():
+            column = wrapped_lines(heading, heading_px, width) * heading_px * 1.2 + self.heading_height
+            column += sum(wrapped_lines(item, size_px, width) * line_px + self.gap for item in items)
+            tallest = max(tallest, column)
+        return tallest
+
+
+class FitSpec:
+    """
+    How a template's text has to fit: the blocks stacked in a box of height
+    pixels (fixed_height is taken by decorations and margins). split_field
+    names the list argument to divide across slides when shrinking to
+    MIN_FONT_PX is not enough; first_only names the text arguments (intro
+    paragraph, subtitle) kept on the first of those slides only and emptied
+    on the continuation slides. Headings are repeated on every slide.
+    """
+
+    def __init__(self, height, blocks, fixed_height=0, split_field=None, first_only=()):
+        self.height = height
+        self.blocks = tuple(blocks)
+        self.fixed_height = fixed_height
+        self.split_field = split_field
+        self.first_only = tuple(first_only)
+
+    def measure(self, values, sizes):
+        return self.fixed_height + sum(
+            block.height(values, sizes[block.size_param]) for block in self.blocks if block.size_param in sizes
+        )
+
+    def _sizes(self, values):
+        sizes = {None: DEFAULT_FONT_PX}
+        for block in self.blocks:
+            if block.size_param is None:
+                continue
+            size = parse_font_px(values.get(block.size_param, ""))
+            if size is not None:
+                sizes[block.size_param] = size
+        return sizes
+
+    def fits(self, values):
+        return self.measure(values, self._sizes(values)) <= self.height
+
+
+def _format_px(size):
+    return f"{int(size)}px"
+
+
+def fit_arguments(tool_spec, arguments, allow_split=True):
+    """
+    Adjust arguments of a registered tool so its text fits the slide.
+
+    Shrinks the shrinkable *_font_size parameters step by step down to
+    MIN_FONT_PX; if the text still overflows and allow_split is set, splits
+    fit.split_field in two and fits each half. Returns a list of argument
+    dicts, one per slide. Tools without a fit spec are returned unchanged.
+    """
+    fit = tool_spec.fit
+    template = getattr(tool_spec.function, "template", None)
+    if fit is None or template is None:
+        return [arguments]
+    values = template.values(**arguments)
+    sizes = fit._sizes(values)
+    shrinkable = {block.size_param for block in fit.blocks
+                  if block.shrink and block.size_param is not None and block.size_param in sizes}
+    if fit.measure(values, sizes) <= fit.height:
+        return [arguments]
+
+    fitted = dict(sizes)
+    adjusted = dict(arguments)
+    while fit.measure(values, fitted) > fit.height:
+        smaller = {name: size for name, size in fitted.items() if name in shrinkable and size > MIN_FONT_PX}
+        if not smaller:
+            break
+        for name, size in smaller.items():
+            fitted[name] = max(MIN_FONT_PX, int(size * SHRINK_STEP))
+
+    if fit.measure(values, fitted) <= fit.height:
+        for name in shrinkable:
+            if fitted[name] != sizes[name]:
+                adjusted[name] = _format_px(fitted[name])
+        logger.info(f"{tool_spec.name}: fitted font sizes {', '.join(f'{n}={adjusted[n]}' for n in sorted(shrinkable) if n in adjusted)}")
+        return [adjusted]
+
+    items = values.get(fit.split_field)
+    if not allow_split or fit.split_field is None or not items or len(items) < 2:
+        logger.warning(f"{tool_spec.name}: text overflows even at {MIN_FONT_PX}px")
+        adjusted.update({name: _format_px(fitted[name]) for name in shrinkable})
+        return [adjusted]
+
+    keys = list(items)
+    half = (len(keys) + 1) // 2
+    if isinstance(items, dict):
+        parts = [{k: items[k] for k in keys[:half]}, {k: items[k] for k in keys[half:]}]
+    else:
+        parts = [items[:half], items[half:]]
+    logger.info(f"{tool_spec.name}: splitting {fit.split_field} ({len(keys)} items) across two slides")
+    result = []
+    for i, part in enumerate(parts):
+        part_arguments = {**arguments, fit.split_field: part}
+        if i > 0:
+            # Đoạn mở đầu/phụ đề chỉ nằm ở slide đầu, không lặp lại trên slide tiếp theo
+            part_arguments.update({name: "" for name in fit.first_only})
+        result.extend(fit_arguments(tool_spec, part_arguments))
+    return result
@@ -0,0 +1,168 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+from PIL import Image
+from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+
+from storage import touch_file
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+THUMB_DIR = os.path.join(PROJECT_DIR, "static", "thumbs")
+THUMB_URL_PREFIX = "/static/thumbs"
+
+# Chiều rộng tối đa của từng kích thước; None = giữ nguyên ảnh gốc
+THUMBNAIL_SIZES = {
+    "grid": 240,
+    "preview": 960,
+    "full": None,
+}
+THUMBNAIL_FORMAT = "webp"
+SOURCE_EXTENSIONS = ("png", "webp", "jpg", "jpeg")
+THUMBNAIL_QUALITY = 80
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+os.makedirs(THUMB_DIR, exist_ok=True)
+
+_digest_lock = threading.Lock()
+# (path, mtime, size) -> digest, tránh hash lại file không đổi
+_digest_memo = {}
+
+
+def _file_digest(path):
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _digest_lock:
+        digest = _digest_memo.get(memo_key)
+    if digest:
+        return digest
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    digest = h.hexdigest()[:32]
+    with _digest_lock:
+        _digest_memo[memo_key] = digest
+    return digest
+
+
+def _find_source(digest):
+    for ext in SOURCE_EXTENSIONS:
+        path = os.path.join(THUMB_DIR, f"{digest}_full.{ext}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def register_image(src_path):
+    """
+    Add a slide image to the thumbnail store and return its content digest.
+
+    The original is linked (or copied) as the 'full' variant so the smaller
+    sizes can be derived later without knowing where the slide lives.
+    """
+    digest = _file_digest(src_path)
+    # Ảnh đã có thì chỉ ghi lại lần dùng: vùng thumbs xóa ảnh ít dùng nhất trước
+    source = _find_source(digest)
+    if source is None or not touch_file(source):
+        ext = os.path.splitext(src_path)[1].lstrip(".").lower()
+        if ext not in SOURCE_EXTENSIONS:
+            raise ValueError(f"Unsupported slide image: {src_path}")
+        target = os.path.join(THUMB_DIR, f"{digest}_full.{ext}")
+        try:
+            os.link(src_path, target)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copyfile(src_path, target)
+    return digest
+
+
+def register_image_bytes(data, ext):
+    """register_image for an image still in memory (e.g. a slide being generated)."""
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    source = _find_source(digest)
+    if source is None or not touch_file(source):
+        ext = ext.lower()
+        if ext not in SOURCE_EXTENSIONS:
+            raise ValueError(f"Unsupported slide image format: {ext}")
+        fd, tmp_path = tempfile.mkstemp(dir=THUMB_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(THUMB_DIR, f"{digest}_full.{ext}"))
+    return digest
+
+
+def thumbnail_urls(src_path):
+    """URLs of every size of src_path, keyed by size name."""
+    return _digest_urls(register_image(src_path))
+
+
+def thumbnail_urls_for_bytes(data, ext):
+    """URLs of every size of an in-memory image, keyed by size name."""
+    return _digest_urls(register_image_bytes(data, ext))
+
+
+def _digest_urls(digest):
+    full_name = os.path.basename(_find_source(digest))
+    urls = {}
+    for size, width in THUMBNAIL_SIZES.items():
+        name = full_name if width is None else f"{digest}_{size}.{THUMBNAIL_FORMAT}"
+        urls[size] = f"{THUMB_URL_PREFIX}/{name}"
+    return urls
+
+
+def materialize(name):
+    """Create the thumbnail file 'name' from its registered source; return its path or None."""
+    stem, _, ext = name.rpartition(".")
+    digest, _, size = stem.rpartition("_")
+    if ext != THUMBNAIL_FORMAT or THUMBNAIL_SIZES.get(size) is None:
+        return None
+    source = _find_source(digest)
+    if source is None:
+        return None
+    target = os.path.join(THUMB_DIR, name)
+    if os.path.exists(target):
+        return target
+    with Image.open(source) as image:
+        width = THUMBNAIL_SIZES[size]
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+        fd, tmp_path = tempfile.mkstemp(dir=THUMB_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            image.save(f, format=THUMBNAIL_FORMAT.upper(), quality=THUMBNAIL_QUALITY)
+    os.replace(tmp_path, target)
+    logger.info(f"Created thumbnail {name}")
+    return target
+
+
+class ThumbnailStaticFiles(StaticFiles):
+    """
+    Static mount for THUMB_DIR: missing sizes are generated on first request
+    and every response is marked immutable, since names are content hashes.
+    """
+
+    async def get_response(self, path, scope):
+        try:
+            response = await super().get_response(path, scope)
+            if response.status_code != 404:
+                response.headers["Cache-Control"] = CACHE_CONTROL
+                return response
+        except HTTPException as e:
+            if e.status_code != 404:
+                raise
+        if os.sep in path or "/" in path or not await run_in_threadpool(materialize, path):
+            raise HTTPException(status_code=404)
+        response = await super().get_response(path, scope)
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        return response
@@ -0,0 +1,111 @@
+import logging
+import math
+import os
+import statistics
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Đóng gói nội dung slide theo số token thật của tokenizer thay vì số ký tự:
+# tiếng Việt có dấu ra nhiều token hơn tiếng Anh cùng độ dài.
+
+# Token cho phần prompt riêng của mỗi slide (không tính prefix system + tools đã cache)
+SLIDE_PROMPT_TOKENS = int(os.environ.get("SLIDEGEN_SLIDE_PROMPT_TOKENS", 1536))
+# Token sinh tối đa cho một lời gọi hàm (max_new_tokens)
+SLIDE_OUTPUT_TOKENS = int(os.environ.get("SLIDEGEN_SLIDE_OUTPUT_TOKENS", 512))
+# Phần cố định của lời gọi hàm: JSON, tên hàm, tham số màu/kích thước chữ
+CALL_OVERHEAD_TOKENS = 160
+# Phần cố định của demand prompt
+DEMAND_OVERHEAD_TOKENS = 130
+# Số token sinh ra cho mỗi token nội dung (mô hình chép lại nội dung vào tham số)
+ECHO_RATIO = 1.0
+# Tỉ lệ tối thiểu: đơn vị nhỏ hơn được gộp với phần kế tiếp
+MIN_FILL_RATIO = 0.3
+
+COUNT_CACHE_SIZE = 65536
+# Khi không có tokenizer: ước lượng theo số byte UTF-8
+BYTES_PER_TOKEN = 3.5
+
+
+def content_token_budget(prompt_tokens=SLIDE_PROMPT_TOKENS, output_tokens=SLIDE_OUTPUT_TOKENS):
+    """
+    Largest slide content (in tokens) that keeps both the prompt and the
+    generated call within their targets. The prompt carries the previous
+    slide's content and call as well as the current content.
+    """
+    by_prompt = (prompt_tokens - DEMAND_OVERHEAD_TOKENS - CALL_OVERHEAD_TOKENS) / (2 + ECHO_RATIO)
+    by_output = (output_tokens - CALL_OVERHEAD_TOKENS) / ECHO_RATIO
+    return max(1, int(min(by_prompt, by_output)))
+
+
+class TokenCounter:
+    """
+    Token counts of text pieces, cached (LRU) so every chunk is tokenized
+    once however many times the packer looks at it.
+    """
+
+    def __init__(self, tokenizer=None, max_entries=COUNT_CACHE_SIZE):
+        self.tokenizer = tokenizer
+        self.max_entries = max_entries
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _count(self, text):
+        if self.tokenizer is None:
+            return math.ceil(len(text.encode("utf-8")) / BYTES_PER_TOKEN)
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def __call__(self, text):
+        with self._lock:
+            count = self._counts.get(text)
+            if count is not None:
+                self._counts.move_to_end(text)
+                self.hits += 1
+                return count
+            self.misses += 1
+        count = self._count(text)
+        with self._lock:
+            self._counts[text] = count
+            if len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+        return count
+
+
+def size_report(sizes):
+    """Distribution of slide sizes (tokens): count, min/mean/percentiles/max and a histogram."""
+    if not sizes:
+        return {"slides": 0}
+    ordered = sorted(sizes)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    step = max(1, math.ceil(ordered[-1] / 8 / 50) * 50)
+    histogram = OrderedDict()
+    for size in ordered:
+        low = size // step * step
+        key = f"{low}-{low + step - 1}"
+        histogram[key] = histogram.get(key, 0) + 1
+    return {
+        "slides": len(ordered),
+        "total_tokens": sum(ordered),
+        "min": ordered[0],
+        "mean": round(statistics.mean(ordered), 1),
+        "p50": percentile(50),
+        "p90": percentile(90),
+        "max": ordered[-1],
+        "stdev": round(statistics.pstdev(ordered), 1),
+        "histogram": dict(histogram),
+    }
+
+
+def format_size_report(report):
+    if not report.get("slides"):
+        return "no slides"
+    histogram = ", ".join(f"{bucket}: {count}" for bucket, count in report["histogram"].items())
+    return (f"{report['slides']} slides, tokens min {report['min']} / p50 {report['p50']} / "
+            f"p90 {report['p90']} / max {report['max']} (mean {report['mean']}, stdev {report['stdev']}); "
+            f"histogram {histogram}")
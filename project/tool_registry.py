@@ -0,0 +1,305 @@
+import difflib
+import hashlib
+import inspect
+import json
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Registry các hàm sinh slide dùng làm tool cho LLM: name -> ToolSpec
+TOOL_REGISTRY = {}
+
+_registry_lock = threading.Lock()
+# Tăng mỗi lần đăng ký tool mới để làm mất hiệu lực các dạng đã cache
+_registry_version = 0
+_schemas_cache = None
+_prompt_cache = {}
+
+_SPHINX_PARAM = re.compile(r"^\s*:param\s+(\w+):\s*(.+)$")
+_ARGS_PARAM = re.compile(r"^\s+(\w+):\s*(.+)$")
+_USER_PLACEHOLDER = "\x00SLIDEGEN_USER_CONTENT\x00"
+_JSON_TYPES = (
+    (bool, "boolean"),
+    (int, "integer"),
+    (float, "number"),
+    (str, "string"),
+    (list, "array"),
+    (tuple, "array"),
+    (dict, "object"),
+)
+
+
+def _json_schema(value):
+    for python_type, json_type in _JSON_TYPES:
+        if isinstance(value, python_type):
+            break
+    else:
+        return {"type": "string"}
+    schema = {"type": json_type}
+    if json_type == "array":
+        schema["items"] = _json_schema(value[0]) if value else {"type": "string"}
+    elif json_type == "object" and value:
+        schema["additionalProperties"] = _json_schema(next(iter(value.values())))
+    return schema
+
+
+def _docstring_parts(fn):
+    """(summary, {param: description}) from a ':param x:' or 'Args:' style docstring."""
+    doc = inspect.getdoc(fn) or ""
+    summary = doc.split("\n\n", 1)[0].split("\n:param", 1)[0].strip()
+    params = {}
+    in_args = False
+    for line in doc.splitlines():
+        match = _SPHINX_PARAM.match(line)
+        if match:
+            params[match.group(1)] = match.group(2).strip()
+            continue
+        if line.strip() == "Args:":
+            in_args = True
+            continue
+        if in_args:
+            match = _ARGS_PARAM.match(line)
+            if match:
+                params[match.group(1)] = match.group(2).strip()
+            elif line.strip():
+                in_args = False
+    return " ".join(summary.split()), params
+
+
+class ToolSpec:
+    """
+    A registered slide function and its JSON schema.
+
+    Types and defaults come from the signature (None defaults are resolved
+    through the template's derived values), descriptions from the explicit
+    overrides, then the docstring, then the parameter name. fit is the
+    optional text_fit.FitSpec used to size text before rendering.
+    """
+
+    def __init__(self, function, description=None, params=None, fit=None):
+        self.function = function
+        self.fit = fit
+        self.name = function.__name__
+        self.signature = inspect.signature(function)
+        summary, doc_params = _docstring_parts(function)
+        self.description = description or summary or self.name.replace("_", " ")
+        self.param_descriptions = {**doc_params, **(params or {})}
+        self.schema = self._build_schema()
+        self._coercers = {
+            name: prop for name, prop in self.schema["function"]["parameters"]["properties"].items()
+        }
+
+    def _defaults(self):
+        defaults = {name: param.default for name, param in self.signature.parameters.items()}
+        template = getattr(self.function, "template", None)
+        if template is not None:
+            # list_items=None, sections=None... được template thay bằng nội dung mặc định
+            resolved = template.values()
+            defaults.update({name: resolved[name] for name, value in defaults.items() if value is None})
+        return defaults
+
+    def _build_schema(self):
+        properties = {}
+        for name, default in self._defaults().items():
+            prop = _json_schema(default)
+            if default is not None:
+                prop["default"] = default
+            prop["description"] = self.param_descriptions.get(name, name.replace("_", " ").capitalize())
+            properties[name] = prop
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": {"type": "object", "properties": properties, "required": []},
+            },
+        }
+
+    def coerce_arguments(self, arguments):
+        """
+        Make LLM-produced arguments fit the schema instead of failing the call:
+        misspelled names are mapped to the closest parameter, values are
+        converted to the declared type, and anything unusable is dropped so
+        the default applies.
+        """
+        if not isinstance(arguments, dict):
+            logger.warning(f"{self.name}: arguments are not an object, using defaults")
+            return {}
+        coerced = {}
+        for key, value in arguments.items():
+            name = key
+            if name not in self._coercers:
+                matches = difflib.get_close_matches(key, [p for p in self._coercers if p not in arguments], n=1, cutoff=0.8)
+                if not matches:
+                    logger.warning(f"{self.name}: dropping unknown argument '{key}'")
+                    continue
+                name = matches[0]
+                logger.warning(f"{self.name}: argument '{key}' mapped to '{name}'")
+            try:
+                value = _coerce(value, self._coercers[name])
+            except (TypeError, ValueError) as e:
+                logger.warning(f"{self.name}: dropping argument '{key}': {e}")
+                continue
+            if value is not None:
+                coerced[name] = value
+        return coerced
+
+
+def _coerce(value, schema):
+    json_type = schema["type"]
+    if value is None:
+        return None
+    if json_type == "string":
+        if isinstance(value, (list, tuple)):
+            return " ".join(str(item) for item in value)
+        if isinstance(value, dict):
+            raise TypeError("expected a string, got an object")
+        return value if isinstance(value, str) else str(value)
+    if json_type == "integer":
+        if isinstance(value, bool):
+            raise TypeError("expected an integer, got a boolean")
+        return int(float(value))
+    if json_type == "number":
+        return float(value)
+    if json_type == "boolean":
+        if isinstance(value, str):
+            return value.strip().lower() in ("true", "1", "yes")
+        return bool(value)
+    if json_type == "array":
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                value = [line.strip(" -*•") for line in value.splitlines() if line.strip()]
+        if isinstance(value, dict):
+            value = list(value.values())
+        if not isinstance(value, (list, tuple)):
+            value = [value]
+        return [_coerce(item, schema["items"]) for item in value if item is not None]
+    if json_type == "object":
+        if isinstance(value, str):
+            value = json.loads(value)
+        if not isinstance(value, dict):
+            raise TypeError("expected an object")
+        item_schema = schema.get("additionalProperties")
+        if item_schema is None:
+            return value
+        return {str(k): _coerce(v, item_schema) for k, v in value.items() if v is not None}
+    return value
+
+
+def tool(description=None, params=None, fit=None):
+    """
+    Register a slide function as an LLM tool.
+
+    description and params (parameter name -> description) override what is
+    derived from the docstring; fit declares how its text must fit the slide.
+    """
+    def decorator(fn):
+        global _registry_version, _schemas_cache
+        spec = ToolSpec(fn, description=description, params=params, fit=fit)
+        with _registry_lock:
+            if spec.name in TOOL_REGISTRY:
+                raise ValueError(f"Tool '{spec.name}' is already registered")
+            TOOL_REGISTRY[spec.name] = spec
+            _registry_version += 1
+            _schemas_cache = None
+            _prompt_cache.clear()
+        fn.tool = spec
+        return fn
+    return decorator
+
+
+def get_tool(name):
+    try:
+        return TOOL_REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Function with name '{name}' not found.") from None
+
+
+def _schemas():
+    global _schemas_cache
+    with _registry_lock:
+        if _schemas_cache is None:
+            schemas = [spec.schema for spec in TOOL_REGISTRY.values()]
+            serialized = json.dumps(schemas, ensure_ascii=False, sort_keys=True)
+            digest = hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+            _schemas_cache = (schemas, serialized, digest)
+        return _schemas_cache
+
+
+def tool_schemas():
+    """JSON schemas of every registered tool, in registration order (cached)."""
+    return _schemas()[0]
+
+
+def tools_json():
+    """Serialized tool schemas (cached)."""
+    return _schemas()[1]
+
+
+def tools_digest():
+    """sha256 of the serialized tool schemas; changes whenever a schema does."""
+    return _schemas()[2]
+
+
+class PromptPrefix:
+    """
+    A chat prompt split around the user message. Everything up to the user
+    content (system message and tool schemas) is identical for every slide,
+    so its text and token ids are computed once per tokenizer.
+
+    The cached ids stop right after the last special token of the prefix
+    (e.g. "<|im_start|>"): special tokens are never merged with their
+    neighbours, so encode() gives the same ids as tokenizing the whole text.
+    The rest of the prefix ("user\n") is tokenized with the user content.
+    """
+
+    def __init__(self, prefix, suffix, input_ids, digest, tail=""):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.input_ids = input_ids
+        self.digest = digest
+        self.tail = tail
+
+    def text(self, user_content):
+        return self.prefix + user_content + self.suffix
+
+    def encode(self, tokenizer, user_content):
+        """Token ids of the full prompt, reusing the cached prefix ids."""
+        return self.input_ids + tokenizer(self.tail + user_content + self.suffix,
+                                          add_special_tokens=False)["input_ids"]
+
+
+def _special_token_boundary(tokenizer, text):
+    # Vị trí ngay sau special token cuối cùng trong text (0 nếu không có)
+    boundary = 0
+    for token in getattr(tokenizer, "all_special_tokens", []):
+        position = text.rfind(token)
+        if position != -1:
+            boundary = max(boundary, position + len(token))
+    return boundary
+
+
+def prompt_prefix(tokenizer, system_content):
+    """Cached PromptPrefix for tokenizer's chat template with every registered tool."""
+    key = (id(tokenizer), system_content, _registry_version)
+    cached = _prompt_cache.get(key)
+    if cached is not None:
+        return cached
+    messages = [
+        {"role": "system", "content": system_content},
+        {"role": "user", "content": _USER_PLACEHOLDER},
+    ]
+    text = tokenizer.apply_chat_template(messages, tools=tool_schemas(), add_generation_prompt=True, tokenize=False)
+    prefix, suffix = text.split(_USER_PLACEHOLDER)
+    boundary = _special_token_boundary(tokenizer, prefix)
+    input_ids = tokenizer(prefix[:boundary], add_special_tokens=False)["input_ids"]
+    digest = hashlib.sha256(f"{tools_digest()}|{prefix}".encode("utf-8")).hexdigest()
+    cached = PromptPrefix(prefix, suffix, input_ids, digest, tail=prefix[boundary:])
+    logger.info(f"Prompt prefix cached: {len(input_ids)} tokens, {len(TOOL_REGISTRY)} tools")
+    with _registry_lock:
+        _prompt_cache[key] = cached
+    return cached
@@ -0,0 +1,123 @@
+import logging
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Ghi zip theo luồng: mỗi entry được nén rồi gửi đi ngay, chỉ giữ lại bản ghi
+# central directory (vài chục byte mỗi file); không có file trung gian nào.
+
+# Số luồng nén song song (zlib nhả GIL khi nén)
+ZIP_WORKERS = int(os.environ.get("SLIDEGEN_ZIP_WORKERS", min(4, os.cpu_count() or 1)))
+# Số entry tối đa đang nén/chờ gửi cùng lúc: bộ nhớ giới hạn theo cửa sổ, không theo deck
+ZIP_WINDOW = int(os.environ.get("SLIDEGEN_ZIP_WINDOW", 2 * ZIP_WORKERS))
+ZIP_COMPRESS_LEVEL = int(os.environ.get("SLIDEGEN_ZIP_COMPRESS_LEVEL", 6))
+# Ảnh đã nén sẵn, deflate thêm chỉ tốn CPU
+STORED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".zip"}
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+# Bit 11: tên file mã hóa UTF-8
+FLAG_UTF8 = 0x800
+VERSION = 20
+ZIP32_LIMIT = 0xFFFFFFFF
+ENTRY_LIMIT = 0xFFFF
+
+
+def _dos_time(timestamp):
+    t = time.localtime(timestamp)
+    year = max(t.tm_year, 1980)
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+def compress_entry(data, method=ZIP_DEFLATED, level=ZIP_COMPRESS_LEVEL):
+    """(crc32, payload) of one entry; runs in a worker thread."""
+    if method == ZIP_DEFLATED:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        payload = compressor.compress(data) + compressor.flush()
+    else:
+        payload = data
+    return zlib.crc32(data), payload
+
+
+def entry_method(name):
+    return ZIP_STORED if os.path.splitext(name)[1].lower() in STORED_EXTENSIONS else ZIP_DEFLATED
+
+
+class StreamingZipWriter:
+    """
+    Incremental zip writer.
+
+    add() takes an already compressed entry and returns its local header
+    and data; close() returns the central directory. The concatenation is
+    a complete archive. Only the central directory records are kept.
+    """
+
+    def __init__(self, timestamp=None):
+        self.time, self.date = _dos_time(time.time() if timestamp is None else timestamp)
+        self.offset = 0
+        self.records = []
+
+    def add(self, name, size, crc, payload, method):
+        encoded = name.encode("utf-8")
+        if self.offset > ZIP32_LIMIT or size > ZIP32_LIMIT or len(self.records) >= ENTRY_LIMIT:
+            raise ValueError("Archive too large for a non-ZIP64 zip")
+        fields = (VERSION, FLAG_UTF8, method, self.time, self.date, crc, len(payload), size, len(encoded))
+        header = struct.pack("<4s5HIIIHH", b"PK\x03\x04", *fields, 0) + encoded
+        self.records.append((fields, encoded, self.offset))
+        self.offset += len(header) + len(payload)
+        return header + payload
+
+    def close(self):
+        directory = []
+        for fields, encoded, offset in self.records:
+            directory.append(struct.pack("<4sH5HIIIHHHHHII", b"PK\x01\x02", VERSION, *fields,
+                                         0, 0, 0, 0, 0, offset) + encoded)
+        directory = b"".join(directory)
+        end = struct.pack("<4s4HIIH", b"PK\x05\x06", 0, 0, len(self.records), len(self.records),
+                          len(directory), self.offset, 0)
+        self.offset += len(directory) + len(end)
+        return directory + end
+
+
+def iter_zip(entries, workers=ZIP_WORKERS, window=ZIP_WINDOW, level=ZIP_COMPRESS_LEVEL):
+    """
+    Bytes of a zip of (name, data) entries, produced as entries come in.
+
+    With several workers, up to window entries are compressed in parallel
+    ahead of the one being sent; output order is the input order.
+    """
+    writer = StreamingZipWriter()
+    if workers <= 1:
+        for name, data in entries:
+            method = entry_method(name)
+            yield writer.add(name, len(data), *compress_entry(data, method, level), method)
+        yield writer.close()
+        return
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="slidegen-zip") as executor:
+        try:
+            for name, data in entries:
+                if len(pending) >= max(window, 1):
+                    yield _finish(writer, pending.popleft())
+                method = entry_method(name)
+                pending.append((name, len(data), method, executor.submit(compress_entry, data, method, level)))
+            while pending:
+                yield _finish(writer, pending.popleft())
+        finally:
+            # Client ngắt kết nối giữa chừng: bỏ các entry chưa nén
+            for *_, future in pending:
+                future.cancel()
+    yield writer.close()
+
+
+def _finish(writer, item):
+    name, size, method, future = item
+    crc, payload = future.result()
+    return writer.add(name, size, crc, payload, method)